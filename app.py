@@ -1,396 +1,1901 @@
-import os
-import re
-import datetime
-import markdown
-from flask import Flask, render_template, request, redirect, url_for, flash, abort, send_from_directory, session
-from flask_wtf import CSRFProtect
-from flask_session import Session
-from functools import wraps
-
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', 'netrun-development-key')
-
-# Configuration values such as the secret key are read directly from
-# environment variables. The application does not rely on a separate
-# `config.py` module.
-
-# Session config
-app.config['SESSION_TYPE'] = 'filesystem'
-Session(app)
-
-# Enable CSRF protection
-csrf = CSRFProtect(app)
-
-# Create blog post directory if it doesn't exist
-BLOG_POST_DIR = os.path.join(app.root_path, 'blog_posts')
-os.makedirs(BLOG_POST_DIR, exist_ok=True)
-
-def requires_auth(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        if not session.get('user'):
-            session['state'] = request.url
-            return redirect(url_for('login'))
-        return f(*args, **kwargs)
-    return decorated
-
-@app.route('/')
-def index():
-    now = datetime.datetime.now()
-    return render_template('index.html', now=now)
-
-@app.route('/product/nexus-core')  # INTITKON (I**N**TITKON) Core Platform
-def product_nexus_core():
-    now = datetime.datetime.now()
-    # Render INTITKON (I**N**TITKON) Core Platform page
-    return render_template('product_nexus_core.html', now=now)
-
-@app.route('/product/cost-optimizer')
-def product_cost_optimizer():
-    now = datetime.datetime.now()
-    return render_template('product_cost_optimizer.html', now=now)
-
-@app.route('/product/compliance-reporter')
-def product_compliance_reporter():
-    now = datetime.datetime.now()
-    return render_template('product_compliance_reporter.html', now=now)
-
-@app.route('/product/governance-dashboard')
-def product_governance_dashboard():
-    now = datetime.datetime.now()
-    return render_template('product_governance_dashboard.html', now=now)
-
-@app.route('/early-access', methods=['GET', 'POST'])
-def early_access():
-    now = datetime.datetime.now()
-    if request.method == 'POST':
-        name = request.form.get('name')
-        company = request.form.get('company')
-        email = request.form.get('email')
-        role = request.form.get('role')
-        tenants = request.form.get('tenants')
-        message = request.form.get('message')
-        
-        # In a production environment, this would send an email to NSXearlyaccess@netrunsystems.com
-        # For now, just show a success message
-        flash(
-            f'Thank you for your interest in our Early Access Program! '
-            f'Role: {role}, Tenants: {tenants}. We will contact you shortly.',
-            'success'
-        )
-        return redirect(url_for('early_access'))
-        
-    return render_template('early_access.html', now=now)
-
-@app.route('/blog')
-def blog():
-    now = datetime.datetime.now()
-    posts = get_blog_posts()
-    return render_template('blog.html', posts=posts, now=now)
-
-@app.route('/blog/<slug>')
-def blog_post(slug):
-    now = datetime.datetime.now()
-    post = get_blog_post(slug)
-    if post:
-        return render_template('blog_post.html', post=post, now=now)
-    abort(404)
-
-def get_blog_posts():
-    posts = []
-    try:
-        if os.path.exists(BLOG_POST_DIR):
-            for filename in os.listdir(BLOG_POST_DIR):
-                if filename.endswith('.md'):
-                    post = parse_blog_post(filename)
-                    if post:
-                        posts.append(post)
-    except Exception as e:
-        app.logger.error(f"Error getting blog posts: {str(e)}")
-        return []
-    
-    # Sort posts by date (newest first)
-    posts.sort(key=lambda x: x['date'], reverse=True)
-    return posts
-
-def get_blog_post(slug):
-    try:
-        if os.path.exists(BLOG_POST_DIR):
-            for filename in os.listdir(BLOG_POST_DIR):
-                if filename.endswith('.md'):
-                    post = parse_blog_post(filename)
-                    if post and post['slug'] == slug:
-                        return post
-    except Exception as e:
-        app.logger.error(f"Error getting blog post {slug}: {str(e)}")
-    return None
-
-def parse_blog_post(filename):
-    try:
-        filepath = os.path.join(BLOG_POST_DIR, filename)
-        with open(filepath, 'r') as file:
-            content = file.read()
-        
-        # Parse front matter
-        front_matter_match = re.match(r'^---\s+(.*?)\s+---\s+(.*)', content, re.DOTALL)
-        if not front_matter_match:
-            return None
-        
-        front_matter = front_matter_match.group(1)
-        markdown_content = front_matter_match.group(2)
-        
-        # Parse metadata
-        metadata = {}
-        for line in front_matter.split('\n'):
-            if ':' in line:
-                key, value = line.split(':', 1)
-                metadata[key.strip()] = value.strip()
-        
-        # Convert markdown to HTML
-        html_content = markdown.markdown(markdown_content)
-        
-        # Create slug from title if not provided
-        if 'slug' not in metadata and 'title' in metadata:
-            metadata['slug'] = metadata['title'].lower().replace(' ', '-')
-        
-        # Parse date
-        if 'date' in metadata:
-            try:
-                date_obj = datetime.datetime.strptime(metadata['date'], '%Y-%m-%d')
-                metadata['date'] = date_obj
-            except ValueError:
-                metadata['date'] = datetime.datetime.now()
-        else:
-            metadata['date'] = datetime.datetime.now()
-        
-        # Format date for display
-        metadata['formatted_date'] = metadata['date'].strftime('%B %d, %Y')
-        
-        return {
-            'title': metadata.get('title', 'Untitled'),
-            'author': metadata.get('author', 'Netrun Systems'),
-            'date': metadata['date'],
-            'formatted_date': metadata['formatted_date'],
-            'slug': metadata.get('slug', ''),
-            'excerpt': metadata.get('excerpt', ''),
-            'image': metadata.get('image', ''),
-            'content': html_content
-        }
-    except Exception as e:
-        app.logger.error(f"Error parsing blog post {filename}: {str(e)}")
-        return None
-
-@app.route('/admin/blog', methods=['GET', 'POST'])
-def admin_blog():
-    now = datetime.datetime.now()
-    if request.method == 'POST':
-        try:
-            title = request.form.get('title')
-            author = request.form.get('author')
-            date_str = request.form.get('date')
-            excerpt = request.form.get('excerpt')
-            content = request.form.get('content')
-            
-            # Create slug from title
-            slug = title.lower().replace(' ', '-')
-            # Remove special characters
-            slug = re.sub(r'[^a-z0-9-]', '', slug)
-            
-            # Parse date
-            try:
-                date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d')
-                date = date_obj.strftime('%Y-%m-%d')
-            except ValueError:
-                date = datetime.datetime.now().strftime('%Y-%m-%d')
-            
-            # Create markdown file
-            markdown_content = f"""---
-title: {title}
-author: {author}
-date: {date}
-slug: {slug}
-excerpt: {excerpt}
----
-{content}
-"""
-            
-            # Ensure blog post directory exists
-            os.makedirs(BLOG_POST_DIR, exist_ok=True)
-            
-            filename = f"{slug}.md"
-            filepath = os.path.join(BLOG_POST_DIR, filename)
-            
-            with open(filepath, 'w') as file:
-                file.write(markdown_content)
-            
-            flash('Blog post created successfully!', 'success')
-            return redirect(url_for('blog'))
-        except Exception as e:
-            app.logger.error(f"Error creating blog post: {str(e)}")
-            flash(f'Error creating blog post: {str(e)}', 'error')
-    
-    return render_template('admin_blog.html', now=now)
-
-@app.route('/contact', methods=['GET', 'POST'])
-def contact():
-    now = datetime.datetime.now()
-    if request.method == 'POST':
-        name = request.form.get('name')
-        email = request.form.get('email')
-        subject = request.form.get('subject')
-        message = request.form.get('message')
-        
-        # In a production environment, this would send an email
-        # For now, just show a success message
-        flash('Thank you for your message! We will get back to you shortly.', 'success')
-        return redirect(url_for('contact'))
-        
-    return render_template('contact.html', now=now)
-
-@app.route('/favicon.ico')
-def favicon():
-    return send_from_directory(os.path.join(app.root_path, 'static'),
-                               'favicon.ico', mimetype='image/vnd.microsoft.icon')
-
-def create_sample_content():
-    try:
-        # Ensure blog post directory exists
-        os.makedirs(BLOG_POST_DIR, exist_ok=True)
-        
-        # Check if any blog posts exist
-        if not os.listdir(BLOG_POST_DIR):
-            # Create a sample blog post
-            sample_post = """---
-title: Welcome to Netrun Systems
-author: Netrun Systems
-date: 2025-04-24
-slug: welcome-to-netrun-systems
-excerpt: Welcome to the Netrun Systems blog where we'll share insights on Azure cross-tenant governance and cloud management.
----
-# Welcome to Netrun Systems
-
-Thank you for visiting the Netrun Systems blog. Here we'll share insights, best practices, and updates about our cross-tenant governance solutions for Azure.
-
-## Our Mission
-
-At Netrun Systems, we're dedicated to helping Azure consultants and MSPs manage multiple client environments securely and efficiently. Our flagship product, Netrun Systems Nexus, leverages Azure Lighthouse technology to provide secure cross-tenant access management without sharing credentials or adding guest accounts.
-
-## Stay Tuned
-
-Check back regularly for:
-- Technical deep dives
-- Best practices for Azure governance
-- Product updates and new features
-- Case studies and success stories
-
-We're excited to have you join us on this journey!
-"""
-            with open(os.path.join(BLOG_POST_DIR, 'welcome-to-netrun-systems.md'), 'w') as f:
-                f.write(sample_post)
-    except Exception as e:
-        app.logger.error(f"Error creating sample content: {str(e)}")
-
-# Call create_sample_content when the app starts
-create_sample_content()
-
-@app.route('/privacy-policy')
-def privacy_policy():
-    now = datetime.datetime.now()
-    return render_template('privacy_policy.html', now=now)
-
-@app.route('/terms-of-service')
-def terms_of_service():
-    now = datetime.datetime.now()
-    return render_template('terms_of_service.html', now=now)
-
-@app.route('/consulting')
-def consulting_services():
-    now = datetime.datetime.now()
-    return render_template('consulting_services.html', now=now)
-
-@app.route('/product/small-business-optimization-suite')
-def product_small_business_optimization_suite():
-    now = datetime.datetime.now()
-    return render_template('product_small_business_optimization_suite.html', now=now)
-
-@app.route('/research-projects')
-def research_projects():
-    now = datetime.datetime.now()
-    return render_template('research_projects.html', now=now)
-
-@app.route('/research/sunflower')
-def research_sunflower():
-    now = datetime.datetime.now()
-    return render_template('research_sunflower.html', now=now)
-
-@app.route('/research/podcast-cohost')
-def research_podcast_cohost():
-    now = datetime.datetime.now()
-    return render_template('research_podcast_cohost.html', now=now)
-
-@app.route('/research/scrum-master')
-def research_scrum_master():
-    now = datetime.datetime.now()
-    return render_template('research_scrum_master.html', now=now)
-
-@app.route('/research/connection-manager')
-def research_connection_manager():
-    now = datetime.datetime.now()
-    return render_template('research_connection_manager.html', now=now)
-
-@app.route('/login')
-def login():
-    session['user'] = {
-        'name': 'Development User',
-        'email': 'dev@netrunsystems.com',
-        'id': 'dev-user-id'
-    }
-
-    # Redirect back to originally requested page if present
-    redirect_url = session.pop('state', None)
-    if not redirect_url:
-        redirect_url = url_for('customer_portal')
-
-    return redirect(redirect_url)
-
-@app.route('/logout')
-def logout():
-    session.clear()
-    return redirect(url_for('index'))
-
-@app.route('/portal')
-@requires_auth
-def customer_portal():
-    user = session.get('user')
-    now = datetime.datetime.now()
-    return render_template('customer_portal.html',
-                         user=user,
-                         now=now,
-                         version="2.0.0")  # Hardcoded version for development
-
-@app.route('/portal/profile')
-@requires_auth
-def customer_profile():
-    user = session.get('user')
-    now = datetime.datetime.now()
-    return render_template('customer_profile.html', user=user, now=now)
-
-@app.route('/portal/resources')
-@requires_auth
-def customer_resources():
-    user = session.get('user')
-    now = datetime.datetime.now()
-    return render_template('customer_resources.html', user=user, now=now)
-
-@app.route('/portal/support')
-@requires_auth
-def customer_support():
-    user = session.get('user')
-    now = datetime.datetime.now()
-    return render_template('customer_support.html', user=user, now=now)
-
-# This is required for Azure App Service to find the application
-application = app
-
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8000)), debug=False)
+import io
+import os
+import re
+import json
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import datetime
+import bisect
+import mimetypes
+import shutil
+import textwrap
+import threading
+from collections import OrderedDict
+import click
+from flask.cli import AppGroup, with_appcontext
+from flask import Flask, current_app, has_app_context, render_template, stream_template, request, redirect, url_for, flash, get_flashed_messages, abort, send_from_directory, session
+from flask_wtf import CSRFProtect
+from jinja2 import FileSystemBytecodeCache
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from werkzeug.local import LocalProxy
+from werkzeug.middleware.proxy_fix import ProxyFix
+from flask_mail import Mail, Message
+from session_store import init_session_backend
+from submission_queue import SubmissionQueue, SubmissionDispatcher
+from request_metrics import RequestMetrics
+from blog_search import SearchIndex
+from render_cache import MarkdownRenderer
+from compression import CompressionMiddleware
+from asset_pipeline import build_assets, load_manifest, write_compressed_siblings
+import image_pipeline
+from markupsafe import Markup, escape
+from functools import partial, wraps
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+INSTANCE_PATH = os.path.join(ROOT_PATH, 'instance')
+logger = logging.getLogger(__name__)
+
+# Configuration values such as the secret key are read directly from
+# environment variables. The application does not rely on a separate
+# `config.py` module.
+
+def configure_app(app):
+    """Read the app's settings from environment variables."""
+    app.secret_key = os.environ.get('SECRET_KEY', 'netrun-development-key')
+
+    # Session config: 'cookie' (default), 'sqlite' or 'filesystem'.
+    # See session_store.py for the trade-offs between backends.
+    app.config['SESSION_BACKEND'] = os.environ.get('SESSION_BACKEND', 'cookie')
+    app.config['SESSION_SQLITE_PATH'] = os.environ.get('SESSION_SQLITE_PATH')
+    # Only open the session store when a view actually uses `session`
+    app.config['SESSION_LAZY'] = os.environ.get('SESSION_LAZY', '1') != '0'
+
+    # Rendered page cache for the static marketing pages
+    app.config['PAGE_CACHE_ENABLED'] = os.environ.get('PAGE_CACHE_ENABLED', '1') != '0'
+    app.config['PAGE_CACHE_SIZE'] = int(os.environ.get('PAGE_CACHE_SIZE', 64))
+
+    # Rate limits for the POST endpoints, per client IP and route. The sliding
+    # window counter keeps two counters per key, so a check is O(1). Set
+    # RATELIMIT_STORAGE_URI (e.g. redis://localhost:6379) to share counts
+    # between workers; the default is per-process memory.
+    app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', '1') != '0'
+    app.config['RATELIMIT_STORAGE_URI'] = os.environ.get('RATELIMIT_STORAGE_URI', 'memory://')
+    app.config['RATELIMIT_STRATEGY'] = 'sliding-window-counter'
+    app.config['RATELIMIT_HEADERS_ENABLED'] = True
+    # Number of reverse proxies in front of the app, so rate limits key on the
+    # client address from X-Forwarded-For. Defaults to 1 on Azure App Service
+    # (WEBSITE_SITE_NAME is set there), where REMOTE_ADDR is the front end's.
+    app.config['TRUSTED_PROXY_COUNT'] = int(os.environ.get('TRUSTED_PROXY_COUNT', 1 if os.environ.get('WEBSITE_SITE_NAME') else 0))
+
+    # Per-endpoint timings (template, blog parsing, Markdown, session I/O),
+    # served at /metrics in the Prometheus format. Off unless METRICS_ENABLED=1.
+    # With METRICS_OTEL=1 they are also recorded as OpenTelemetry histograms,
+    # exported to Azure Monitor when APPLICATIONINSIGHTS_CONNECTION_STRING is set.
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '0') == '1'
+    app.config['METRICS_OTEL'] = os.environ.get('METRICS_OTEL', '0') == '1'
+
+    # Contact and early access submissions are queued locally and mailed by a
+    # background dispatcher, so form posts never wait on SMTP. Sending is off
+    # until a mail server is configured; submissions still queue.
+    app.config['SUBMISSION_QUEUE_PATH'] = os.environ.get('SUBMISSION_QUEUE_PATH') or os.path.join(INSTANCE_PATH, 'submissions.sqlite3')
+    app.config['SUBMISSION_DISPATCH'] = os.environ.get('SUBMISSION_DISPATCH', '1' if os.environ.get('MAIL_SERVER') else '0') == '1'
+    app.config['SUBMISSION_DISPATCH_INTERVAL'] = float(os.environ.get('SUBMISSION_DISPATCH_INTERVAL', 5))
+    app.config['EARLY_ACCESS_EMAIL'] = os.environ.get('EARLY_ACCESS_EMAIL', 'NSXearlyaccess@netrunsystems.com')
+    app.config['CONTACT_EMAIL'] = os.environ.get('CONTACT_EMAIL', 'info@netrunsystems.com')
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'localhost')
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', '1') != '0'
+    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@netrunsystems.com')
+
+    app.config['BLOG_POST_DIR'] = os.environ.get('BLOG_POST_DIR', os.path.join(ROOT_PATH, 'blog_posts'))
+    app.config['BLOG_INDEX_CHECK_INTERVAL'] = float(os.environ.get('BLOG_INDEX_CHECK_INTERVAL', 2.0))
+    # Prebuilt blog and search indexes written by `flask blog build` at deploy time
+    app.config['BLOG_INDEX_FILE'] = os.environ.get('BLOG_INDEX_FILE', os.path.join(ROOT_PATH, 'blog_index.bin'))
+    app.config['BLOG_SEARCH_FILE'] = os.environ.get('BLOG_SEARCH_FILE', os.path.join(ROOT_PATH, 'blog_search.bin'))
+    app.config['BLOG_STREAM_LISTING'] = os.environ.get('BLOG_STREAM_LISTING', '0') == '1'
+
+    # Rendered Markdown is cached per worker and in a SQLite file the workers
+    # share, keyed by the source and the extension settings.
+    app.config['MARKDOWN_EXTENSIONS'] = [name for name in os.environ.get('MARKDOWN_EXTENSIONS', '').split(',') if name]
+    app.config['MARKDOWN_CACHE_SIZE'] = int(os.environ.get('MARKDOWN_CACHE_SIZE', 256))
+    app.config['MARKDOWN_CACHE_PATH'] = os.environ.get('MARKDOWN_CACHE_PATH') or os.path.join(INSTANCE_PATH, 'markdown-cache.sqlite3')
+    app.config['MARKDOWN_CACHE_DISK'] = os.environ.get('MARKDOWN_CACHE_DISK', '1') != '0'
+
+    # Fingerprinted static assets written by `flask assets build`
+    app.config['ASSET_BUILD_DIR'] = os.environ.get('ASSET_BUILD_DIR', os.path.join(ROOT_PATH, 'static_dist'))
+
+    # Brotli/gzip for HTML, XML and other text responses of at least
+    # COMPRESSION_MIN_SIZE bytes, with optional HTML minification. Turn it
+    # off when a proxy in front already compresses.
+    app.config['COMPRESSION_ENABLED'] = os.environ.get('COMPRESSION_ENABLED', '1') != '0'
+    app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+    app.config['COMPRESSION_MINIFY_HTML'] = os.environ.get('COMPRESSION_MINIFY_HTML', '0') == '1'
+
+    # Compiled template bytecode, filled by `flask templates compile` at build
+    # time or on first render. Set TEMPLATE_CACHE_DIR to '' to turn it off.
+    app.config['TEMPLATE_CACHE_DIR'] = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(ROOT_PATH, 'template_cache'))
+
+# Views are collected here and registered on each app by create_app(), so
+# importing this module does not build an app
+_routes = []
+
+def route(rule, **options):
+    def decorator(view):
+        _routes.append((rule, view, options))
+        return view
+    return decorator
+
+# Caches, indexes and queues belong to the app that created them and live
+# in app.extensions['netrun'] (see init_state()). Module code reaches them
+# through these proxies, which resolve to the current app, or to the
+# process-wide one outside a request or app context.
+def app_state(name):
+    return LocalProxy(lambda: resolve_app().extensions['netrun'][name])
+
+FORM_RATE_LIMIT = os.environ.get('FORM_RATE_LIMIT', '5 per minute;30 per hour')
+ADMIN_RATE_LIMIT = os.environ.get('ADMIN_RATE_LIMIT', '20 per minute;200 per day')
+POST_RATE_LIMITS = {
+    'early_access': FORM_RATE_LIMIT,
+    'contact': FORM_RATE_LIMIT,
+    'admin_blog': ADMIN_RATE_LIMIT,
+}
+
+def rate_limit_exempt():
+    return request.method != 'POST' or request.endpoint not in POST_RATE_LIMITS
+
+def make_limiter():
+    """Build a rate limiter for one app.
+
+    Limits are resolved per endpoint in the limiter's before_request hook
+    (route decorators are only checked inside the view). create_app()
+    initialises it before CSRFProtect so throttled requests are rejected
+    before the CSRF check parses the form body.
+    """
+    limiter = Limiter(
+        get_remote_address,
+        default_limits=[lambda: POST_RATE_LIMITS[request.endpoint]],
+    )
+    limiter.request_filter(rate_limit_exempt)
+    return limiter
+
+limiter = app_state('limiter')
+
+# Enable CSRF protection
+csrf = CSRFProtect()
+
+# Timings are collected per process: the timed() decorators below wrap
+# module functions, so every app in the process records into this one.
+metrics = RequestMetrics()
+
+def init_metrics(app):
+    otel = app.config['METRICS_OTEL']
+    if otel and os.environ.get('APPLICATIONINSIGHTS_CONNECTION_STRING'):
+        try:
+            from azure.monitor.opentelemetry import configure_azure_monitor
+            from opentelemetry.instrumentation.flask import FlaskInstrumentor
+            configure_azure_monitor()
+            FlaskInstrumentor().instrument_app(app)
+        except Exception as e:
+            logger.error(f"Error configuring Azure Monitor: {str(e)}")
+    metrics.init_app(app, otel=otel)
+
+# Flask-Mail keeps each app's settings in app.extensions['mail']
+mail = Mail()
+
+# Bumped when post metadata changes, so older artifacts are rebuilt
+BLOG_ARTIFACT_MAGIC = b'NRBLOG2\n'
+# Blog listing pagination
+BLOG_PER_PAGE = 10
+BLOG_MAX_PER_PAGE = 50
+# Most used tags shown in the blog sidebar
+BLOG_SIDEBAR_TAGS = 20
+# Append-only log of published post filenames, read by other workers
+BLOG_PUBLISH_LOG = '.publish-log'
+# Quoted front matter values: "..." with backslash escapes, '...' with ''
+DOUBLE_QUOTED_RE = re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL)
+SINGLE_QUOTED_RE = re.compile(r"'((?:[^']|'')*)'", re.DOTALL)
+BACKSLASH_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+# Runs of anything but letters and digits become one hyphen in tag URLs
+TERM_SLUG_RE = re.compile(r'[\W_]+')
+
+def requires_auth(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not session.get('user'):
+            session['state'] = request.url
+            return redirect(url_for('login'))
+        return f(*args, **kwargs)
+    decorated.requires_auth = True
+    return decorated
+
+class PageCache:
+    """Bounded LRU cache of rendered pages.
+
+    Entries hold the encoded HTML together with a strong ETag and the time
+    the page was rendered, so conditional requests can be answered without
+    touching the template.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, html):
+        body = html.encode('utf-8')
+        entry = {
+            'body': body,
+            'etag': hashlib.sha256(body).hexdigest()[:32],
+            'last_modified': datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+page_cache = app_state('page_cache')
+
+def render_page(template):
+    """Render a page that only depends on the current year, with caching.
+
+    Pages are cached per (endpoint, template, year) and served with ETag and
+    Last-Modified headers so conditional GETs get a 304. Requests with
+    pending flash messages and debug mode bypass the cache.
+    """
+    now = datetime.datetime.now()
+    # Only visitors holding a session cookie can have pending flashes, so
+    # anonymous requests never open the session store here.
+    has_session = current_app.config['SESSION_COOKIE_NAME'] in request.cookies
+    if (current_app.debug or not current_app.config['PAGE_CACHE_ENABLED']
+            or (has_session and session.get('_flashes'))):
+        return render_template(template, now=now)
+
+    key = (request.endpoint, template, now.year)
+    entry = page_cache.get(key)
+    if entry is None:
+        entry = page_cache.put(key, render_template(template, now=now))
+
+    response = current_app.response_class(entry['body'], mimetype='text/html')
+    response.set_etag(entry['etag'])
+    response.last_modified = entry['last_modified']
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+ASSET_MAX_AGE = 31536000
+asset_manifest = app_state('asset_manifest')
+hashed_assets = app_state('hashed_assets')
+precompressed_assets = app_state('precompressed_assets')
+
+def load_asset_manifest(app=None):
+    """Load the asset manifest, if the build step has run."""
+    app = resolve_app(app)
+    state = app.extensions['netrun']
+    build_dir = app.config['ASSET_BUILD_DIR']
+    try:
+        manifest = load_manifest(build_dir)
+    except Exception as e:
+        logger.error(f"Error loading asset manifest: {str(e)}")
+        manifest = {}
+    precompressed = set()
+    for root, _, files in os.walk(build_dir):
+        for name in files:
+            if name.endswith(('.br', '.gz')):
+                relative = os.path.relpath(os.path.join(root, name), build_dir)
+                precompressed.add(relative.replace(os.sep, '/'))
+    state['asset_manifest'] = manifest
+    state['hashed_assets'] = set(manifest.values())
+    state['precompressed_assets'] = precompressed
+
+def fingerprint_static_urls(endpoint, values):
+    if endpoint == 'static' and asset_manifest:
+        hashed = asset_manifest.get(values.get('filename'))
+        if hashed:
+            values['filename'] = hashed
+
+def serve_static(filename):
+    """Serve static files, with fingerprinted assets cached forever.
+
+    Hashed names from the asset build never change content, so they are
+    sent with an immutable Cache-Control and as a precompressed .br/.gz
+    variant when the client accepts one. Anything else falls back to the
+    regular static folder.
+    """
+    if filename not in hashed_assets:
+        return current_app.send_static_file(filename)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    path, encoding = filename, None
+    for suffix, candidate in (('.br', 'br'), ('.gz', 'gzip')):
+        if request.accept_encodings[candidate] and filename + suffix in precompressed_assets:
+            path, encoding = filename + suffix, candidate
+            break
+    response = send_from_directory(current_app.config['ASSET_BUILD_DIR'], path, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    return response
+
+assets_cli = AppGroup('assets', help='Static asset commands.')
+
+@assets_cli.command('build')
+def assets_build():
+    """Fingerprint, minify and precompress everything under static/."""
+    build_dir = current_app.config['ASSET_BUILD_DIR']
+    manifest = build_assets(current_app.static_folder, build_dir)
+    load_asset_manifest()
+    click.echo(f"Built {len(manifest)} assets into {build_dir}")
+
+# Responsive image derivatives written by `flask images build`
+image_manifest = app_state('image_manifest')
+IMAGE_SOURCE_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+def load_image_manifest(app=None):
+    """Load the image derivative manifest, if the build step has run."""
+    state = resolve_app(app).extensions['netrun']
+    try:
+        state['image_manifest'] = image_pipeline.load_manifest()
+    except Exception as e:
+        logger.error(f"Error loading image manifest: {str(e)}")
+        state['image_manifest'] = {}
+
+def responsive_image(filename, alt, sizes='100vw', class_=None, lazy=True):
+    """Render a static image as a <picture> with AVIF/WebP srcsets.
+
+    Falls back to a plain <img> when no derivatives were built for
+    ``filename``. Width and height are included when known so the browser
+    can reserve space before the image loads.
+    """
+    entry = image_manifest.get(filename)
+    attributes = [f'src="{escape(url_for("static", filename=filename))}"', f'alt="{escape(alt)}"']
+    if class_:
+        attributes.append(f'class="{escape(class_)}"')
+    if entry:
+        attributes.append(f'width="{entry["width"]}" height="{entry["height"]}"')
+    if lazy:
+        attributes.append('loading="lazy" decoding="async"')
+    img = f'<img {" ".join(attributes)}>'
+    if not entry:
+        return Markup(img)
+    sources = []
+    for fmt, variants in entry['variants'].items():
+        srcset = ', '.join(
+            f'{url_for("static", filename=name)} {width}w' for width, name in variants
+        )
+        sources.append(
+            f'<source type="{IMAGE_SOURCE_TYPES[fmt]}" srcset="{escape(srcset)}" sizes="{escape(sizes)}">'
+        )
+    return Markup(f'<picture>{"".join(sources)}{img}</picture>')
+
+images_cli = AppGroup('images', help='Responsive image commands.')
+
+@images_cli.command('build')
+@click.option('--jobs', type=int, default=None, help='Worker processes (default: CPU count).')
+@click.option('--force', is_flag=True, help='Rebuild even if sources are unchanged.')
+def images_build(jobs, force):
+    """Generate resized WebP/AVIF derivatives of static/images."""
+    manifest, rebuilt = image_pipeline.build_images(current_app.static_folder, jobs=jobs, force=force)
+    load_image_manifest()
+    click.echo(f"{len(rebuilt)} images rebuilt, {len(manifest) - len(rebuilt)} unchanged")
+
+@route('/')
+def index():
+    return render_page('index.html')
+
+@route('/product/nexus-core')  # INTITKON (I**N**TITKON) Core Platform
+def product_nexus_core():
+    # Render INTITKON (I**N**TITKON) Core Platform page
+    return render_page('product_nexus_core.html')
+
+@route('/product/cost-optimizer')
+def product_cost_optimizer():
+    return render_page('product_cost_optimizer.html')
+
+@route('/product/compliance-reporter')
+def product_compliance_reporter():
+    return render_page('product_compliance_reporter.html')
+
+@route('/product/governance-dashboard')
+def product_governance_dashboard():
+    return render_page('product_governance_dashboard.html')
+
+SUBMISSION_SUBJECTS = {
+    'early_access': 'Early Access Program request',
+    'contact': 'Website contact form',
+}
+
+def build_submission_message(submission):
+    """Turn a queued submission into the notification email."""
+    payload = submission['payload']
+    recipient = current_app.config['EARLY_ACCESS_EMAIL' if submission['kind'] == 'early_access' else 'CONTACT_EMAIL']
+    subject = SUBMISSION_SUBJECTS[submission['kind']]
+    if payload.get('subject'):
+        subject = f"{subject}: {payload['subject']}"
+    submitted = datetime.datetime.fromtimestamp(submission['created']).strftime('%Y-%m-%d %H:%M:%S')
+    lines = [f"{key.capitalize()}: {value}" for key, value in payload.items() if key != 'message' and value]
+    body = '\n'.join(lines + [f"Submitted: {submitted}", '', payload.get('message') or ''])
+    return Message(subject, recipients=[recipient], reply_to=payload.get('email') or None, body=body)
+
+def send_submissions(submissions, app=None):
+    """Send a batch over one SMTP connection. Returns ``{id: error}`` for failures."""
+    failures = {}
+    with resolve_app(app).app_context():
+        with mail.connect() as connection:
+            for submission in submissions:
+                try:
+                    connection.send(build_submission_message(submission))
+                except Exception as e:
+                    failures[submission['id']] = e
+    return failures
+
+submission_queue = app_state('submission_queue')
+submission_dispatcher = app_state('submission_dispatcher')
+
+def init_submissions(app):
+    """Give ``app`` a submission queue, sent with its own mail settings."""
+    mail.init_app(app)
+    queue = SubmissionQueue(app.config['SUBMISSION_QUEUE_PATH'])
+    app.extensions['netrun']['submission_queue'] = queue
+    app.extensions['netrun']['submission_dispatcher'] = SubmissionDispatcher(
+        queue, partial(send_submissions, app=app),
+        interval=app.config['SUBMISSION_DISPATCH_INTERVAL'], logger=logger,
+    )
+
+def queue_submission(kind, payload):
+    """Queue a form submission for delivery. Returns False if it could not be stored."""
+    try:
+        submission_queue.enqueue(kind, payload)
+    except Exception as e:
+        logger.error(f"Error queueing {kind} submission: {str(e)}")
+        return False
+    # Also started here in case this process never ran the boot hook
+    start_submission_dispatcher()
+    return True
+
+def start_submission_dispatcher(app=None):
+    """Start sending queued submissions from this process, if dispatch is on.
+
+    Called when a worker boots (gunicorn.conf.py's post_worker_init, or
+    ``python app.py``), so a backlog or retry left by a restart is sent
+    without waiting for the next form post. create_app() does not call it,
+    so CLI commands never spawn the thread. Returns True if dispatch is on.
+    """
+    app = resolve_app(app)
+    if not app.config['SUBMISSION_DISPATCH']:
+        return False
+    dispatcher = app.extensions['netrun']['submission_dispatcher']
+    dispatcher.start()
+    dispatcher.wake()
+    return True
+
+submissions_cli = AppGroup('submissions', help='Queued form submission commands.')
+
+@submissions_cli.command('dispatch')
+def submissions_dispatch():
+    """Send every queued submission that is due now."""
+    sent, failed = submission_dispatcher.drain()
+    click.echo(f"Sent {sent} submissions, {failed} failed")
+
+@submissions_cli.command('stats')
+def submissions_stats():
+    """Show queued submission counts by status."""
+    for status, count in submission_queue.stats().items():
+        click.echo(f"{status}: {count}")
+
+@route('/early-access', methods=['GET', 'POST'])
+def early_access():
+    now = datetime.datetime.now()
+    if request.method == 'POST':
+        name = request.form.get('name')
+        company = request.form.get('company')
+        email = request.form.get('email')
+        role = request.form.get('role')
+        tenants = request.form.get('tenants')
+        message = request.form.get('message')
+        
+        if not queue_submission('early_access', {
+            'name': name, 'company': company, 'email': email,
+            'role': role, 'tenants': tenants, 'message': message,
+        }):
+            flash(f"Sorry, we could not submit your request. Please email {current_app.config['EARLY_ACCESS_EMAIL']}.", 'error')
+            return redirect(url_for('early_access'))
+        flash(
+            f'Thank you for your interest in our Early Access Program! '
+            f'Role: {role}, Tenants: {tenants}. We will contact you shortly.',
+            'success'
+        )
+        return redirect(url_for('early_access'))
+        
+    return render_template('early_access.html', now=now)
+
+def listing_page_args(page=None):
+    """Page number (from the URL path or ``?page=``) and ``per_page``, clamped."""
+    page = page or request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', BLOG_PER_PAGE, type=int)
+    return max(page, 1), min(max(per_page, 1), BLOG_MAX_PER_PAGE)
+
+def listing_page_count(total, per_page=BLOG_PER_PAGE):
+    return max((total + per_page - 1) // per_page, 1)
+
+def listing_page_url(number, **values):
+    """URL of page ``number`` of the current listing, e.g. ``/blog/page/2``.
+
+    Later pages are path-based so `flask freeze` can write them as files;
+    page 1 is the listing's own URL.
+    """
+    values = dict(request.view_args, **values)
+    values.pop('page', None)
+    if number > 1:
+        values['page'] = number
+    return url_for(request.endpoint, **values)
+
+def listing_pagination(page, per_page, total):
+    pages = listing_page_count(total, per_page)
+    if page > pages:
+        abort(404)
+    extra = {} if per_page == BLOG_PER_PAGE else {'per_page': per_page}
+    return {
+        'page': page,
+        'per_page': per_page,
+        'pages': pages,
+        'total': total,
+        'newer_url': listing_page_url(page - 1, **extra) if page > 1 else None,
+        'older_url': listing_page_url(page + 1, **extra) if page < pages else None,
+    }
+
+def blog_sidebar():
+    return {
+        'categories': get_blog_terms('category'),
+        'tags': get_blog_terms('tag')[:BLOG_SIDEBAR_TAGS],
+        'months': get_blog_terms('month'),
+    }
+
+@route('/blog')
+@route('/blog/page/<int:page>')
+def blog(page=None):
+    now = datetime.datetime.now()
+    page, per_page = listing_page_args(page)
+    posts, total = get_blog_page(page, per_page)
+    pagination = listing_pagination(page, per_page, total)
+    context = dict(posts=posts, pagination=pagination, now=now, **blog_sidebar())
+    if current_app.config['BLOG_STREAM_LISTING']:
+        # Pop flashes now: the session is saved before a streamed body is
+        # generated, so consuming them inside the template would be lost.
+        get_flashed_messages(with_categories=True)
+        return stream_template('blog.html', **context)
+    return render_template('blog.html', **context)
+
+def render_blog_listing(kind, value, page=None):
+    """Render one page of the posts under a tag, category or month."""
+    now = datetime.datetime.now()
+    page, per_page = listing_page_args(page)
+    posts, total = get_blog_listing(kind, value, page, per_page)
+    if not total:
+        abort(404)
+    pagination = listing_pagination(page, per_page, total)
+    name = term_name(kind, value, posts[0])
+    heading = f"Posts from {name}" if kind == 'month' else f"{'Tag' if kind == 'tag' else 'Category'}: {name}"
+    return render_template('blog.html', posts=posts, pagination=pagination, heading=heading, now=now,
+                           **blog_sidebar())
+
+def canonical_redirect(endpoint, **values):
+    """301 to the canonical URL of ``endpoint``, keeping the query string."""
+    location = url_for(endpoint, **dict(request.view_args, **values))
+    if request.query_string:
+        location += '?' + request.query_string.decode('latin-1')
+    return redirect(location, code=301)
+
+@route('/blog/tag/<tag>')
+@route('/blog/tag/<tag>/page/<int:page>')
+def blog_tag(tag, page=None):
+    slug = term_slug(tag)
+    if slug != tag:
+        return canonical_redirect('blog_tag', tag=slug)
+    return render_blog_listing('tag', slug, page)
+
+@route('/blog/category/<category>')
+@route('/blog/category/<category>/page/<int:page>')
+def blog_category(category, page=None):
+    slug = term_slug(category)
+    if slug != category:
+        return canonical_redirect('blog_category', category=slug)
+    return render_blog_listing('category', slug, page)
+
+@route('/blog/archive/<int(fixed_digits=4):year>/<int(fixed_digits=2):month>')
+@route('/blog/archive/<int(fixed_digits=4):year>/<int(fixed_digits=2):month>/page/<int:page>')
+def blog_archive(year, month, page=None):
+    return render_blog_listing('month', (year, month), page)
+
+@route('/blog/search')
+def blog_search_results():
+    now = datetime.datetime.now()
+    query = request.args.get('q', '').strip()
+    posts = search_blog_posts(query) if query else []
+    return render_template('blog_search.html', query=query, posts=posts, now=now)
+
+@route('/blog/<slug>')
+def blog_post(slug):
+    now = datetime.datetime.now()
+    post = get_blog_post(slug)
+    if post:
+        return render_template('blog_post.html', post=post, now=now)
+    abort(404)
+
+class BlogPost:
+    """A parsed blog post.
+
+    Metadata lives in slots to keep the per-post footprint small when the
+    whole archive is indexed in every worker. The rendered HTML is either
+    given up front or produced by ``loader`` on each access, and the
+    display date is formatted on demand. Loaded HTML is not kept on the
+    post: loaders read the prebuilt artifact or go through the bounded
+    Markdown render cache, so viewing every post does not grow the worker.
+    """
+
+    __slots__ = ('title', 'author', 'date', 'slug', 'excerpt', 'image', 'tags', 'category', '_content', '_loader')
+
+    def __init__(self, title, author, date, slug, excerpt='', image='', tags=(), category='',
+                 content=None, loader=None):
+        self.title = title
+        self.author = author
+        self.date = date
+        self.slug = slug
+        self.excerpt = excerpt
+        self.image = image
+        self.tags = tuple(tags)
+        self.category = category
+        self._content = content
+        self._loader = loader
+
+    @property
+    def formatted_date(self):
+        return self.date.strftime('%B %d, %Y')
+
+    @property
+    def content(self):
+        if self._content is None and self._loader is not None:
+            return self._loader()
+        return self._content
+
+    def listing_keys(self):
+        """Keys of the tag, category and month listings this post appears in."""
+        keys = {('tag', term_slug(tag)) for tag in self.tags}
+        if self.category:
+            keys.add(('category', term_slug(self.category)))
+        keys.add(('month', (self.date.year, self.date.month)))
+        keys.discard(('tag', ''))
+        keys.discard(('category', ''))
+        return keys
+
+    def metadata(self):
+        """Return the post's metadata as a dict, without the body."""
+        return {name: getattr(self, name) for name in BlogPost.__slots__ if not name.startswith('_')}
+
+    def __repr__(self):
+        return f"BlogPost(slug={self.slug!r}, date={self.date:%Y-%m-%d})"
+
+
+class BlogPostIndex:
+    """Process-wide index of parsed blog posts keyed by slug.
+
+    Post metadata is parsed once, then kept in memory. A refresh
+    stats the Markdown files in the blog directory and only re-parses the
+    ones whose mtime or size changed, so lookups stay O(1) as the archive
+    grows.
+
+    Posts are also listed by tag, category and month. Those listings are
+    updated along with the slug map when a single post changes, so
+    ``listing`` never scans the archive.
+    """
+
+    def __init__(self, directory, check_interval=2.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._files = {}
+        self._by_slug = {}
+        self._sorted = []
+        # ('tag' | 'category', slug) or ('month', (year, month)) -> posts, newest first
+        self._listings = {}
+        # kind -> (generation, terms), see terms()
+        self._terms = {}
+        self._last_check = None
+        self._log_offset = 0
+        # Bumped on every change so dependent indexes know to resync
+        self.generation = 0
+
+    def refresh(self, force=False):
+        """Re-parse new or modified posts and drop deleted ones.
+
+        Posts published by other workers are picked up on every call from
+        the publish log, which costs a single stat. The full directory scan
+        for files changed by other means runs at most every
+        ``check_interval`` seconds.
+        """
+        now = time.monotonic()
+        if (not force and self._last_check is not None
+                and now - self._last_check < self.check_interval):
+            self._apply_publish_log()
+            return
+        with self._lock:
+            if (not force and self._last_check is not None
+                    and now - self._last_check < self.check_interval):
+                return
+            self._log_offset = self._publish_log_size()
+            seen = {}
+            changed = False
+            if os.path.isdir(self.directory):
+                with os.scandir(self.directory) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith('.md') or not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                        signature = (stat.st_mtime_ns, stat.st_size)
+                        cached = self._files.get(entry.name)
+                        if cached is not None and cached[0] == signature:
+                            seen[entry.name] = cached
+                            continue
+                        post = parse_blog_post(entry.name, self.directory)
+                        self.reloads += 1
+                        seen[entry.name] = (signature, post)
+                        changed = True
+            if changed or seen.keys() != self._files.keys():
+                self._files = seen
+                self._rebuild()
+            self._last_check = time.monotonic()
+
+    def publish(self, filename, text):
+        """Atomically write a post, add it to the index and notify other workers.
+
+        The Markdown is written to a temporary file and renamed into place,
+        so readers never see a partial post. The post is spliced into the
+        listing without rescanning the directory, and its body is rendered
+        into the Markdown cache here so the first reader does not pay for
+        it. Other
+        processes learn about it through the publish log.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        filepath = os.path.join(self.directory, filename)
+        tmp_path = os.path.join(self.directory, f".{filename}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, filepath)
+        with self._lock:
+            # Catch up with other workers' entries first, then consume our
+            # own; the offset never moves past an entry that was not applied
+            self._read_publish_log()
+            self._apply_file(filename)
+            with open(self._publish_log_path(), 'a') as log:
+                log.write(filename + '\n')
+            self._read_publish_log()
+        post = self._files[filename][1]
+        if post is not None:
+            post.content
+        return post
+
+    def _publish_log_path(self):
+        return os.path.join(self.directory, BLOG_PUBLISH_LOG)
+
+    def _publish_log_size(self):
+        try:
+            return os.stat(self._publish_log_path()).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _apply_publish_log(self):
+        if self._publish_log_size() == self._log_offset:
+            return
+        with self._lock:
+            self._read_publish_log()
+
+    def _read_publish_log(self):
+        """Apply log entries past ``_log_offset``. Caller holds the lock."""
+        size = self._publish_log_size()
+        if size == self._log_offset:
+            return
+        if size < self._log_offset:
+            # Log was truncated or replaced; start over from the top
+            self._log_offset = 0
+        with open(self._publish_log_path(), 'rb') as log:
+            log.seek(self._log_offset)
+            data = log.read(size - self._log_offset)
+        # Only consume complete lines; a partial one is retried next time
+        consumed = data.rfind(b'\n') + 1
+        for filename in set(data[:consumed].decode('utf-8').splitlines()):
+            cached = self._files.get(filename)
+            try:
+                stat = os.stat(os.path.join(self.directory, filename))
+                signature = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                signature = None
+            if cached is None or cached[0] != signature:
+                self._apply_file(filename)
+        self._log_offset += consumed
+
+    def _apply_file(self, filename):
+        """Re-read one post and splice it into the listing. Caller holds the lock."""
+        self.generation += 1
+        filepath = os.path.join(self.directory, filename)
+        old = self._files.pop(filename, (None, None))[1]
+        new = None
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            pass
+        else:
+            new = parse_blog_post(filename, self.directory)
+            self.reloads += 1
+            self._files[filename] = ((stat.st_mtime_ns, stat.st_size), new)
+
+        if old is not None:
+            self._sorted.remove(old)
+            for key in old.listing_keys():
+                listing = self._listings[key]
+                listing.remove(old)
+                if not listing:
+                    del self._listings[key]
+        if new is not None:
+            bisect.insort(self._sorted, new, key=lambda x: -x.date.timestamp())
+            for key in new.listing_keys():
+                bisect.insort(self._listings.setdefault(key, []), new, key=lambda x: -x.date.timestamp())
+
+        slugs = {post.slug for post in (old, new) if post}
+        for slug in slugs:
+            # On duplicate slugs the newest post wins
+            match = next((post for post in self._sorted if post.slug == slug), None)
+            if match is None:
+                self._by_slug.pop(slug, None)
+            else:
+                self._by_slug[slug] = match
+
+    def _rebuild(self):
+        self.generation += 1
+        posts = [post for _, post in self._files.values() if post]
+        # Sort posts by date (newest first)
+        posts.sort(key=lambda x: x.date, reverse=True)
+        self._sorted = posts
+        # On duplicate slugs the newest post wins
+        self._by_slug = {post.slug: post for post in reversed(posts)}
+        listings = {}
+        for post in posts:
+            for key in post.listing_keys():
+                listings.setdefault(key, []).append(post)
+        self._listings = listings
+
+    def posts(self):
+        self.refresh()
+        return list(self._sorted)
+
+    def files(self):
+        """Return ``{filename: ((mtime_ns, size), post)}`` for every indexed file."""
+        self.refresh()
+        return dict(self._files)
+
+    def post_for_file(self, filename):
+        entry = self._files.get(filename)
+        return entry[1] if entry else None
+
+    def page(self, number, per_page):
+        """Return one page of posts (newest first) and the total count.
+
+        The listing only reads metadata, so bodies that are loaded on demand
+        stay unloaded.
+        """
+        self.refresh()
+        posts = self._sorted
+        start = (number - 1) * per_page
+        return posts[start:start + per_page], len(posts)
+
+    def listing(self, kind, value, number, per_page):
+        """Return one page of the posts under a tag, category or month, and their count.
+
+        ``kind`` is ``'tag'`` or ``'category'`` with a :func:`term_slug`
+        value, or ``'month'`` with a ``(year, month)`` tuple. Listings are
+        kept up to date as posts change, so this only costs the page.
+        """
+        self.refresh()
+        posts = self._listings.get((kind, value), ())
+        start = (number - 1) * per_page
+        return list(posts[start:start + per_page]), len(posts)
+
+    def terms(self, kind):
+        """Return ``[(value, name, count)]`` for every non-empty listing of ``kind``.
+
+        Tags and categories are ordered by post count, then name; months
+        newest first. ``name`` is the spelling used by the newest post. The
+        result is kept until the index changes, since every blog listing
+        shows it.
+        """
+        self.refresh()
+        with self._lock:
+            generation = self.generation
+            cached = self._terms.get(kind)
+            if cached is not None and cached[0] == generation:
+                return list(cached[1])
+            listings = [(value, posts[0], len(posts))
+                        for (listed, value), posts in self._listings.items() if listed == kind]
+        terms = [(value, term_name(kind, value, post), count) for value, post, count in listings]
+        if kind == 'month':
+            terms.sort(reverse=True)
+        else:
+            terms.sort(key=lambda term: (-term[2], term[1].lower()))
+        self._terms[kind] = (generation, terms)
+        return list(terms)
+
+    def get(self, slug):
+        self.refresh()
+        post = self._by_slug.get(slug)
+        if post is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return post
+
+    def stats(self):
+        return {
+            'posts': len(self._sorted),
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+        }
+
+    def save(self, path):
+        """Write the current index to a prebuilt artifact at ``path``.
+
+        The file is a small JSON header (per-file signatures, post metadata
+        in listing order) followed by the rendered HTML of every post, so
+        readers can memory-map it and decode bodies only when needed.
+        """
+        self.refresh(force=True)
+        files = {}
+        posts = []
+        body = bytearray()
+        for filename, (signature, post) in sorted(self._files.items()):
+            filepath = os.path.join(self.directory, filename)
+            with open(filepath, 'rb') as file:
+                digest = hashlib.sha1(file.read()).hexdigest()
+            files[filename] = {'mtime_ns': signature[0], 'size': signature[1], 'sha1': digest}
+            if not post:
+                continue
+            html = post.content.encode('utf-8')
+            meta = post.metadata()
+            meta['date'] = post.date.isoformat()
+            meta['filename'] = filename
+            meta['span'] = [len(body), len(html)]
+            posts.append(meta)
+            body += html
+        posts.sort(key=lambda x: x['date'], reverse=True)
+        header = json.dumps({'files': files, 'posts': posts}, separators=(',', ':')).encode('utf-8')
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(BLOG_ARTIFACT_MAGIC)
+            file.write(struct.pack('>I', len(header)))
+            file.write(header)
+            file.write(body)
+        os.replace(tmp_path, path)
+        return len(posts)
+
+    def load(self, path):
+        """Seed the index from a prebuilt artifact.
+
+        Only posts whose source file is unchanged since the build are taken
+        from the artifact; anything stale or new is parsed live on the next
+        refresh. Returns the number of posts loaded.
+        """
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(BLOG_ARTIFACT_MAGIC)] != BLOG_ARTIFACT_MAGIC:
+            raise ValueError(f"{path} is not a blog index artifact")
+        offset = len(BLOG_ARTIFACT_MAGIC)
+        (header_length,) = struct.unpack_from('>I', buffer, offset)
+        offset += 4
+        header = json.loads(buffer[offset:offset + header_length])
+        body_start = offset + header_length
+
+        loaded = {}
+        for meta in header['posts']:
+            filename = meta.pop('filename')
+            built = header['files'][filename]
+            filepath = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            if stat.st_size != built['size']:
+                continue
+            if stat.st_mtime_ns != built['mtime_ns']:
+                # Deploys (zip/unzip) usually reset mtimes; fall back to content
+                with open(filepath, 'rb') as file:
+                    if hashlib.sha1(file.read()).hexdigest() != built['sha1']:
+                        continue
+            start, length = meta.pop('span')
+            meta['date'] = datetime.datetime.fromisoformat(meta['date'])
+            post = BlogPost(loader=_MappedContent(buffer, body_start + start, length), **meta)
+            loaded[filename] = ((stat.st_mtime_ns, stat.st_size), post)
+
+        with self._lock:
+            self._files = loaded
+            self._rebuild()
+            self._last_check = None
+        return len(loaded)
+
+
+class _MappedContent:
+    """Loader for a post body stored in the memory-mapped artifact."""
+
+    __slots__ = ('buffer', 'start', 'length')
+
+    def __init__(self, buffer, start, length):
+        self.buffer = buffer
+        self.start = start
+        self.length = length
+
+    def __call__(self):
+        return self.buffer[self.start:self.start + self.length].decode('utf-8')
+
+
+def get_blog_posts():
+    try:
+        return blog_index.posts()
+    except Exception as e:
+        logger.error(f"Error getting blog posts: {str(e)}")
+        return []
+
+def get_blog_page(page, per_page):
+    try:
+        return blog_index.page(page, per_page)
+    except Exception as e:
+        logger.error(f"Error getting blog page {page}: {str(e)}")
+        return [], 0
+
+def get_blog_listing(kind, value, page, per_page):
+    try:
+        return blog_index.listing(kind, value, page, per_page)
+    except Exception as e:
+        logger.error(f"Error getting blog {kind} listing {value}: {str(e)}")
+        return [], 0
+
+def get_blog_terms(kind):
+    try:
+        return blog_index.terms(kind)
+    except Exception as e:
+        logger.error(f"Error getting blog {kind} terms: {str(e)}")
+        return []
+
+def get_blog_post(slug):
+    try:
+        return blog_index.get(slug)
+    except Exception as e:
+        logger.error(f"Error getting blog post {slug}: {str(e)}")
+    return None
+
+def parse_front_matter(lines):
+    """Parse front matter lines into a dict.
+
+    Supports the small YAML subset posts use: ``key: value`` split on the
+    first colon (so titles may contain colons), single or double quoted
+    values, indented continuation lines, and ``|`` (literal) or ``>``
+    (folded) block values. Comment lines and lines without a key are
+    ignored.
+    """
+    values = {}
+    key = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if key is not None and (not line.strip() or line[:1] in (' ', '\t')):
+            values[key][1].append(line)
+            continue
+        key = None
+        if ':' not in line or line.lstrip().startswith('#'):
+            continue
+        key, value = line.split(':', 1)
+        key, value = key.strip(), value.strip()
+        if value[:1] in ('|', '>') and value[1:] in ('', '-', '+'):
+            values[key] = (value[0], [])
+        else:
+            values[key] = (None, [value])
+
+    metadata = {}
+    for key, (style, parts) in values.items():
+        if style == '|':
+            metadata[key] = textwrap.dedent('\n'.join(parts)).strip('\n')
+            continue
+        if style is None and len(parts) == 1:
+            metadata[key] = _unquote(parts[0])
+            continue
+        # Multi-line plain and folded values: lines join with spaces, blank lines break
+        paragraphs = [' '.join(part.split()) for part in '\n'.join(parts).split('\n\n')]
+        metadata[key] = _unquote('\n'.join(p for p in paragraphs if p).strip())
+    return metadata
+
+def _unquote(value):
+    # Only a value quoted from end to end is unquoted; `"a" vs "b"` is kept as written
+    match = DOUBLE_QUOTED_RE.fullmatch(value)
+    if match:
+        return BACKSLASH_ESCAPE_RE.sub(r'\1', match.group(1))
+    match = SINGLE_QUOTED_RE.fullmatch(value)
+    if match:
+        return match.group(1).replace("''", "'")
+    return value
+
+def quote_front_matter(value):
+    """Quote ``value`` for a one-line front matter field."""
+    value = ' '.join(value.split()).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{value}"'
+
+def read_front_matter(file):
+    """Read the front matter at the top of an open text file.
+
+    Lines are read only up to the closing ``---``, leaving ``file``
+    positioned at the start of the body. Returns the metadata dict, or None
+    if the file does not start with front matter.
+    """
+    if file.readline().strip() != '---':
+        return None
+    lines = []
+    for line in iter(file.readline, ''):
+        if line.strip() == '---':
+            return parse_front_matter(lines)
+        lines.append(line)
+    return None
+
+def split_front_matter(content):
+    """Split a post into (metadata dict, Markdown source), or None without front matter."""
+    file = io.StringIO(content)
+    metadata = read_front_matter(file)
+    if metadata is None:
+        return None
+    return metadata, file.read()
+
+markdown_renderer = app_state('markdown_renderer')
+
+@metrics.timed('markdown')
+def render_markdown(text):
+    return markdown_renderer.render(text)
+
+
+class _PostBody:
+    """Loader that reads a post's body from its file and renders it."""
+
+    __slots__ = ('filepath',)
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+    def __call__(self):
+        try:
+            with open(self.filepath, 'r') as file:
+                # Skip the front matter again; the file may have been
+                # replaced since it was indexed, so no offset is kept
+                if read_front_matter(file) is None:
+                    return ''
+                return render_markdown(file.read())
+        except Exception as e:
+            logger.error(f"Error rendering blog post {self.filepath}: {str(e)}")
+            return ''
+
+
+def parse_tags(value):
+    """Split ``a, b`` or ``[a, b]`` into tags, dropping blanks and repeats."""
+    value = value.strip()
+    if value.startswith('[') and value.endswith(']'):
+        value = value[1:-1]
+    tags = []
+    seen = set()
+    for tag in value.split(','):
+        tag = _unquote(tag.strip())
+        slug = term_slug(tag)
+        if slug and slug not in seen:
+            seen.add(slug)
+            tags.append(tag)
+    return tags
+
+def term_slug(value):
+    """URL form of a tag or category: lowercase words joined by hyphens."""
+    return TERM_SLUG_RE.sub('-', value.lower()).strip('-')
+
+def term_name(kind, value, post):
+    """Display name of a listing, as spelled by ``post``."""
+    if kind == 'month':
+        return datetime.date(value[0], value[1], 1).strftime('%B %Y')
+    names = post.tags if kind == 'tag' else (post.category,)
+    return next((name for name in names if term_slug(name) == value), value)
+
+@metrics.timed('blog_parse')
+def parse_blog_post(filename, directory=None):
+    """Read a post's front matter without touching its body.
+
+    The body is read and rendered the first time ``content`` is accessed,
+    so listings and the search index never pay for Markdown.
+    """
+    try:
+        filepath = os.path.join(directory or blog_index.directory, filename)
+        with open(filepath, 'r') as file:
+            metadata = read_front_matter(file)
+        if metadata is None:
+            return None
+        
+        # Create slug from title if not provided
+        if 'slug' not in metadata and 'title' in metadata:
+            metadata['slug'] = metadata['title'].lower().replace(' ', '-')
+        
+        # Parse date
+        if 'date' in metadata:
+            try:
+                date_obj = datetime.datetime.strptime(metadata['date'], '%Y-%m-%d')
+                metadata['date'] = date_obj
+            except ValueError:
+                metadata['date'] = datetime.datetime.now()
+        else:
+            metadata['date'] = datetime.datetime.now()
+        
+        return BlogPost(
+            title=metadata.get('title', 'Untitled'),
+            author=metadata.get('author', 'Netrun Systems'),
+            date=metadata['date'],
+            slug=metadata.get('slug', ''),
+            excerpt=metadata.get('excerpt', ''),
+            image=metadata.get('image', ''),
+            tags=parse_tags(metadata.get('tags', '')),
+            category=metadata.get('category', ''),
+            loader=_PostBody(filepath),
+        )
+    except Exception as e:
+        logger.error(f"Error parsing blog post {filename}: {str(e)}")
+        return None
+
+blog_index = app_state('blog_index')
+blog_search = app_state('blog_search')
+blog_search_lock = threading.Lock()
+
+def sync_search_index(search, index):
+    """Bring ``search`` in line with the posts currently in ``index``.
+
+    Only posts whose file signature differs from the one recorded in the
+    search index are re-read, so this is cheap after the first build.
+    """
+    files = index.files()
+    for doc in [doc for doc in search.docs if not files.get(doc, (None, None))[1]]:
+        search.remove(doc)
+    for filename, (signature, post) in files.items():
+        if post is None:
+            continue
+        stored = search.signature(filename)
+        if stored and stored[:2] == list(signature):
+            continue
+        with open(os.path.join(index.directory, filename), 'r') as file:
+            content = file.read()
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        current = [signature[0], signature[1], digest]
+        if stored and stored[1:] == current[1:]:
+            # Same content with a new mtime (e.g. after a deploy)
+            stored[0] = signature[0]
+            continue
+        parsed = split_front_matter(content)
+        body = parsed[1] if parsed else ''
+        search.add(filename, post.title, post.excerpt, body, signature=current)
+
+def sync_blog_search():
+    """Update ``blog_search`` if the blog index changed since the last sync."""
+    blog_index.refresh()
+    generation = blog_index.generation
+    if generation != blog_search.generation:
+        with blog_search_lock:
+            if generation != blog_search.generation:
+                sync_search_index(blog_search, blog_index)
+                blog_search.generation = generation
+
+def search_blog_posts(query, limit=20):
+    try:
+        sync_blog_search()
+        results = []
+        for filename, score in blog_search.search(query, limit=limit):
+            post = blog_index.post_for_file(filename)
+            if post:
+                results.append(post)
+        return results
+    except Exception as e:
+        logger.error(f"Error searching blog posts for {query!r}: {str(e)}")
+        return []
+
+def load_prebuilt_blog_index(app=None):
+    app = resolve_app(app)
+    state = app.extensions['netrun']
+    index_file = app.config['BLOG_INDEX_FILE']
+    search_file = app.config['BLOG_SEARCH_FILE']
+    if os.path.exists(index_file):
+        try:
+            state['blog_index'].load(index_file)
+        except Exception as e:
+            logger.error(f"Error loading prebuilt blog index: {str(e)}")
+    if os.path.exists(search_file):
+        try:
+            state['blog_search'] = SearchIndex.load(search_file)
+        except Exception as e:
+            logger.error(f"Error loading prebuilt blog search index: {str(e)}")
+
+blog_cli = AppGroup('blog', help='Blog maintenance commands.')
+
+@blog_cli.command('build')
+@click.option('--output', default=None, help='Artifact path (defaults to BLOG_INDEX_FILE).')
+@click.option('--search-output', default=None, help='Search index path (defaults to BLOG_SEARCH_FILE).')
+def blog_build(output, search_output):
+    """Render all blog posts into the prebuilt index and search artifacts."""
+    output = output or current_app.config['BLOG_INDEX_FILE']
+    search_output = search_output or current_app.config['BLOG_SEARCH_FILE']
+    count = blog_index.save(output)
+    search = SearchIndex()
+    sync_search_index(search, blog_index)
+    search.save(search_output)
+    click.echo(f"Wrote {count} posts to {output} and {len(search)} to {search_output}")
+
+@blog_cli.command('render-cache')
+@click.option('--clear', is_flag=True, help='Drop every cached render.')
+def blog_render_cache(clear):
+    """Show (or clear) the Markdown render cache."""
+    if clear:
+        markdown_renderer.clear()
+    for name, value in markdown_renderer.stats().items():
+        click.echo(f"{name}: {value}")
+
+@route('/admin/blog', methods=['GET', 'POST'])
+def admin_blog():
+    now = datetime.datetime.now()
+    if request.method == 'POST':
+        try:
+            title = request.form.get('title')
+            author = request.form.get('author')
+            date_str = request.form.get('date')
+            excerpt = request.form.get('excerpt')
+            category = request.form.get('category', '').strip()
+            tags = ', '.join(quote_front_matter(tag) for tag in parse_tags(request.form.get('tags', '')))
+            content = request.form.get('content')
+            
+            # Create slug from title
+            slug = title.lower().replace(' ', '-')
+            # Remove special characters
+            slug = re.sub(r'[^a-z0-9-]', '', slug)
+            
+            # Parse date
+            try:
+                date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+                date = date_obj.strftime('%Y-%m-%d')
+            except ValueError:
+                date = datetime.datetime.now().strftime('%Y-%m-%d')
+            
+            # Create markdown file
+            markdown_content = f"""---
+title: {quote_front_matter(title)}
+author: {quote_front_matter(author or '')}
+date: {date}
+slug: {slug}
+excerpt: {quote_front_matter(excerpt or '')}
+category: {quote_front_matter(category)}
+tags: [{tags}]
+---
+{content}
+"""
+            
+            # Ensure blog post directory exists
+            os.makedirs(blog_index.directory, exist_ok=True)
+            
+            filename = f"{slug}.md"
+            blog_index.publish(filename, markdown_content)
+            
+            flash('Blog post created successfully!', 'success')
+            return redirect(url_for('blog'))
+        except Exception as e:
+            logger.error(f"Error creating blog post: {str(e)}")
+            flash(f'Error creating blog post: {str(e)}', 'error')
+    
+    return render_template('admin_blog.html', now=now)
+
+@route('/contact', methods=['GET', 'POST'])
+def contact():
+    now = datetime.datetime.now()
+    if request.method == 'POST':
+        name = request.form.get('name')
+        email = request.form.get('email')
+        subject = request.form.get('subject')
+        message = request.form.get('message')
+        
+        if not queue_submission('contact', {
+            'name': name, 'email': email, 'subject': subject, 'message': message,
+        }):
+            flash(f"Sorry, we could not send your message. Please email {current_app.config['CONTACT_EMAIL']}.", 'error')
+            return redirect(url_for('contact'))
+        flash('Thank you for your message! We will get back to you shortly.', 'success')
+        return redirect(url_for('contact'))
+        
+    return render_template('contact.html', now=now)
+
+@route('/favicon.ico')
+def favicon():
+    return send_from_directory(current_app.static_folder,
+                               'favicon.ico', mimetype='image/vnd.microsoft.icon')
+
+def create_sample_content():
+    """Write the welcome post if the blog directory is empty. Returns True if it did."""
+    try:
+        directory = blog_index.directory
+        # Ensure blog post directory exists
+        os.makedirs(directory, exist_ok=True)
+        
+        # Check if any blog posts exist
+        if not os.listdir(directory):
+            # Create a sample blog post
+            sample_post = """---
+title: Welcome to Netrun Systems
+author: Netrun Systems
+date: 2025-04-24
+slug: welcome-to-netrun-systems
+excerpt: Welcome to the Netrun Systems blog where we'll share insights on Azure cross-tenant governance and cloud management.
+category: Announcements
+tags: Azure Lighthouse, Governance
+---
+# Welcome to Netrun Systems
+
+Thank you for visiting the Netrun Systems blog. Here we'll share insights, best practices, and updates about our cross-tenant governance solutions for Azure.
+
+## Our Mission
+
+At Netrun Systems, we're dedicated to helping Azure consultants and MSPs manage multiple client environments securely and efficiently. Our flagship product, Netrun Systems Nexus, leverages Azure Lighthouse technology to provide secure cross-tenant access management without sharing credentials or adding guest accounts.
+
+## Stay Tuned
+
+Check back regularly for:
+- Technical deep dives
+- Best practices for Azure governance
+- Product updates and new features
+- Case studies and success stories
+
+We're excited to have you join us on this journey!
+"""
+            with open(os.path.join(directory, 'welcome-to-netrun-systems.md'), 'w') as f:
+                f.write(sample_post)
+            return True
+    except Exception as e:
+        logger.error(f"Error creating sample content: {str(e)}")
+    return False
+
+@blog_cli.command('seed')
+def blog_seed():
+    """Create the blog directory with a sample post if it is empty."""
+    if create_sample_content():
+        click.echo(f"Wrote a sample post to {blog_index.directory}")
+    else:
+        click.echo(f"{blog_index.directory} already has posts")
+
+@route('/privacy-policy')
+def privacy_policy():
+    return render_page('privacy_policy.html')
+
+@route('/terms-of-service')
+def terms_of_service():
+    return render_page('terms_of_service.html')
+
+@route('/consulting')
+def consulting_services():
+    return render_page('consulting_services.html')
+
+@route('/product/small-business-optimization-suite')
+def product_small_business_optimization_suite():
+    return render_page('product_small_business_optimization_suite.html')
+
+@route('/research-projects')
+def research_projects():
+    return render_page('research_projects.html')
+
+@route('/research/sunflower')
+def research_sunflower():
+    return render_page('research_sunflower.html')
+
+@route('/research/podcast-cohost')
+def research_podcast_cohost():
+    return render_page('research_podcast_cohost.html')
+
+@route('/research/scrum-master')
+def research_scrum_master():
+    return render_page('research_scrum_master.html')
+
+@route('/research/connection-manager')
+def research_connection_manager():
+    return render_page('research_connection_manager.html')
+
+@route('/login')
+def login():
+    session['user'] = {
+        'name': 'Development User',
+        'email': 'dev@netrunsystems.com',
+        'id': 'dev-user-id'
+    }
+
+    # Redirect back to originally requested page if present
+    redirect_url = session.pop('state', None)
+    if not redirect_url:
+        redirect_url = url_for('customer_portal')
+
+    return redirect(redirect_url)
+
+@route('/logout')
+def logout():
+    session.clear()
+    return redirect(url_for('index'))
+
+@route('/portal')
+@requires_auth
+def customer_portal():
+    user = session.get('user')
+    now = datetime.datetime.now()
+    return render_template('customer_portal.html',
+                         user=user,
+                         now=now,
+                         version="2.0.0")  # Hardcoded version for development
+
+@route('/portal/profile')
+@requires_auth
+def customer_profile():
+    user = session.get('user')
+    now = datetime.datetime.now()
+    return render_template('customer_profile.html', user=user, now=now)
+
+@route('/portal/resources')
+@requires_auth
+def customer_resources():
+    user = session.get('user')
+    now = datetime.datetime.now()
+    return render_template('customer_resources.html', user=user, now=now)
+
+@route('/portal/support')
+@requires_auth
+def customer_support():
+    user = session.get('user')
+    now = datetime.datetime.now()
+    return render_template('customer_support.html', user=user, now=now)
+
+# Endpoints that must stay dynamic when the site is frozen
+FREEZE_EXCLUDED_ENDPOINTS = {'static', 'login', 'logout', 'blog_search_results', 'metrics'}
+
+# Blog listing endpoints and the kind of blog_index listing each one shows
+BLOG_LISTING_ENDPOINTS = {'blog_tag': 'tag', 'blog_category': 'category', 'blog_archive': 'month'}
+
+def listing_urls(endpoint, total, **values):
+    """URLs of every page of a blog listing at the default page size."""
+    yield url_for(endpoint, **values)
+    for page in range(2, listing_page_count(total) + 1):
+        yield url_for(endpoint, page=page, **values)
+
+def freezable_urls():
+    """Yield every public GET URL that does not depend on request state."""
+    for rule in current_app.url_map.iter_rules():
+        view = current_app.view_functions[rule.endpoint]
+        if (rule.endpoint in FREEZE_EXCLUDED_ENDPOINTS
+                or 'GET' not in rule.methods or 'POST' in rule.methods
+                or getattr(view, 'requires_auth', False)):
+            continue
+        if rule.endpoint == 'blog_post':
+            for post in get_blog_posts():
+                yield url_for('blog_post', slug=post.slug)
+        elif 'page' in rule.arguments:
+            continue  # Later listing pages are yielded with their first page
+        elif rule.endpoint == 'blog':
+            yield from listing_urls('blog', len(get_blog_posts()))
+        elif rule.endpoint in BLOG_LISTING_ENDPOINTS:
+            kind = BLOG_LISTING_ENDPOINTS[rule.endpoint]
+            for value, _, count in get_blog_terms(kind):
+                values = {'year': value[0], 'month': value[1]} if kind == 'month' else {kind: value}
+                yield from listing_urls(rule.endpoint, count, **values)
+        elif not rule.arguments:
+            yield url_for(rule.endpoint)
+
+def frozen_path(output_dir, url):
+    """Map a URL to a file path, using index.html for directory-style URLs."""
+    path = url.strip('/')
+    if not os.path.splitext(path)[1]:
+        path = os.path.join(path, 'index.html')
+    return os.path.join(output_dir, path)
+
+def freeze_site(output_dir, base_url='http://localhost', app=None):
+    """Render every public page and copy static assets into ``output_dir``.
+
+    ``base_url`` is the public origin the pages will be served from; it ends
+    up in absolute links such as the blog share buttons. Returns the list of
+    URLs that were written. Pages that do not render with a 200 are logged
+    and skipped.
+    """
+    app = resolve_app(app)
+    with app.test_request_context():
+        urls = list(freezable_urls())
+    static_dir = os.path.join(output_dir, 'static')
+    shutil.copytree(app.static_folder, static_dir, dirs_exist_ok=True)
+    if app.extensions['netrun']['asset_manifest']:
+        # Pages reference fingerprinted assets, so ship the asset build too
+        shutil.copytree(app.config['ASSET_BUILD_DIR'], static_dir, dirs_exist_ok=True)
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            if not name.endswith(('.gz', '.br')):
+                write_compressed_siblings(os.path.join(root, name))
+
+    client = app.test_client()
+    written = []
+    for url in urls:
+        response = client.get(url, base_url=base_url)
+        if response.status_code != 200:
+            logger.error(f"Skipping {url} while freezing: HTTP {response.status_code}")
+            continue
+        filepath = frozen_path(output_dir, url)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, 'wb') as file:
+            file.write(response.data)
+        write_compressed_siblings(filepath)
+        written.append(url)
+    return written
+
+@click.command('freeze')
+@click.option('--output', default='build', show_default=True, help='Directory to write the static site to.')
+@click.option('--base-url', default='https://www.netrunsystems.com', show_default=True,
+              help='Public origin used for absolute links.')
+@with_appcontext
+def freeze(output, base_url):
+    """Pre-render the public site to static HTML for CDN serving."""
+    written = freeze_site(output, base_url=base_url)
+    click.echo(f"Froze {len(written)} pages into {output}")
+
+# Crawler endpoints. Both documents are built from the URL map and post
+# metadata only (no post bodies), cached until the blog index changes and
+# served with an ETag so repeat fetches get a 304.
+SITEMAP_EXCLUDED_ENDPOINTS = {'favicon', 'sitemap', 'blog_feed'}
+BLOG_FEED_SIZE = int(os.environ.get('BLOG_FEED_SIZE', 20))
+
+xml_cache = app_state('xml_cache')
+
+def render_cached_xml(template, mimetype, build_context):
+    """Serve ``template`` from ``xml_cache``, rebuilding it when the posts change.
+
+    Entries are keyed by the blog index generation and the request host,
+    since both documents contain absolute URLs.
+    """
+    blog_index.refresh()
+    key = (template, request.host_url, blog_index.generation)
+    entry = xml_cache.get(key)
+    if entry is None:
+        entry = xml_cache.put(key, render_template(template, **build_context()))
+
+    response = current_app.response_class(entry['body'], mimetype=mimetype)
+    response.set_etag(entry['etag'])
+    response.last_modified = entry['last_modified']
+    return response.make_conditional(request)
+
+def sitemap_entries():
+    """Yield ``(absolute URL, last modified date or None)`` for every public page."""
+    excluded = {url_for(endpoint) for endpoint in SITEMAP_EXCLUDED_ENDPOINTS}
+    dates = {url_for('blog_post', slug=post.slug): post.date for post in get_blog_posts()}
+    host = request.host_url.rstrip('/')
+    for url in freezable_urls():
+        if url not in excluded:
+            yield host + url, dates.get(url)
+
+def feed_items():
+    from email.utils import format_datetime
+    items = []
+    for post in get_blog_posts()[:BLOG_FEED_SIZE]:
+        items.append({
+            'post': post,
+            'url': url_for('blog_post', slug=post.slug, _external=True),
+            'published': format_datetime(post.date.replace(tzinfo=datetime.timezone.utc)),
+        })
+    return items
+
+@route('/sitemap.xml')
+def sitemap():
+    return render_cached_xml('sitemap.xml', 'application/xml', lambda: {'entries': list(sitemap_entries())})
+
+@route('/blog/feed.xml')
+def blog_feed():
+    return render_cached_xml('feed.xml', 'application/rss+xml', lambda: {
+        'items': feed_items(),
+        'blog_url': url_for('blog', _external=True),
+        'feed_url': url_for('blog_feed', _external=True),
+    })
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """Compiled templates on disk, shared by workers and kept across restarts.
+
+    Jinja stores a SHA-1 of the template source with every entry and
+    recompiles when it no longer matches, so an edited template is never
+    served from old bytecode, even when a deployment resets or preserves its
+    mtime. Entries from another Python or Jinja version are ignored too. The
+    directory is created on first write; if it cannot be written, templates
+    are just compiled in memory as before.
+    """
+
+    def dump_bytecode(self, bucket):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError as e:
+            logger.error(f"Error writing template cache: {str(e)}")
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            super().clear()
+
+def compile_templates(app=None):
+    """Load every template, compiling (and caching) any that need it."""
+    app = resolve_app(app)
+    compiled = 0
+    for name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(name)
+            compiled += 1
+        except Exception as e:
+            logger.error(f"Error compiling template {name}: {str(e)}")
+    return compiled
+
+templates_cli = AppGroup('templates', help='Template commands.')
+
+@templates_cli.command('compile')
+@click.option('--clear', is_flag=True, help='Drop cached bytecode before compiling.')
+def templates_compile(clear):
+    """Precompile every template into TEMPLATE_CACHE_DIR."""
+    cache = current_app.jinja_env.bytecode_cache
+    if cache is None:
+        raise click.ClickException('TEMPLATE_CACHE_DIR is not set')
+    if clear:
+        cache.clear()
+    count = compile_templates()
+    click.echo(f"Compiled {count} templates into {cache.directory}")
+
+def warm_caches(app=None, content=False):
+    """Compile every template and index every blog post up front.
+
+    gunicorn.conf.py calls this in the master when the app is preloaded, so
+    forked workers share the compiled templates and the blog and search
+    indexes copy-on-write instead of each building them on first requests.
+    With ``content`` every post body is rendered into the Markdown cache
+    as well, whose SQLite file the workers share. Returns ``(templates,
+    posts)`` counts.
+    """
+    app = resolve_app(app)
+    with app.app_context():
+        templates = compile_templates(app)
+        blog_index.refresh(force=True)
+        posts = blog_index.posts()
+        if content:
+            for post in posts:
+                post.content  # Fills the shared render cache
+        sync_blog_search()
+    return templates, len(posts)
+
+def init_state(app):
+    """Give ``app`` its own blog and search indexes, caches and rate limiter.
+
+    Paths and sizes come from ``app.config``. Nothing is opened or parsed
+    until first use.
+    """
+    config = app.config
+    app.extensions['netrun'] = {
+        'limiter': make_limiter(),
+        'page_cache': PageCache(maxsize=config['PAGE_CACHE_SIZE']),
+        'xml_cache': PageCache(maxsize=8),
+        'asset_manifest': {},
+        'hashed_assets': set(),
+        'precompressed_assets': set(),
+        'image_manifest': {},
+        'markdown_renderer': MarkdownRenderer(
+            extensions=config['MARKDOWN_EXTENSIONS'],
+            maxsize=config['MARKDOWN_CACHE_SIZE'],
+            path=config['MARKDOWN_CACHE_PATH'] if config['MARKDOWN_CACHE_DISK'] else None,
+            logger=logger,
+        ),
+        'blog_index': BlogPostIndex(config['BLOG_POST_DIR'], check_interval=config['BLOG_INDEX_CHECK_INTERVAL']),
+        'blog_search': SearchIndex(),
+    }
+
+def create_app(config=None):
+    """Build and configure the Flask app.
+
+    Importing this module only defines views and helpers. Settings are read
+    from the environment here, with ``config`` applied on top, and nothing
+    is written to disk: SQLite stores are created on first use and blog
+    posts are parsed when first listed.
+
+    Every app gets its own blog index, caches, submission queue and rate
+    limiter, built from its config, so apps created for tests or tools
+    never change what the process-wide app serves or sends. Request
+    metrics are the exception; they are collected per process.
+    """
+    app = Flask(__name__)
+    configure_app(app)
+    if config:
+        app.config.update(config)
+
+    init_state(app)
+    if app.config['TEMPLATE_CACHE_DIR']:
+        app.jinja_env.bytecode_cache = TemplateBytecodeCache(app.config['TEMPLATE_CACHE_DIR'])
+    init_session_backend(app)
+    if app.config['TRUSTED_PROXY_COUNT']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_COUNT'])
+    if app.config['COMPRESSION_ENABLED']:
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app, min_size=app.config['COMPRESSION_MIN_SIZE'],
+            minify=app.config['COMPRESSION_MINIFY_HTML'],
+        )
+    app.extensions['netrun']['limiter'].init_app(app)
+    csrf.init_app(app)
+    if app.config['METRICS_ENABLED']:
+        init_metrics(app)
+    init_submissions(app)
+
+    for rule, view, options in _routes:
+        app.add_url_rule(rule, view_func=view, **options)
+    app.view_functions['static'] = serve_static
+    app.url_defaults(fingerprint_static_urls)
+    app.add_template_global(responsive_image)
+    app.add_template_filter(term_slug)
+    for command in (assets_cli, images_cli, submissions_cli, blog_cli, templates_cli, freeze):
+        app.cli.add_command(command)
+
+    load_asset_manifest(app)
+    load_image_manifest(app)
+    load_prebuilt_blog_index(app)
+    return app
+
+_default_app = None
+_default_app_lock = threading.Lock()
+
+def get_app():
+    """Return the process-wide app, creating it on first use."""
+    global _default_app
+    if _default_app is None:
+        with _default_app_lock:
+            if _default_app is None:
+                _default_app = create_app()
+    return _default_app
+
+def resolve_app(app=None):
+    """``app`` if given, else the current app, else the process-wide one."""
+    if app is not None:
+        return app
+    if has_app_context():
+        return current_app._get_current_object()
+    return get_app()
+
+def __getattr__(name):
+    # `app:app` for gunicorn, `from app import app`, and `application`,
+    # which Azure App Service looks for, build the app on first access.
+    if name in ('app', 'application'):
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+if __name__ == '__main__':
+    app = create_app()
+    start_submission_dispatcher(app)
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8000)), debug=False)
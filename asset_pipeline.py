@@ -0,0 +1,151 @@
+"""Static asset pipeline.
+
+``build_assets`` copies everything under ``static/`` into a build directory
+under content-hashed names (``css/styles.css`` becomes
+``css/styles.1a2b3c4d.css``), minifies CSS and JavaScript, and writes
+``.gz`` and (when Brotli is installed) ``.br`` siblings for text assets.
+It also writes ``manifest.json``, which maps each logical path to its
+hashed name.
+
+The app uses the manifest to rewrite ``url_for('static', ...)`` and to
+serve hashed files with far-future immutable caching, picking a
+precompressed variant based on ``Accept-Encoding``.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip siblings are always produced
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+# Content types worth storing precompressed siblings for
+COMPRESSIBLE_SUFFIXES = ('.html', '.css', '.js', '.svg', '.xml', '.json', '.txt', '.ico')
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_SPACE_RE = re.compile(r'\s*([{};,>])\s*')
+CSS_COLON_RE = re.compile(r':\s+')
+# Elements whose whitespace is significant, or which hold code
+HTML_PRESERVE_RE = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+# Conditional comments (<!--[if IE]>) are kept
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+HTML_NEWLINE_RE = re.compile(r'\s*\n\s*')
+HTML_SPACE_RE = re.compile(r'[^\S\n]+')
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet."""
+    source = CSS_COMMENT_RE.sub('', source)
+    source = re.sub(r'\s+', ' ', source)
+    source = CSS_SPACE_RE.sub(r'\1', source)
+    source = CSS_COLON_RE.sub(':', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """Drop comment-only lines, indentation and blank lines.
+
+    Line breaks are kept so automatic semicolon insertion behaves the same.
+    Files with template literals are left alone, since they may span lines.
+    """
+    if '`' in source:
+        return source
+    lines = []
+    for line in source.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def minify_html(source):
+    """Drop comments and indentation outside pre, textarea, script and style.
+
+    Whitespace is collapsed rather than removed: a run becomes a newline if
+    it contained one and a single space otherwise, so the gaps between
+    inline elements render the same.
+    """
+    parts = []
+    position = 0
+    for match in HTML_PRESERVE_RE.finditer(source):
+        parts.append(_collapse_html(source[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_collapse_html(source[position:]))
+    return ''.join(parts)
+
+
+def _collapse_html(text):
+    text = HTML_COMMENT_RE.sub('', text)
+    text = HTML_NEWLINE_RE.sub('\n', text)
+    return HTML_SPACE_RE.sub(' ', text)
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def hashed_name(path, data):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def write_compressed_siblings(filepath):
+    """Write .gz (and .br when brotli is installed) next to ``filepath``."""
+    if not filepath.endswith(COMPRESSIBLE_SUFFIXES):
+        return []
+    with open(filepath, 'rb') as file:
+        data = file.read()
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) >= len(data):
+            continue
+        with open(filepath + suffix, 'wb') as file:
+            file.write(compressed)
+        written.append(filepath + suffix)
+    return written
+
+
+def build_assets(static_dir, output_dir):
+    """Fingerprint, minify and precompress ``static_dir`` into ``output_dir``.
+
+    Returns the manifest mapping logical paths (relative to ``static_dir``,
+    with forward slashes) to hashed paths.
+    """
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    manifest = {}
+    for root, _, files in os.walk(static_dir):
+        for name in sorted(files):
+            source_path = os.path.join(root, name)
+            logical = os.path.relpath(source_path, static_dir).replace(os.sep, '/')
+            with open(source_path, 'rb') as file:
+                data = file.read()
+            minify = MINIFIERS.get(os.path.splitext(name)[1].lower())
+            if minify is not None:
+                data = minify(data.decode('utf-8')).encode('utf-8')
+            target = hashed_name(logical, data)
+            target_path = os.path.join(output_dir, *target.split('/'))
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            with open(target_path, 'wb') as file:
+                file.write(data)
+            write_compressed_siblings(target_path)
+            manifest[logical] = target
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    return manifest
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
@@ -0,0 +1,111 @@
+"""Per-post memory footprint of the blog index for a synthetic corpus.
+
+Usage: python benchmarks/bench_blog_memory.py [--posts 5000]
+
+Compares the dict-per-post representation the index used to hold with
+BlogPost objects, both with rendered HTML in memory and loaded from the
+prebuilt artifact with bodies left on disk until accessed. The last row
+reads every body once, as a long-running worker eventually does; bodies
+are not kept on the post, so it should match the on-demand row.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import BlogPost, BlogPostIndex  # noqa: E402
+
+PARAGRAPH = (
+    "Azure Lighthouse lets service providers manage customer tenants without "
+    "guest accounts or shared credentials. "
+) * 6
+
+
+def write_corpus(directory, count):
+    for number in range(count):
+        with open(os.path.join(directory, f'post-{number:05d}.md'), 'w') as file:
+            file.write(
+                f"---\ntitle: Post {number}\nauthor: Netrun Systems\n"
+                f"date: 2025-{number % 12 + 1:02d}-{number % 28 + 1:02d}\n"
+                f"slug: post-{number:05d}\nexcerpt: Summary of post {number}.\n---\n"
+                f"# Post {number}\n\n{PARAGRAPH}\n\n{PARAGRAPH}\n"
+            )
+
+
+def legacy_dict(post):
+    return {
+        'title': post.title,
+        'author': post.author,
+        'date': post.date,
+        'formatted_date': post.date.strftime('%B %d, %Y'),
+        'slug': post.slug,
+        'excerpt': post.excerpt,
+        'image': post.image,
+        'content': post.content,
+    }
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='netrun-blog-')
+    posts_dir = os.path.join(workdir, 'posts')
+    os.makedirs(posts_dir)
+    write_corpus(posts_dir, args.posts)
+    artifact = os.path.join(workdir, 'blog_index.bin')
+    source = BlogPostIndex(posts_dir)
+    source.save(artifact)
+    posts = source.posts()
+
+    loaded = BlogPostIndex(posts_dir)
+    loaded.load(artifact)
+    mapped = loaded.posts()
+
+    # Strings are copied so each representation owns its own data.
+    copy = lambda value: (value + '.')[:-1] if isinstance(value, str) else value
+
+    def blog_posts(with_body, view=False):
+        result = []
+        for post, lazy in zip(posts, mapped):
+            meta = {key: copy(value) for key, value in post.metadata().items()}
+            if with_body:
+                result.append(BlogPost(content=copy(post.content), **meta))
+            else:
+                result.append(BlogPost(loader=lazy._loader, **meta))
+        if view:
+            for post in result:
+                post.content
+        return result
+
+    results = [
+        ('dict with content (before)',
+         lambda: [{key: copy(value) for key, value in legacy_dict(post).items()} for post in posts]),
+        ('BlogPost, body loaded', lambda: blog_posts(True)),
+        ('BlogPost, body on demand', lambda: blog_posts(False)),
+        ('BlogPost, every body viewed', lambda: blog_posts(False, view=True)),
+    ]
+    print(f"{'representation':<32}{'bytes/post':>12}")
+    for label, build in results:
+        _, size = measure(build)
+        print(f"{label:<32}{size / args.posts:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Build and query latency of the blog search index.
+
+Usage: python benchmarks/bench_blog_search.py [--posts 10000]
+
+Indexes a synthetic corpus, then times a mix of single-term, multi-term
+and phrase queries, plus a save/load round trip and the first query on the
+loaded (memory-mapped, not yet decoded) index.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blog_search import SearchIndex  # noqa: E402
+
+VOCABULARY = (
+    'azure lighthouse tenant governance compliance cost optimizer policy '
+    'identity subscription budget alert dashboard report security audit '
+    'automation workflow monitoring backup network firewall defender sentinel '
+    'intune endpoint license migration consulting partner customer'
+).split()
+
+QUERIES = ['azure', 'tenant governance', 'cost budget alert', '"security audit"', 'sentinel defender intune']
+
+# Word frequencies in prose follow a Zipf distribution: a few terms appear in
+# most posts, the long tail in very few. Domain terms take the top ranks.
+LONG_TAIL = [f'term{number}' for number in range(8000)]
+WORDS = VOCABULARY + LONG_TAIL
+CUM_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(WORDS) + 1)))
+
+
+def synthetic_post(rng, words=400):
+    body, title, excerpt = (
+        ' '.join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=size)) for size in (words, 6, 20)
+    )
+    return title, excerpt, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    corpus = [synthetic_post(rng) for _ in range(args.posts)]
+    index = SearchIndex()
+    start = time.perf_counter()
+    for number, post in enumerate(corpus):
+        index.add(f'post-{number}.md', *post)
+    print(f"build: {time.perf_counter() - start:.2f} s for {args.posts} posts")
+
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"query {query!r:<28} p50 {timings[len(timings) // 2]:7.2f} ms  max {timings[-1]:7.2f} ms")
+
+    path = os.path.join(tempfile.mkdtemp(prefix='netrun-search-'), 'blog_search.bin')
+    start = time.perf_counter()
+    index.save(path)
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded = SearchIndex.load(path)
+    print(f"save {saved:.2f} s, load {time.perf_counter() - start:.2f} s, {os.path.getsize(path) / 1e6:.1f} MB")
+    for query in QUERIES:
+        start = time.perf_counter()
+        loaded.search(query)
+        print(f"first query {query!r:<22} after load {(time.perf_counter() - start) * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Response size and time to last byte with dynamic compression.
+
+Usage: python benchmarks/bench_compression.py [--requests 200] [--mbps 1.6]
+                                              [--url / --url /blog ...]
+
+For each page it reports the body size sent for identity, gzip and (when
+Brotli is installed) br, with and without HTML minification, the server
+time per request through the test client and an estimated time to last
+byte on a link of ``--mbps`` (1.6 Mbit/s is a slow 4G connection). Pages
+served from the page cache are compressed once, so their per-request cost
+is mostly the lookup.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compression  # noqa: E402
+from app import create_app  # noqa: E402
+
+DEFAULT_URLS = ['/', '/product/nexus-core', '/consulting', '/blog', '/sitemap.xml']
+
+
+def measure(client, url, encoding, requests):
+    headers = {'Accept-Encoding': encoding}
+    size = len(client.get(url, headers=headers).data)
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(url, headers=headers)
+    return size, (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--mbps', type=float, default=1.6)
+    parser.add_argument('--url', action='append', dest='urls')
+    args = parser.parse_args()
+
+    encodings = ['identity', 'gzip'] + (['br'] if compression.brotli is not None else [])
+    print(f"{args.requests} requests per row, TTLB estimated at {args.mbps} Mbit/s")
+    print(f"{'url':<22} {'minify':<7} {'encoding':<9} {'bytes':>8} {'server ms':>10} {'ttlb ms':>9}")
+    for minify in (False, True):
+        client = create_app({'COMPRESSION_MINIFY_HTML': minify}).test_client()
+        for url in args.urls or DEFAULT_URLS:
+            for encoding in encodings:
+                size, seconds = measure(client, url, encoding, args.requests)
+                ttlb = seconds + size * 8 / (args.mbps * 1_000_000)
+                print(f"{url:<22} {'yes' if minify else 'no':<7} {encoding:<9} {size:>8} "
+                      f"{seconds * 1000:>10.2f} {ttlb * 1000:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Front matter parsing cost for large blog posts.
+
+Usage: python benchmarks/bench_front_matter.py [--posts 200] [--body-kb 256]
+
+Compares the old parser, which read the whole file, matched it with a
+DOTALL regex and rendered the Markdown, with the streaming reader that
+stops at the closing ``---``. The streaming numbers are shown for
+metadata only (what listings and search need) and with the body rendered
+on first access to ``content``.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown  # noqa: E402
+from app import parse_blog_post  # noqa: E402
+
+PARAGRAPH = (
+    "Azure Lighthouse lets service providers manage customer tenants without "
+    "guest accounts or shared credentials. "
+) * 6
+
+
+def write_corpus(directory, count, body_kb):
+    paragraphs = max(1, body_kb * 1024 // (len(PARAGRAPH) + 2))
+    body = '\n\n'.join(f"## Section {n}\n\n{PARAGRAPH}" if n % 10 == 0 else PARAGRAPH
+                       for n in range(paragraphs))
+    for number in range(count):
+        with open(os.path.join(directory, f'post-{number:05d}.md'), 'w') as file:
+            file.write(
+                f"---\ntitle: Post {number}: Governance\nauthor: Netrun Systems\n"
+                f"date: 2025-{number % 12 + 1:02d}-{number % 28 + 1:02d}\n"
+                f"slug: post-{number:05d}\nexcerpt: Summary of post {number}.\n---\n"
+                f"# Post {number}\n\n{body}\n"
+            )
+
+
+def legacy_parse(filepath):
+    with open(filepath, 'r') as file:
+        content = file.read()
+    match = re.match(r'^---\s+(.*?)\s+---\s+(.*)', content, re.DOTALL)
+    metadata = {}
+    for line in match.group(1).split('\n'):
+        if ':' in line:
+            key, value = line.split(':', 1)
+            metadata[key.strip()] = value.strip()
+    metadata['content'] = markdown.markdown(match.group(2))
+    return metadata
+
+
+def timed(label, files, parse):
+    start = time.perf_counter()
+    for filepath in files:
+        parse(filepath)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:>10.1f} {elapsed / len(files) * 1000:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--body-kb', type=int, default=256)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='netrun-front-matter-')
+    write_corpus(directory, args.posts, args.body_kb)
+    files = sorted(os.path.join(directory, name) for name in os.listdir(directory))
+
+    print(f"{args.posts} posts, {args.body_kb} KB bodies")
+    print(f"{'parser':<28} {'total ms':>10} {'ms/post':>10}")
+    timed('legacy (read+regex+render)', files, legacy_parse)
+    timed('streaming, metadata only', files, lambda path: parse_blog_post(os.path.basename(path), directory))
+    timed('streaming, with content', files,
+          lambda path: parse_blog_post(os.path.basename(path), directory).content)
+
+
+if __name__ == '__main__':
+    main()
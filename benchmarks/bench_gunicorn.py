@@ -0,0 +1,108 @@
+"""Memory and throughput of each gunicorn profile in gunicorn.conf.py.
+
+Usage: python benchmarks/bench_gunicorn.py [--profiles preload,gthread,sync]
+           [--posts 2000] [--workers 4] [--threads 4] [--concurrency 16]
+           [--requests 2000]
+
+For each profile a local gunicorn serves a synthetic blog corpus. The script
+times how long it takes to answer the first request, then sends a mix of
+public, blog and portal requests from ``--concurrency`` client threads. After
+the load it reads the memory of the master and its workers. RSS counts pages
+shared copy-on-write once per process. PSS splits each shared page between
+the processes sharing it, so the PSS total is the real footprint (Linux
+only).
+"""
+import argparse
+import concurrent.futures
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_routes import ROOT, benchmark_env, free_port, http_get, summarize, write_corpus
+
+ROUTES = ['/', '/blog', '/blog/post-00001', '/blog/search?q=governance', '/contact',
+          '/portal', '/portal/resources', '/sitemap.xml']
+
+
+def tree_memory(pid):
+    """``(RSS MB, PSS MB)`` summed over ``pid`` and its children."""
+    with open(f'/proc/{pid}/task/{pid}/children') as file:
+        pids = [pid] + [int(child) for child in file.read().split()]
+    rss = pss = 0
+    for proc in pids:
+        with open(f'/proc/{proc}/smaps_rollup') as file:
+            for line in file:
+                if line.startswith('Rss:'):
+                    rss += int(line.split()[1])
+                elif line.startswith('Pss:'):
+                    pss += int(line.split()[1])
+    return rss / 1024, pss / 1024
+
+
+def run_profile(profile, corpus_dir, workdir, args):
+    port = free_port()
+    env = dict(os.environ, **benchmark_env(corpus_dir, workdir))
+    env.update(GUNICORN_PROFILE=profile, WEB_CONCURRENCY=str(args.workers), GUNICORN_THREADS=str(args.threads))
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                http_get(port, '/blog', {})
+                break
+            except OSError:
+                if server.poll() is not None or time.perf_counter() - started > 600:
+                    raise RuntimeError(f'gunicorn ({profile}) did not start')
+                time.sleep(0.05)
+        ready = time.perf_counter() - started
+        cookie = http_get(port, '/login', {})[1]
+        headers = {'Cookie': cookie.split(';', 1)[0]} if cookie else {}
+        urls = itertools.cycle(ROUTES)
+
+        def timed(url):
+            began = time.perf_counter()
+            http_get(port, url, headers)
+            return (time.perf_counter() - began) * 1000
+
+        with concurrent.futures.ThreadPoolExecutor(args.concurrency) as pool:
+            start = time.perf_counter()
+            timings = list(pool.map(timed, [next(urls) for _ in range(args.requests)]))
+            stats = summarize(timings, time.perf_counter() - start)
+        rss, pss = tree_memory(server.pid)
+        return dict(stats, ready=ready, rss=rss, pss=pss)
+    finally:
+        server.terminate()
+        server.wait(30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', default='preload,gthread,sync')
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gthread worker.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads.')
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='netrun-gunicorn-')
+    corpus_dir = os.path.join(workdir, 'posts')
+    write_corpus(corpus_dir, args.posts)
+
+    print(f"{args.posts} posts, {args.workers} workers, {args.concurrency} client threads, "
+          f"{args.requests} requests over {len(ROUTES)} routes")
+    print(f"{'profile':<9}{'ready s':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'RSS MB':>9}{'PSS MB':>9}")
+    for profile in args.profiles.split(','):
+        result = run_profile(profile, corpus_dir, workdir, args)
+        print(f"{profile:<9}{result['ready']:>9.2f}{result['rps']:>9.0f}{result['p50']:>9.2f}"
+              f"{result['p95']:>9.2f}{result['rss']:>9.0f}{result['pss']:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Markdown render cost with and without the render cache.
+
+Usage: python benchmarks/bench_markdown_cache.py [--posts 200] [--body-kb 16]
+
+Renders a synthetic corpus with a fresh ``markdown.markdown`` call per post
+(the old behaviour), with a reused converter, from the in-memory LRU, and
+from the shared SQLite file as a freshly started worker would.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown  # noqa: E402
+from render_cache import MarkdownRenderer  # noqa: E402
+
+PARAGRAPH = (
+    "Azure Lighthouse lets service providers manage customer tenants without "
+    "guest accounts or *shared credentials*. See [the docs](https://learn.microsoft.com). "
+) * 4
+
+
+def make_corpus(count, body_kb):
+    paragraphs = max(1, body_kb * 1024 // (len(PARAGRAPH) + 2))
+    return [
+        f"# Post {number}\n\n" + '\n\n'.join(
+            f"## Section {n}\n\n- item\n- item\n\n{PARAGRAPH}" if n % 5 == 0 else PARAGRAPH
+            for n in range(paragraphs)
+        )
+        for number in range(count)
+    ]
+
+
+def timed(label, texts, render):
+    start = time.perf_counter()
+    for text in texts:
+        render(text)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed * 1000:>10.1f} {elapsed / len(texts) * 1000:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--body-kb', type=int, default=16)
+    args = parser.parse_args()
+
+    texts = make_corpus(args.posts, args.body_kb)
+    path = os.path.join(tempfile.mkdtemp(prefix='netrun-markdown-'), 'cache.sqlite3')
+    renderer = MarkdownRenderer(maxsize=args.posts, path=path)
+    converter = markdown.Markdown()
+
+    print(f"{args.posts} posts, {args.body_kb} KB each")
+    print(f"{'render':<24} {'total ms':>10} {'ms/post':>10}")
+    timed('markdown.markdown', texts, markdown.markdown)
+    timed('reused converter', texts, lambda text: converter.reset().convert(text))
+    timed('cache miss (+ store)', texts, renderer.render)
+    timed('memory hit', texts, renderer.render)
+    timed('disk hit (new worker)', texts, MarkdownRenderer(maxsize=args.posts, path=path).render)
+
+
+if __name__ == '__main__':
+    main()
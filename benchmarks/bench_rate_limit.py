@@ -0,0 +1,69 @@
+"""Measure the latency the rate limiter adds to requests.
+
+Usage: python benchmarks/bench_rate_limit.py [--requests 3000]
+
+Times POST /contact (CSRF and mail dispatch off, queue in a temporary
+directory) and GET / with the limiter enabled and disabled, using Flask's
+test client. The contact limit is raised so no request is throttled, which
+measures the cost of checking and counting rather than of rejecting.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+from submission_queue import SubmissionQueue  # noqa: E402
+
+
+def measure(request, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'mean': statistics.fmean(timings),
+        'p50': timings[len(timings) // 2],
+        'p99': timings[int(len(timings) * 0.99)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    app = app_module.app
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['SUBMISSION_DISPATCH'] = False
+    app_module.submission_queue = SubmissionQueue(
+        os.path.join(tempfile.mkdtemp(prefix='netrun-ratelimit-'), 'submissions.sqlite3')
+    )
+    app_module.POST_RATE_LIMITS['contact'] = '1000000 per minute'
+    client = app.test_client()
+    payload = {'name': 'Ada', 'email': 'ada@example.com', 'subject': 'Hi', 'message': 'Hello'}
+    requests = {
+        # A fresh client per post, so flashed messages don't pile up in the cookie
+        'POST /contact': lambda: app.test_client().post('/contact', data=payload),
+        'GET /': lambda: client.get('/'),
+    }
+
+    print(f"{'request':<16}{'limiter':<10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, request in requests.items():
+        for enabled in (False, True):
+            app_module.limiter.enabled = enabled
+            app_module.limiter.reset()
+            measure(request, 100)
+            stats = measure(request, args.requests)
+            label = 'on' if enabled else 'off'
+            print(f"{name:<16}{label:<10}{stats['mean']:>10.3f}{stats['p50']:>10.3f}{stats['p99']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+"""Latency, throughput and memory for every route, against a stored baseline.
+
+Usage: python benchmarks/bench_routes.py [--corpus 10,1000,10000]
+           [--mode testclient,gunicorn|both] [--requests 200] [--output results.json]
+           [--baseline benchmarks/baseline.json] [--update-baseline]
+
+For each synthetic blog corpus size every GET route in app.py is requested
+(portal pages with a logged-in session), plus POSTs to the contact and early
+access forms. Two modes are measured:
+
+- ``testclient``: Flask's test client in a fresh interpreter per corpus, so
+  the peak RSS reported is that corpus's alone. CSRF, rate limits and mail
+  dispatch are off.
+- ``gunicorn``: a local ``gunicorn app:app`` over HTTP with ``--workers``
+  sync workers and ``--concurrency`` client threads. POST routes are skipped
+  there since they need a CSRF token. Peak RSS is the sum over the master
+  and its workers.
+
+Each route records p50/p95/p99 latency in milliseconds and requests per
+second. Results are written as JSON. When a baseline exists, any route whose
+median latency is more than ``--tolerance`` slower (and by at least
+``--min-delta`` ms), whose status code changed, or any peak RSS more than
+``--tolerance`` larger, is reported as a regression and the script exits
+with status 1. So is any mode, corpus or route in the baseline that the new
+run did not measure; compare with the same ``--mode`` and ``--corpus`` the
+baseline was recorded with. The defaults only flag a doubling: tail
+latencies on a shared machine vary too much from run to run to gate on.
+"""
+import argparse
+import concurrent.futures
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+MODES = ('testclient', 'gunicorn')
+
+# Endpoints that end the session or change the corpus are not benchmarked
+SKIPPED_ENDPOINTS = {'logout', 'metrics'}
+QUERY_ARGS = {'blog_search_results': {'q': 'lighthouse governance'}}
+# URL arguments for rules that need them; rules with arguments not listed
+# here are skipped. post-00000 is a 'lighthouse' post in 'Guides' from 2020-01.
+ROUTE_ARGS = {
+    'blog_post': {'slug': 'post-00000'},
+    'blog_tag': {'tag': 'lighthouse'},
+    'blog_category': {'category': 'guides'},
+    'blog_archive': {'year': 2020, 'month': 1},
+    'static': {'filename': 'css/styles.css'},
+}
+FORM_POSTS = {
+    'contact': {'name': 'Ada', 'email': 'ada@example.com', 'subject': 'Pricing', 'message': 'Hello'},
+    'early_access': {'name': 'Ada', 'company': 'Example', 'email': 'ada@example.com',
+                     'role': 'CTO', 'tenants': '12', 'message': 'Hello'},
+}
+TOPICS = ['lighthouse', 'governance', 'compliance', 'tenants', 'cost', 'identity', 'policy', 'monitoring']
+CATEGORIES = ['Guides', 'Announcements', 'Case Studies']
+PARAGRAPH = (
+    "Azure Lighthouse lets service providers manage customer tenants without "
+    "guest accounts or shared credentials. "
+) * 6
+
+
+def write_corpus(directory, count):
+    os.makedirs(directory, exist_ok=True)
+    for number in range(count):
+        topic = TOPICS[number % len(TOPICS)]
+        with open(os.path.join(directory, f'post-{number:05d}.md'), 'w') as file:
+            file.write(
+                f"---\ntitle: {topic.capitalize()} notes {number}\nauthor: Netrun Systems\n"
+                f"date: {2020 + number % 6}-{number % 12 + 1:02d}-{number % 28 + 1:02d}\n"
+                f"slug: post-{number:05d}\nexcerpt: Notes on {topic}, part {number}.\n"
+                f"tags: {topic}, governance\ncategory: {CATEGORIES[number % len(CATEGORIES)]}\n---\n"
+                f"# {topic.capitalize()} {number}\n\n{PARAGRAPH}\n\n## Details\n\n"
+                f"- {topic}\n- governance\n\n{PARAGRAPH}\n"
+            )
+
+
+def summarize(timings, wall):
+    timings.sort()
+    return {
+        'p50': timings[len(timings) // 2],
+        'p95': timings[int(len(timings) * 0.95)],
+        'p99': timings[min(int(len(timings) * 0.99), len(timings) - 1)],
+        'mean': statistics.fmean(timings),
+        'rps': len(timings) / wall,
+    }
+
+
+def run_test_client(corpus_dir, workdir, count):
+    """Benchmark every route in this (fresh) process. Returns (requests, results, peak RSS MB)."""
+    os.environ.update(benchmark_env(corpus_dir, workdir))
+    sys.path.insert(0, ROOT)
+    import app as app_module
+    from flask import url_for
+
+    app = app_module.app
+    app.config['WTF_CSRF_ENABLED'] = False
+    app_module.limiter.enabled = False
+
+    requests = []
+    with app.test_request_context():
+        for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+            route_args = ROUTE_ARGS.get(rule.endpoint, {})
+            if rule.endpoint in SKIPPED_ENDPOINTS or not rule.arguments <= route_args.keys():
+                continue
+            values = dict(QUERY_ARGS.get(rule.endpoint, {}), **route_args)
+            url = url_for(rule.endpoint, **values)
+            requests.append((f'GET {rule.rule}', 'GET', url, None))
+            if rule.endpoint in FORM_POSTS:
+                requests.append((f'POST {rule.rule}', 'POST', url, FORM_POSTS[rule.endpoint]))
+
+    results = {}
+    client = app.test_client()
+    client.get('/login')
+    for name, method, url, data in requests if count else []:
+        if method == 'POST':
+            # A fresh client per post, so flashed messages don't pile up in the cookie
+            call = lambda: app.test_client().post(url, data=data)
+        else:
+            call = lambda: client.get(url)
+        status = call().status_code  # Warm caches, indexes and templates
+        timings = []
+        start = time.perf_counter()
+        for _ in range(count):
+            began = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - began) * 1000)
+        results[name] = dict(summarize(timings, time.perf_counter() - start), status=status)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return requests, results, peak_rss
+
+
+def benchmark_env(corpus_dir, workdir):
+    return {
+        'BLOG_POST_DIR': corpus_dir,
+        # No prebuilt artifacts, so the corpus is parsed like a fresh deploy
+        'BLOG_INDEX_FILE': os.path.join(workdir, 'missing-index.bin'),
+        'BLOG_SEARCH_FILE': os.path.join(workdir, 'missing-search.bin'),
+        'SUBMISSION_QUEUE_PATH': os.path.join(workdir, 'submissions.sqlite3'),
+        'SUBMISSION_DISPATCH': '0',
+        'RATELIMIT_ENABLED': '0',
+        'METRICS_ENABLED': '0',
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def http_get(port, url, headers):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        conn.request('GET', url, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status, response.getheader('Set-Cookie')
+    finally:
+        conn.close()
+
+
+def process_tree_rss(pid):
+    """Sum of peak RSS (VmHWM) in MB for ``pid`` and its children (Linux only)."""
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as file:
+            pids += [int(child) for child in file.read().split()]
+        total_kb = 0
+        for proc in pids:
+            with open(f'/proc/{proc}/status') as file:
+                for line in file:
+                    if line.startswith('VmHWM:'):
+                        total_kb += int(line.split()[1])
+        return total_kb / 1024
+    except OSError:
+        return None
+
+
+def run_gunicorn(corpus_dir, workdir, requests, count, workers, concurrency):
+    port = free_port()
+    env = dict(os.environ, **benchmark_env(corpus_dir, workdir))
+    # The stored baseline was taken without preloading; bench_gunicorn.py
+    # compares the profiles in gunicorn.conf.py
+    env.setdefault('GUNICORN_PROFILE', 'sync')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+         # Parsing a large corpus cold can outlast the default 30 s worker timeout
+         '--timeout', '600', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 120
+        while True:
+            try:
+                http_get(port, '/', {})
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+        cookie = http_get(port, '/login', {})[1]
+        headers = {'Cookie': cookie.split(';', 1)[0]} if cookie else {}
+
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+            for name, method, url, _ in requests:
+                if method != 'GET':
+                    continue
+                # Warm every worker before timing
+                statuses = list(pool.map(lambda _: http_get(port, url, headers)[0], range(workers * 2)))
+
+                def timed(_):
+                    began = time.perf_counter()
+                    http_get(port, url, headers)
+                    return (time.perf_counter() - began) * 1000
+
+                start = time.perf_counter()
+                timings = list(pool.map(timed, range(count)))
+                results[name] = dict(summarize(timings, time.perf_counter() - start), status=statuses[-1])
+        return results, process_tree_rss(server.pid)
+    finally:
+        server.terminate()
+        server.wait(30)
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """Return a list of human-readable regressions against ``baseline``."""
+    regressions = []
+    for mode, corpora in baseline.get('runs', {}).items():
+        for corpus, base in corpora.items():
+            run = results['runs'].get(mode, {}).get(corpus)
+            if not run:
+                regressions.append(f"{mode} {corpus} posts: not measured")
+                continue
+            for route, old in base['routes'].items():
+                stats = run['routes'].get(route)
+                if not stats:
+                    regressions.append(f"{mode} {corpus} posts {route}: not measured")
+                elif stats.get('status') != old.get('status'):
+                    regressions.append(
+                        f"{mode} {corpus} posts {route}: status {old.get('status')} -> {stats.get('status')}"
+                    )
+                elif stats['p50'] > old['p50'] * (1 + tolerance) and stats['p50'] - old['p50'] > min_delta:
+                    regressions.append(
+                        f"{mode} {corpus} posts {route}: p50 {old['p50']:.2f} -> {stats['p50']:.2f} ms"
+                    )
+            old_rss, rss = base.get('peak_rss_mb'), run.get('peak_rss_mb')
+            if old_rss and rss and rss > old_rss * (1 + tolerance):
+                regressions.append(f"{mode} {corpus} posts: peak RSS {old_rss:.0f} -> {rss:.0f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default='10,1000,10000', help='Comma-separated corpus sizes.')
+    parser.add_argument('--mode', default='testclient,gunicorn', help='testclient, gunicorn or both.')
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per route.')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers.')
+    parser.add_argument('--concurrency', type=int, default=4, help='Client threads for gunicorn.')
+    parser.add_argument('--output', default='bench_routes.json')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the baseline.')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='Allowed relative slowdown (1.0 = 2x).')
+    parser.add_argument('--min-delta', type=float, default=1.0, help='Ignore p50 changes below this many ms.')
+    args = parser.parse_args()
+
+    modes = list(MODES) if args.mode == 'both' else args.mode.split(',')
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown --mode {', '.join(unknown)}; use {', '.join(MODES)} or both")
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'requests': args.requests,
+            'workers': args.workers,
+            'concurrency': args.concurrency,
+        },
+        'runs': {mode: {} for mode in modes},
+    }
+    # Every corpus gets a fresh interpreter so imports and caches start cold
+    context = multiprocessing.get_context('spawn')
+    for size in [int(size) for size in args.corpus.split(',')]:
+        workdir = tempfile.mkdtemp(prefix='netrun-bench-')
+        corpus_dir = os.path.join(workdir, 'posts')
+        write_corpus(corpus_dir, size)
+        count = args.requests if 'testclient' in modes else 0
+        with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as pool:
+            requests, routes, rss = pool.submit(run_test_client, corpus_dir, workdir, count).result()
+        if 'testclient' in modes:
+            results['runs']['testclient'][str(size)] = {'routes': routes, 'peak_rss_mb': rss}
+        if 'gunicorn' in modes:
+            routes, rss = run_gunicorn(corpus_dir, workdir, requests, args.requests, args.workers, args.concurrency)
+            results['runs']['gunicorn'][str(size)] = {'routes': routes, 'peak_rss_mb': rss}
+
+    print(f"{'mode':<11}{'posts':>6}  {'route':<48}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}")
+    for mode, corpora in results['runs'].items():
+        for corpus, run in corpora.items():
+            for route, stats in run['routes'].items():
+                print(f"{mode:<11}{corpus:>6}  {route:<48}{stats['p50']:>9.2f}{stats['p95']:>9.2f}"
+                      f"{stats['p99']:>9.2f}{stats['rps']:>9.0f}")
+            rss = run['peak_rss_mb']
+            print(f"{mode:<11}{corpus:>6}  peak RSS {rss:.0f} MB" if rss else f"{mode:<11}{corpus:>6}  peak RSS n/a")
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=1, sort_keys=True)
+    print(f"Wrote {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+        print(f"Updated baseline {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print('No baseline to compare against; run with --update-baseline to store one.')
+        return
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline.get('meta', {}).get('cpus') != results['meta']['cpus']:
+        print(f"Warning: baseline was recorded on a machine with {baseline.get('meta', {}).get('cpus')} CPUs")
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    if regressions:
+        print(f"\nREGRESSIONS against {args.baseline}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Compare per-request latency of the session backends.
+
+Usage: python benchmarks/bench_sessions.py [--requests 2000]
+
+Each backend is exercised with a read-only request (an authenticated portal
+page) and a writing request (login), using Flask's test client so the
+numbers isolate session handling from network overhead.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from session_store import SESSION_BACKENDS, init_session_backend  # noqa: E402
+
+
+def measure(client, path, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.get(path)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'mean': statistics.fmean(timings),
+        'p50': timings[len(timings) // 2],
+        'p95': timings[int(len(timings) * 0.95)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='netrun-sessions-')
+    app.config['SESSION_SQLITE_PATH'] = os.path.join(workdir, 'sessions.sqlite3')
+    app.config['SESSION_FILE_DIR'] = os.path.join(workdir, 'flask_session')
+
+    print(f"{'backend':<12}{'route':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for backend in SESSION_BACKENDS:
+        app.config['SESSION_BACKEND'] = backend
+        init_session_backend(app)
+        client = app.test_client()
+        client.get('/login')
+        for label, path in (('read', '/portal/profile'), ('write', '/login')):
+            result = measure(client, path, args.requests)
+            print(f"{backend:<12}{label:<10}{result['mean']:>10.3f}{result['p50']:>10.3f}{result['p95']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Cold start cost: import time, app creation and time to first response.
+
+Usage: python benchmarks/bench_startup.py [--runs 10] [--url /] [--root PATH]
+
+Every run is a fresh interpreter, as for a new gunicorn worker or an Azure
+scale-out instance. It times ``import app``, building the app (via the
+module's ``app`` attribute, so older checkouts that create it at import
+time can be measured with ``--root``) and the first request through the
+test client. Medians are reported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+flask_app = module.app
+created = time.perf_counter()
+status = flask_app.test_client().get(sys.argv[1]).status_code
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'create': created - imported,
+    'first_request': served - created,
+    'total': served - start,
+    'modules': len(sys.modules),
+    'status': status,
+}))
+'''
+
+
+def run_once(root, url):
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, url], cwd=root, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--url', default='/')
+    parser.add_argument('--root', default=REPO_ROOT, help='Checkout to measure (default: this one).')
+    args = parser.parse_args()
+
+    # The first run compiles bytecode; later runs start like a deployed worker
+    run_once(args.root, args.url)
+    runs = [run_once(args.root, args.url) for _ in range(args.runs)]
+    if any(run['status'] != 200 for run in runs):
+        print(f"warning: {args.url} did not return 200")
+
+    print(f"{args.runs} runs of {args.url} in {args.root}")
+    print(f"{'phase':<16} {'median ms':>10} {'min ms':>10}")
+    for phase in ('import', 'create', 'first_request', 'total'):
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<16} {statistics.median(values):>10.1f} {min(values):>10.1f}")
+    print(f"{'modules loaded':<16} {statistics.median(run['modules'] for run in runs):>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Measure how long the request path spends queueing a form submission.
+
+Usage: python benchmarks/bench_submission_queue.py [--submissions 5000]
+
+Times SubmissionQueue.enqueue on its own and a full POST /contact through
+Flask's test client (CSRF, rate limits and dispatcher off), both against a fresh
+queue file in a temporary directory.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+from submission_queue import SubmissionQueue  # noqa: E402
+
+
+def summarize(timings):
+    timings.sort()
+    return {
+        'mean': statistics.fmean(timings),
+        'p50': timings[len(timings) // 2],
+        'p99': timings[int(len(timings) * 0.99)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--submissions', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='netrun-submissions-')
+    queue = SubmissionQueue(os.path.join(workdir, 'submissions.sqlite3'))
+    payload = {'name': 'Ada', 'email': 'ada@example.com', 'subject': 'Hello', 'message': 'x' * 500}
+
+    enqueue = []
+    for _ in range(args.submissions):
+        start = time.perf_counter()
+        queue.enqueue('contact', payload)
+        enqueue.append((time.perf_counter() - start) * 1000)
+
+    app = app_module.app
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['SUBMISSION_DISPATCH'] = False
+    app_module.limiter.enabled = False
+    app_module.submission_queue = queue
+    post = []
+    for _ in range(args.submissions // 5):
+        # A fresh client per post, so flashed messages don't pile up in the cookie
+        client = app.test_client()
+        start = time.perf_counter()
+        client.post('/contact', data=payload)
+        post.append((time.perf_counter() - start) * 1000)
+
+    print(f"{'operation':<16}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, timings in (('enqueue', enqueue), ('POST /contact', post)):
+        stats = summarize(timings)
+        print(f"{name:<16}{stats['mean']:>10.3f}{stats['p50']:>10.3f}{stats['p99']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""Full-text search over blog posts.
+
+``SearchIndex`` is a positional inverted index over each post's title,
+excerpt and Markdown body, ranked with BM25. Title and excerpt matches are
+weighted above body matches. Double-quoted phrases in a query only match
+posts where the words appear consecutively.
+
+Documents are keyed by the post's filename so the index can be updated one
+post at a time as posts are published. The index is saved to a single file
+that workers memory-map instead of rebuilding it on boot: a small header
+(document lengths and signatures, and where each term's postings start)
+followed by every term's pickled postings. A term is only decoded the
+first time a query or an update needs it, so loading reads the header
+alone and the rest of the file stays in the shared page cache.
+"""
+import heapq
+import math
+import mmap
+import os
+import pickle
+import re
+import struct
+from array import array
+from operator import itemgetter
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+PHRASE_RE = re.compile(r'"([^"]+)"')
+
+# Stripped before tokenizing so link targets and markup don't become terms
+MARKDOWN_NOISE_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)|<[^>]+>|[#*_`>~|-]+")
+
+FIELD_WEIGHTS = (('title', 3.0), ('excerpt', 2.0), ('body', 1.0))
+# Position gap between fields so phrases never span a field boundary
+FIELD_GAP = 1000
+
+SEARCH_ARTIFACT_MAGIC = b'NRSRCH1\n'
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has in is it of on or that the this to was with'.split()
+)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    """Positional inverted index with BM25 ranking."""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> {doc: (weighted term frequency, packed positions)}
+        self._postings = {}
+        # Terms not decoded yet: term -> (start, length) of their pickled
+        # postings in the loaded file's buffer
+        self._spans = {}
+        self._buffer = None
+        # doc -> {'length': weighted length, 'terms': [...], 'signature': ...};
+        # 'terms' is a (start, length) span until remove() first needs it
+        self.docs = {}
+        self._total_length = 0.0
+        # doc -> BM25 length normalisation, term -> {doc: BM25 score} and
+        # term -> [(doc, score)] best first; rebuilt lazily after changes
+        self._norms = None
+        self._impacts = {}
+        self._rankings = {}
+        # Version of the source last synced in, kept by the caller
+        self.generation = None
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, doc):
+        return doc in self.docs
+
+    def signature(self, doc):
+        entry = self.docs.get(doc)
+        return entry['signature'] if entry else None
+
+    def add(self, doc, title='', excerpt='', body='', signature=None):
+        """Index (or re-index) one document."""
+        self.remove(doc)
+        fields = {'title': title, 'excerpt': excerpt, 'body': MARKDOWN_NOISE_RE.sub(r' \1 ', body)}
+        terms = {}
+        length = 0.0
+        offset = 0
+        for field, weight in FIELD_WEIGHTS:
+            tokens = tokenize(fields[field])
+            for position, token in enumerate(tokens, start=offset):
+                entry = terms.setdefault(token, [0.0, []])
+                entry[0] += weight
+                entry[1].append(position)
+            length += weight * len(tokens)
+            offset += len(tokens) + FIELD_GAP
+        for token, (frequency, positions) in terms.items():
+            postings = self._term(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+            postings[doc] = (frequency, array('I', positions).tobytes())
+        self.docs[doc] = {'length': length, 'terms': list(terms), 'signature': signature}
+        self._total_length += length
+        self._invalidate()
+
+    def remove(self, doc):
+        entry = self.docs.pop(doc, None)
+        if entry is None:
+            return
+        self._total_length -= entry['length']
+        terms = entry['terms']
+        if isinstance(terms, tuple):
+            terms = self._decode(terms)
+        for token in terms:
+            postings = self._term(token)
+            if postings is not None:
+                postings.pop(doc, None)
+                if not postings:
+                    del self._postings[token]
+        self._invalidate()
+
+    def _invalidate(self):
+        self._norms = None
+        self._impacts = {}
+        self._rankings = {}
+
+    def _decode(self, span):
+        start, length = span
+        return pickle.loads(self._buffer[start:start + length])
+
+    def _term(self, term):
+        postings = self._postings.get(term)
+        if postings is None and term in self._spans:
+            postings = self._postings[term] = self._decode(self._spans.pop(term))
+        return postings
+
+    def search(self, query, limit=20):
+        """Return up to ``limit`` ``(doc, score)`` pairs, best match first."""
+        phrases = [tokenize(phrase) for phrase in PHRASE_RE.findall(query)]
+        phrases = [phrase for phrase in phrases if len(phrase) > 1]
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.docs:
+            return []
+
+        matched = [term for term in terms if self._term_impacts(term)]
+        if not matched:
+            return []
+        if len(matched) == 1 and not phrases:
+            return self._ranked(matched[0])[:limit]
+        if not phrases:
+            return self._top(matched, limit)
+        if any(term not in matched for phrase in phrases for term in phrase):
+            return []
+
+        # Phrase checks need positions, so they only run on posts that score
+        # high enough to enter the results
+        return self._top(matched, limit, lambda doc: all(self._has_phrase(doc, phrase) for phrase in phrases))
+
+    def _top(self, terms, limit, accept=None):
+        """The ``limit`` best ``(doc, score)`` pairs by summed BM25 score.
+
+        Walks every term's postings best score first, in step, and adds up
+        each newly seen post's full score (Fagin's threshold algorithm).
+        It stops once the ``limit``-th best total reaches the sum of the
+        scores at the current depth, the most any unseen post could still
+        have, so common terms are rarely walked to the end. ``accept`` is
+        only asked about posts that would make the results.
+        """
+        rankings = [self._ranked(term) for term in terms]
+        impacts = [self._term_impacts(term) for term in terms]
+        seen = set()
+        heap = []
+        for depth in range(max(map(len, rankings))):
+            threshold = 0.0
+            for ranked in rankings:
+                if depth >= len(ranked):
+                    continue
+                doc, score = ranked[depth]
+                threshold += score
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                total = sum(impact.get(doc, 0.0) for impact in impacts)
+                if len(heap) == limit and total <= heap[0][0]:
+                    continue
+                if accept is not None and not accept(doc):
+                    continue
+                if len(heap) < limit:
+                    heapq.heappush(heap, (total, doc))
+                else:
+                    heapq.heapreplace(heap, (total, doc))
+            if len(heap) == limit and heap[0][0] >= threshold:
+                break
+        return [(doc, score) for score, doc in sorted(heap, reverse=True)]
+
+    def _term_impacts(self, term):
+        """BM25 contribution of ``term`` to each document that contains it."""
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            postings = self._term(term)
+            if not postings:
+                return None
+            norms = self._length_norms()
+            count = len(self.docs)
+            factor = (self.k1 + 1) * math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            impacts = self._impacts[term] = {
+                doc: factor * frequency / (frequency + norms[doc])
+                for doc, (frequency, _) in postings.items()
+            }
+        return impacts
+
+    def _ranked(self, term):
+        """All documents containing ``term``, best BM25 score first."""
+        ranked = self._rankings.get(term)
+        if ranked is None:
+            ranked = self._rankings[term] = sorted(
+                self._term_impacts(term).items(), key=itemgetter(1), reverse=True
+            )
+        return ranked
+
+    def _length_norms(self):
+        if self._norms is None:
+            average = self._total_length / len(self.docs) or 1.0
+            k1, b = self.k1, self.b
+            self._norms = {
+                doc: k1 * (1 - b + b * entry['length'] / average)
+                for doc, entry in self.docs.items()
+            }
+        return self._norms
+
+    def positions(self, term, doc):
+        """Token positions of ``term`` in ``doc`` (fields are FIELD_GAP apart)."""
+        positions = array('I')
+        positions.frombytes(self._term(term)[doc][1])
+        return positions
+
+    def _has_phrase(self, doc, phrase):
+        if any(doc not in self._term(term) for term in phrase):
+            return False
+        starts = set(self.positions(phrase[0], doc))
+        for offset, term in enumerate(phrase[1:], start=1):
+            starts.intersection_update(position - offset for position in self.positions(term, doc))
+            if not starts:
+                return False
+        return True
+
+    def dumps(self):
+        body = bytearray()
+
+        def append(value, span=None):
+            data = self._buffer[span[0]:span[0] + span[1]] if span else pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            body.extend(data)
+            return (len(body) - len(data), len(data))
+
+        spans = {term: append(None, span) for term, span in self._spans.items()}
+        spans.update((term, append(postings)) for term, postings in self._postings.items())
+        docs = {}
+        for doc, entry in self.docs.items():
+            terms = entry['terms']
+            terms = append(None, terms) if isinstance(terms, tuple) else append(terms)
+            docs[doc] = dict(entry, terms=terms)
+        header = pickle.dumps({'docs': docs, 'spans': spans}, pickle.HIGHEST_PROTOCOL)
+        return b''.join([SEARCH_ARTIFACT_MAGIC, struct.pack('>I', len(header)), header, body])
+
+    @classmethod
+    def loads(cls, data):
+        """Open a saved index from ``data``, a bytes object or an mmap."""
+        if data[:len(SEARCH_ARTIFACT_MAGIC)] != SEARCH_ARTIFACT_MAGIC:
+            raise ValueError('not a search index artifact')
+        offset = len(SEARCH_ARTIFACT_MAGIC)
+        (header_length,) = struct.unpack_from('>I', data, offset)
+        offset += 4
+        header = pickle.loads(data[offset:offset + header_length])
+        body_start = offset + header_length
+
+        index = cls()
+        index._buffer = data
+        index._spans = {term: (body_start + start, length) for term, (start, length) in header['spans'].items()}
+        index.docs = header['docs']
+        for entry in index.docs.values():
+            start, length = entry['terms']
+            entry['terms'] = (body_start + start, length)
+        index._total_length = sum(entry['length'] for entry in index.docs.values())
+        return index
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(self.dumps())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            return cls.loads(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
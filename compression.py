@@ -0,0 +1,166 @@
+"""Compression for dynamic responses.
+
+:class:`CompressionMiddleware` wraps the WSGI app and compresses text
+responses with Brotli (when installed) or gzip, whichever the client
+prefers in ``Accept-Encoding``. Responses that are small, already encoded,
+partial, streamed (no ``Content-Length``), answers to ``HEAD`` or marked
+``no-transform`` pass through untouched. HTML can optionally be minified
+before it is compressed.
+
+Transformed bodies are kept in a small LRU keyed by the response's ETag, so
+pages served from the page cache are minified and compressed once per
+encoding, not on every request. The encoding is appended to the ETag
+(``"abc-br"``) and stripped from ``If-None-Match`` on the way in, so the
+app's own conditional handling keeps answering 304s.
+"""
+import gzip
+import threading
+from collections import OrderedDict
+from itertools import chain
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+from asset_pipeline import minify_html
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml',
+    'application/rss+xml', 'application/atom+xml', 'image/svg+xml',
+})
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=5):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size=500, minify=False, gzip_level=6, brotli_quality=5,
+                 cache_size=256):
+        self.app = app
+        self.min_size = min_size
+        self.minify = minify
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_size = cache_size
+        # Preferred first when the client rates both the same
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def negotiate(self, environ):
+        header = environ.get('HTTP_ACCEPT_ENCODING')
+        if not header:
+            return None
+        return parse_accept_header(header).best_match(self.encodings)
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ)
+        if encoding is None and not self.minify:
+            return self.app(environ, start_response)
+
+        suffix = f'-{encoding}"' if encoding else None
+        # A suffixed validator means the client holds the compressed 200, so
+        # only then does a 304 carry the suffix back; small or excluded
+        # responses were sent with the app's own ETag.
+        suffixed = bool(suffix) and suffix in environ.get('HTTP_IF_NONE_MATCH', '')
+        if suffixed:
+            environ['HTTP_IF_NONE_MATCH'] = environ['HTTP_IF_NONE_MATCH'].replace(suffix, '"')
+
+        captured = []
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        app_iter = self.app(environ, capture)
+        status, headers, exc_info = captured
+        headers = Headers(headers)
+        if not self.eligible(environ, status, headers, encoding):
+            etag = headers.get('ETag')
+            if suffixed and status.startswith('304') and etag and etag.endswith('"'):
+                headers['ETag'] = etag[:-1] + suffix
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return chain(written, app_iter) if written else app_iter
+
+        try:
+            body = b''.join(chain(written, app_iter))
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        etag = headers.get('ETag')
+        key = (etag, encoding) if etag and not etag.startswith('W/') else None
+        body, applied = self.transform(key, body, headers.get('Content-Type', ''), encoding)
+        if applied:
+            headers['Content-Encoding'] = applied
+            if etag and etag.endswith('"'):
+                headers['ETag'] = etag[:-1] + suffix
+        headers['Content-Length'] = str(len(body))
+        vary = headers.get('Vary')
+        if encoding and 'accept-encoding' not in (vary or '').lower():
+            headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [body]
+
+    def eligible(self, environ, status, headers, encoding):
+        mimetype = headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if encoding is None and not (self.minify and mimetype == 'text/html'):
+            return False
+        code = int(status[:3])
+        length = headers.get('Content-Length')
+        return (
+            200 <= code < 300 and code not in (204, 206)
+            and environ.get('REQUEST_METHOD') != 'HEAD'
+            and mimetype in COMPRESSIBLE_TYPES
+            and 'Content-Encoding' not in headers
+            and 'no-transform' not in headers.get('Cache-Control', '')
+            and length is not None and length.isdigit() and int(length) >= self.min_size
+        )
+
+    def transform(self, key, body, content_type, encoding):
+        """Minify and compress ``body``, or reuse the result for ``key``.
+
+        Returns ``(body, applied encoding or None)``.
+        """
+        if key is not None:
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return entry
+        self.misses += 1
+
+        if self.minify and content_type.startswith('text/html'):
+            try:
+                body = minify_html(body.decode('utf-8')).encode('utf-8')
+            except UnicodeDecodeError:
+                pass
+        entry = (body, None)
+        if encoding:
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            if len(compressed) < len(body):
+                entry = (compressed, encoding)
+
+        if key is not None:
+            with self._lock:
+                self._cache[key] = entry
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
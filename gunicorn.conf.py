@@ -0,0 +1,60 @@
+"""Gunicorn settings, loaded automatically by ``gunicorn app:app``.
+
+``GUNICORN_PROFILE`` picks one of three setups:
+
+- ``preload`` (default): the app is imported in the master and
+  :func:`app.warm_caches` compiles every template and indexes every blog
+  post before the sync workers are forked, so they share that memory
+  copy-on-write. ``gc.freeze()`` keeps the garbage collector from touching
+  (and so copying) the warmed objects in each worker.
+- ``gthread``: the same preloading, with fewer processes running
+  ``GUNICORN_THREADS`` threads each. Suited to the I/O-bound form and
+  portal routes, which mostly wait on SQLite and session storage.
+- ``sync``: no preloading; every worker imports the app and warms up on its
+  own first requests, as before.
+
+``WEB_CONCURRENCY`` overrides the worker count and ``GUNICORN_WARM_CONTENT=1``
+also renders every post body into the shared Markdown cache in the master. Measured numbers for each
+profile are in the README (``benchmarks/bench_gunicorn.py``).
+"""
+import gc
+import multiprocessing
+import os
+
+PROFILE = os.environ.get('GUNICORN_PROFILE', 'preload')
+if PROFILE not in ('preload', 'gthread', 'sync'):
+    raise ValueError(f"Unknown GUNICORN_PROFILE {PROFILE!r}; expected preload, gthread or sync")
+
+cpus = multiprocessing.cpu_count()
+preload_app = PROFILE != 'sync'
+if PROFILE == 'gthread':
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus + 1))
+else:
+    worker_class = 'sync'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus * 2 + 1))
+
+# Preloaded workers start warm, so gunicorn's 30 second default applies and
+# a hung request frees its worker quickly. Unpreloaded sync workers parse
+# the blog on their first request, which can take minutes on a large
+# archive, so they get Azure App Service's 600 seconds.
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30 if preload_app else 600))
+
+
+def when_ready(server):
+    """Runs in the master once the app is loaded, before any worker forks."""
+    if not preload_app:
+        return
+    import app
+    templates, posts = app.warm_caches(content=os.environ.get('GUNICORN_WARM_CONTENT', '0') == '1')
+    server.log.info(f"Warmed {templates} templates and {posts} blog posts before forking")
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Runs in each worker once the app is loaded, preloaded or not."""
+    import app
+    # Send any backlog or due retries now rather than on the next form post;
+    # the master never starts the thread, since it would not survive fork()
+    app.start_submission_dispatcher()
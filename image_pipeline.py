@@ -0,0 +1,179 @@
+"""Responsive image derivatives for static/images.
+
+Every PNG/JPEG under ``static/images`` is resized to a set of widths and
+saved as WebP, plus AVIF when the installed Pillow supports it. The
+derivatives and a ``manifest.json`` go to ``static/images/derived``. The
+app reads the manifest to emit ``<picture>``/``srcset`` markup.
+
+Sources are processed in parallel across a process pool. Each source is
+keyed by its content hash and the output settings, so unchanged images are
+skipped on later runs. Pillow is only imported to build; the app just reads
+the manifest.
+
+Usage: python image_pipeline.py [--jobs N] [--force]
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import time
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+SOURCE_DIR = 'images'
+OUTPUT_DIR = 'images/derived'
+MANIFEST_NAME = 'manifest.json'
+
+WIDTHS = (320, 640, 960, 1280, 1920)
+SOURCE_SUFFIXES = ('.png', '.jpg', '.jpeg')
+QUALITY = {'webp': 80, 'avif': 60}
+
+logger = logging.getLogger(__name__)
+
+
+def output_formats():
+    """AVIF first (smallest), then WebP; AVIF only if Pillow was built with it."""
+    from PIL import features
+    formats = ['webp']
+    # Pillow before 11.2 has no AVIF module, and features.check() warns about
+    # unknown names, so only ask once the module is known.
+    if 'avif' in features.modules and features.check_module('avif'):
+        formats.insert(0, 'avif')
+    return formats
+
+
+def find_sources(static_dir):
+    """Yield source image paths relative to ``static_dir``, skipping outputs."""
+    root = os.path.join(static_dir, SOURCE_DIR)
+    output = os.path.join(static_dir, OUTPUT_DIR)
+    for directory, subdirs, files in os.walk(root):
+        if os.path.abspath(directory).startswith(os.path.abspath(output)):
+            subdirs[:] = []
+            continue
+        for name in sorted(files):
+            if name.lower().endswith(SOURCE_SUFFIXES):
+                path = os.path.relpath(os.path.join(directory, name), static_dir)
+                yield path.replace(os.sep, '/')
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_key(widths, formats):
+    return json.dumps({'widths': list(widths), 'formats': formats, 'quality': QUALITY}, sort_keys=True)
+
+
+def derivative_name(source, width, fmt):
+    stem = os.path.splitext(os.path.relpath(source, SOURCE_DIR))[0].replace(' ', '_')
+    return f"{OUTPUT_DIR}/{stem}-{width}.{fmt}"
+
+
+def process_image(static_dir, source, widths, formats):
+    """Write all derivatives for one source image. Runs in a worker process."""
+    from PIL import Image
+    start = time.perf_counter()
+    with Image.open(os.path.join(static_dir, source)) as image:
+        image.load()
+        original_width, original_height = image.size
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+        # Never upscale; the largest variant is the original width
+        targets = sorted({width for width in widths if width < original_width} | {min(original_width, max(widths))})
+        variants = {fmt: [] for fmt in formats}
+        for width in targets:
+            height = round(original_height * width / original_width)
+            resized = image if width == original_width else image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                name = derivative_name(source, width, fmt)
+                path = os.path.join(static_dir, *name.split('/'))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                resized.save(path, fmt.upper(), quality=QUALITY[fmt])
+                variants[fmt].append([width, name])
+    return {
+        'width': original_width,
+        'height': original_height,
+        'variants': variants,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def build_images(static_dir=STATIC_DIR, jobs=None, force=False, widths=WIDTHS):
+    """Generate derivatives for every changed source.
+
+    Returns ``(manifest, rebuilt)`` where ``rebuilt`` lists the sources that
+    were processed this run. Files Pillow cannot read are logged as warnings
+    and left out of the manifest.
+    """
+    if importlib.util.find_spec('PIL') is None:
+        raise RuntimeError('Pillow is required to build image derivatives')
+    from concurrent.futures import ProcessPoolExecutor
+    formats = output_formats()
+    settings = settings_key(widths, formats)
+    manifest_path = os.path.join(static_dir, OUTPUT_DIR, MANIFEST_NAME)
+    previous = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as file:
+            previous = json.load(file)
+
+    manifest = {}
+    pending = {}
+    rebuilt = []
+    for source in find_sources(static_dir):
+        digest = file_digest(os.path.join(static_dir, source))
+        entry = previous.get(source)
+        if (entry and entry.get('sha256') == digest and entry.get('settings') == settings
+                and all(os.path.exists(os.path.join(static_dir, *name.split('/')))
+                        for variants in entry['variants'].values() for _, name in variants)):
+            manifest[source] = entry
+            continue
+        pending[source] = digest
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            source: pool.submit(process_image, static_dir, source, widths, formats)
+            for source in pending
+        }
+        for source, future in futures.items():
+            try:
+                entry = future.result()
+            except Exception as e:  # Unreadable or placeholder files are skipped
+                logger.warning(f"Skipped {source}: {str(e)}")
+                continue
+            entry['sha256'] = pending[source]
+            entry['settings'] = settings
+            manifest[source] = entry
+            rebuilt.append(source)
+            logger.info(f"Built {source} in {entry['seconds']:.2f}s")
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    return manifest, rebuilt
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    path = os.path.join(static_dir, OUTPUT_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate responsive image derivatives.')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count).')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if sources are unchanged.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    manifest, rebuilt = build_images(jobs=args.jobs, force=args.force)
+    print(f"{len(rebuilt)} rebuilt, {len(manifest) - len(rebuilt)} unchanged")
+
+
+if __name__ == '__main__':
+    main()
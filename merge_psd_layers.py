@@ -1,20 +1,239 @@
-from PIL import Image
+"""Composite image layers into banners.
+
+Compositions are described in a JSON manifest (``compositions.json`` by
+default). Paths are relative to the manifest and layers are listed from
+bottom to top::
+
+    {
+      "compositions": [
+        {
+          "output": "static/images/psd_layers/merged_2_3",
+          "formats": ["png", "webp"],
+          "size": [244, 238],
+          "layers": [
+            {"path": "static/images/psd_layers/layer_3_Inserted Image.png", "offset": [0, 0]},
+            {"psd": "static/images/NS_BANNER01_DEMO.psd", "layer": "Layer 4"}
+          ]
+        }
+      ]
+    }
+
+``size`` defaults to the bounding box of all layers. A PSD layer can be
+picked by its index (0 is the bottom layer, matching the ``layer_N_*.png``
+exports) or by name. It is placed at its position in the PSD unless an
+``offset`` is given.
+
+Compositions run in parallel across a process pool. An output is skipped
+when the manifest entry and the content of every input are unchanged since
+the last run. Layers are opened one at a time and alpha-composited onto the
+canvas in tiles, so memory peaks at the canvas, one decoded layer and one
+tile, however many layers a composition has.
+
+Usage: python merge_psd_layers.py [manifest] [--jobs N] [--force] [--tile-size PX]
+"""
+import argparse
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'compositions.json')
+CACHE_NAME = '.compositions-cache.json'
+TILE_SIZE = 512
+
+
+def load_compositions(manifest_path):
+    """Read the manifest, resolving every path relative to it.
+
+    Each composition keeps its manifest entry as ``spec`` and its relative
+    output as ``name``, so cache keys do not depend on where the checkout is.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path) as file:
+        compositions = json.load(file)['compositions']
+    for composition in compositions:
+        composition['spec'] = json.dumps(composition, sort_keys=True)
+        composition['name'] = composition['output']
+        composition['output'] = os.path.join(base, composition['output'])
+        composition.setdefault('formats', ['png'])
+        for layer in composition['layers']:
+            for key in ('path', 'psd'):
+                if key in layer:
+                    layer[key] = os.path.join(base, layer[key])
+    return compositions
+
+
+def output_paths(composition):
+    return [f"{composition['output']}.{fmt}" for fmt in composition['formats']]
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def composition_key(composition):
+    """Hash of the manifest entry plus the content of every input file."""
+    digest = hashlib.sha256(composition['spec'].encode())
+    for layer in composition['layers']:
+        digest.update(file_digest(layer.get('path') or layer['psd']).encode())
+    return digest.hexdigest()
+
+
+def open_layer(layer, load=True):
+    """Open one layer and return ``(image, offset)``.
+
+    A PSD layer that Pillow cannot decode (text and some adjustment layers)
+    raises ValueError naming the file and layer, so the composition fails
+    with a useful message rather than Pillow's bare OSError.
+    """
+    if 'path' in layer:
+        return Image.open(layer['path']), tuple(layer.get('offset', (0, 0)))
+    image = Image.open(layer['psd'])
+    index = layer['layer']
+    name = index
+    try:
+        if isinstance(index, str):
+            index = [entry[0] for entry in image.layers].index(index)
+        name = image.layers[index][0]
+        # PSD frames are 1-based and seeking to the current frame is a
+        # no-op, so step off frame 1 first to load the bottom layer's tiles.
+        # With a single layer there is nowhere to step to.
+        if index == 0 and image.n_frames > 1:
+            image.seek(2)
+        image.seek(index + 1)
+        if load:
+            image.load()
+    except (ValueError, IndexError, EOFError, OSError) as e:
+        image.close()
+        raise ValueError(f"{os.path.basename(layer['psd'])}: cannot load layer {index} ({name!r}): {e}") from e
+    # Pillow sizes the frame to the layer's bounding box
+    bbox = image.layers[index][2]
+    return image, tuple(layer.get('offset', bbox[:2]))
+
+
+def canvas_size(composition):
+    if composition.get('size'):
+        return tuple(composition['size'])
+    width = height = 0
+    for layer in composition['layers']:
+        image, (x, y) = open_layer(layer, load=False)
+        with image:
+            width = max(width, x + image.width)
+            height = max(height, y + image.height)
+    return width, height
+
+
+def composite_layer(canvas, layer, offset, tile_size=TILE_SIZE):
+    """Alpha-composite ``layer`` onto ``canvas`` at ``offset``, one tile at a time."""
+    x, y = offset
+    left, top = max(0, -x), max(0, -y)
+    right = min(layer.width, canvas.width - x)
+    bottom = min(layer.height, canvas.height - y)
+    for tile_top in range(top, bottom, tile_size):
+        for tile_left in range(left, right, tile_size):
+            box = (tile_left, tile_top, min(tile_left + tile_size, right), min(tile_top + tile_size, bottom))
+            tile = layer.crop(box)
+            if tile.mode != 'RGBA':
+                tile = tile.convert('RGBA')
+            canvas.alpha_composite(tile, (x + tile_left, y + tile_top))
+
+
+def run_composition(composition, tile_size=TILE_SIZE):
+    """Build one composition and save every output format. Runs in a worker."""
+    timings = {}
+    start = time.perf_counter()
+    canvas = Image.new('RGBA', canvas_size(composition), (0, 0, 0, 0))
+    for layer in composition['layers']:
+        image, offset = open_layer(layer)
+        with image:
+            composite_layer(canvas, image, offset, tile_size)
+    timings['composite'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for path in output_paths(composition):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image = canvas
+        if path.lower().endswith(('.jpg', '.jpeg')):
+            image = canvas.convert('RGB')
+        image.save(path)
+    timings['save'] = time.perf_counter() - start
+    return timings
+
+
+def load_cache(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def run_batch(manifest_path, jobs=None, force=False, tile_size=TILE_SIZE):
+    """Run every changed composition in the manifest.
+
+    Returns one ``(output, status, timings)`` tuple per composition, where
+    status is ``built``, ``skipped`` or ``failed: <error>`` and ``output`` is
+    the path given in the manifest.
+    """
+    compositions = load_compositions(manifest_path)
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(manifest_path)), CACHE_NAME)
+    cache = {} if force else load_cache(cache_path)
+
+    results = []
+    pending = {}
+    for composition in compositions:
+        key = composition_key(composition)
+        output = composition['name']
+        if cache.get(output) == key and all(os.path.exists(path) for path in output_paths(composition)):
+            results.append((output, 'skipped', {}))
+        else:
+            pending[output] = (composition, key)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(run_composition, composition, tile_size): output
+                for output, (composition, _) in pending.items()
+            }
+            for future in as_completed(futures):
+                output = futures[future]
+                try:
+                    timings = future.result()
+                except Exception as e:
+                    results.append((output, f'failed: {e}', {}))
+                    cache.pop(output, None)
+                    continue
+                cache[output] = pending[output][1]
+                results.append((output, 'built', timings))
+
+    with open(cache_path, 'w') as file:
+        json.dump(cache, file, indent=1, sort_keys=True)
+    return results
 
-layer2_path = 'static/images/psd_layers/layer_2_Inserted Image.png'
-layer3_path = 'static/images/psd_layers/layer_3_Inserted Image.png'
-output_path = 'static/images/psd_layers/merged_2_3.png'
 
-layer2 = Image.open(layer2_path).convert('RGBA')
-layer3 = Image.open(layer3_path).convert('RGBA')
+def main():
+    parser = argparse.ArgumentParser(description='Composite image layers described in a manifest.')
+    parser.add_argument('manifest', nargs='?', default=DEFAULT_MANIFEST, help='Compositions manifest (JSON).')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: CPU count).')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if inputs are unchanged.')
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE, help='Tile edge in pixels.')
+    args = parser.parse_args()
 
-# Ensure both images are the same size (use the larger size)
-width = max(layer2.width, layer3.width)
-height = max(layer2.height, layer3.height)
+    start = time.perf_counter()
+    results = run_batch(args.manifest, jobs=args.jobs, force=args.force, tile_size=args.tile_size)
+    print(f"{'output':<40} {'status':<10} {'composite':>10} {'save':>8}")
+    for output, status, timings in results:
+        composite = f"{timings['composite'] * 1000:.0f}ms" if timings else '-'
+        save = f"{timings['save'] * 1000:.0f}ms" if timings else '-'
+        print(f"{output:<40} {status:<10} {composite:>10} {save:>8}")
+    print(f"{len(results)} compositions in {time.perf_counter() - start:.2f}s")
 
-base = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-base.paste(layer3, (0, 0), layer3)
-base.paste(layer2, (0, 0), layer2)
 
-base.save(output_path)
-print(f'Merged image saved to {output_path}') 
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Cached Markdown rendering for blog posts.
+
+:class:`MarkdownRenderer` keys every render by a hash of the Markdown source
+and the converter settings (extensions, their configs and the Markdown
+version). Lookups go through an in-process LRU first and then, if a
+``path`` is given, a SQLite file shared by every worker on the instance, so
+a post rendered by one gunicorn worker is reused by the others and after
+restarts.
+
+Misses are rendered with one ``markdown.Markdown`` instance per thread,
+reset between documents instead of rebuilt for every call. Converters keep
+per-document state, so they are never shared between threads. The
+``markdown`` package is only imported once something needs rendering.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class MarkdownRenderer:
+    def __init__(self, extensions=(), extension_configs=None, maxsize=256, path=None,
+                 max_entries=5000, logger=None):
+        self.extensions = list(extensions)
+        self.extension_configs = dict(extension_configs or {})
+        self.maxsize = maxsize
+        self.path = path
+        self.max_entries = max_entries
+        self.logger = logger
+        self._settings = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._inserts = 0
+
+    def _connect(self):
+        # One connection per thread and per process, as in session_store.
+        # The file and table are created on first use, not at import.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._create_table(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_table(self, conn):
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS renders (key TEXT PRIMARY KEY, html TEXT NOT NULL, created REAL NOT NULL)'
+        )
+
+    @property
+    def settings(self):
+        if self._settings is None:
+            import markdown
+            self._settings = json.dumps(
+                {'extensions': self.extensions, 'configs': self.extension_configs, 'version': markdown.__version__},
+                sort_keys=True,
+            )
+        return self._settings
+
+    def converter(self):
+        """This thread's ``markdown.Markdown`` instance."""
+        md = getattr(self._local, 'md', None)
+        if md is None:
+            import markdown
+            md = self._local.md = markdown.Markdown(
+                extensions=self.extensions, extension_configs=self.extension_configs,
+            )
+        return md
+
+    def key(self, text):
+        digest = hashlib.sha256(self.settings.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def render(self, text):
+        key = self.key(text)
+        with self._lock:
+            html = self._lru.get(key)
+            if html is not None:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return html
+
+        html = self._load(key)
+        if html is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            html = self.converter().reset().convert(text)
+            self._store(key, html)
+
+        with self._lock:
+            self._lru[key] = html
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return html
+
+    def _load(self, key):
+        if not self.path:
+            return None
+        try:
+            row = self._connect().execute('SELECT html FROM renders WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            self._log_error(f"Error reading Markdown cache: {str(e)}")
+            return None
+        return row[0] if row else None
+
+    def _store(self, key, html):
+        if not self.path:
+            return
+        try:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO renders (key, html, created) VALUES (?, ?, ?)',
+                         (key, html, time.time()))
+            self._inserts += 1
+            if self._inserts % 100 == 0:
+                self.prune()
+        except sqlite3.Error as e:
+            self._log_error(f"Error writing Markdown cache: {str(e)}")
+
+    def prune(self):
+        """Drop the oldest stored renders beyond ``max_entries``."""
+        if not self.path:
+            return 0
+        return self._connect().execute(
+            'DELETE FROM renders WHERE key IN '
+            '(SELECT key FROM renders ORDER BY created DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,),
+        ).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+        if self.path:
+            self._connect().execute('DELETE FROM renders')
+
+    def stats(self):
+        stored = self._connect().execute('SELECT COUNT(*) FROM renders').fetchone()[0] if self.path else 0
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'cached': len(self._lru),
+            'stored': stored,
+        }
+
+    def _log_error(self, message):
+        if self.logger is not None:
+            self.logger.error(message)
@@ -0,0 +1,215 @@
+"""Per-endpoint request timing.
+
+:class:`RequestMetrics` records how long each request takes, labelled by
+endpoint, and how much of that went to rendering templates, parsing blog
+posts, converting Markdown and session I/O. The numbers are exposed at
+``/metrics`` in the Prometheus text format and, optionally, recorded as
+OpenTelemetry histograms for whatever exporter is configured (for example
+Azure Monitor).
+
+Nothing is hooked into the app until :meth:`RequestMetrics.init_app` runs.
+Until then, functions wrapped with :meth:`RequestMetrics.timed` cost one
+attribute check per call.
+
+Each gunicorn worker keeps its own numbers, so a scrape sees the worker
+that answered it.
+"""
+import bisect
+import threading
+import time
+from functools import wraps
+
+from flask import Response, before_render_template, request, template_rendered
+from flask.sessions import SessionInterface
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PHASES = ('template', 'blog_parse', 'markdown', 'session')
+# Time spent outside a request, e.g. parsing posts while warming the index
+BACKGROUND = '(background)'
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class TimedSessionInterface(SessionInterface):
+    """Wraps a session interface and records open/save time as ``session``."""
+
+    def __init__(self, interface, metrics):
+        self.interface = interface
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self.interface, name)
+
+    def open_session(self, app, request):
+        start = time.perf_counter()
+        try:
+            return self.interface.open_session(app, request)
+        finally:
+            self.metrics.add('session', time.perf_counter() - start)
+
+    def save_session(self, app, session, response):
+        start = time.perf_counter()
+        try:
+            return self.interface.save_session(app, session, response)
+        finally:
+            self.metrics.add('session', time.perf_counter() - start)
+
+
+class RequestMetrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='netrun'):
+        self.enabled = False
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # endpoint -> Histogram for whole requests,
+        # (endpoint, phase) -> Histogram for phases
+        self._requests = {}
+        self._phases = {}
+        self._otel_histogram = None
+
+    def init_app(self, app, otel=False):
+        """Start recording for ``app`` and register ``/metrics``."""
+        self.enabled = True
+        # Run first, so requests rejected by other hooks are still timed
+        app.before_request_funcs.setdefault(None, []).insert(0, self._start_request)
+        app.teardown_request(self._finish_request)
+        before_render_template.connect(self._start_template, app)
+        template_rendered.connect(self._finish_template, app)
+        self.wrap_session_interface(app)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        if otel:
+            from opentelemetry import metrics as otel_metrics
+            meter = otel_metrics.get_meter(__name__)
+            self._otel_histogram = meter.create_histogram(
+                f'{self.prefix}.phase.duration', unit='s',
+                description='Request and per-phase durations by endpoint',
+            )
+
+    def wrap_session_interface(self, app):
+        """Time the real session backend (inside the lazy wrapper, if any)."""
+        interface = app.session_interface
+        if isinstance(interface, TimedSessionInterface):
+            return
+        inner = getattr(interface, 'interface', None)
+        if inner is not None and not isinstance(inner, TimedSessionInterface):
+            interface.interface = TimedSessionInterface(inner, self)
+        elif inner is None:
+            app.session_interface = TimedSessionInterface(interface, self)
+
+    def timed(self, phase):
+        """Decorator that adds the call's duration to ``phase``."""
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    self.add(phase, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def add(self, phase, seconds):
+        """Charge ``seconds`` of ``phase`` to the current request."""
+        phases = getattr(self._local, 'phases', None)
+        if phases is None:
+            self.observe(BACKGROUND, phase, seconds)
+        else:
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def _start_request(self):
+        self._local.start = time.perf_counter()
+        self._local.phases = {}
+
+    def _finish_request(self, exc):
+        start = getattr(self._local, 'start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        phases = self._local.phases
+        self._local.start = self._local.phases = None
+        endpoint = request.endpoint or '(unmatched)'
+        self.observe(endpoint, None, elapsed)
+        for phase, seconds in phases.items():
+            self.observe(endpoint, phase, seconds)
+
+    def _start_template(self, sender, template, context, **extra):
+        self._local.template_start = time.perf_counter()
+
+    def _finish_template(self, sender, template, context, **extra):
+        start = getattr(self._local, 'template_start', None)
+        if start is not None:
+            self._local.template_start = None
+            self.add('template', time.perf_counter() - start)
+
+    def observe(self, endpoint, phase, seconds):
+        """Add one observation to the histogram for ``endpoint``/``phase``."""
+        table, key = (self._requests, endpoint) if phase is None else (self._phases, (endpoint, phase))
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = table.get(key)
+            if histogram is None:
+                histogram = table[key] = Histogram(len(self.buckets) + 1)
+            histogram.counts[index] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+        if self._otel_histogram is not None:
+            self._otel_histogram.record(seconds, {'endpoint': endpoint, 'phase': phase or 'request'})
+
+    def snapshot(self, endpoint, phase=None):
+        """``(count, sum)`` recorded so far, mostly for tests."""
+        table, key = (self._requests, endpoint) if phase is None else (self._phases, (endpoint, phase))
+        histogram = table.get(key)
+        return (histogram.count, histogram.sum) if histogram else (0, 0.0)
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._phases.clear()
+
+    def render(self):
+        """All histograms in the Prometheus text exposition format."""
+        with self._lock:
+            tables = (
+                ('request_duration_seconds', 'Time to handle a request, by endpoint.',
+                 [({'endpoint': endpoint}, histogram) for endpoint, histogram in sorted(self._requests.items())]),
+                ('phase_duration_seconds', 'Time per request spent in templates, blog parsing, Markdown and sessions.',
+                 [({'endpoint': endpoint, 'phase': phase}, histogram)
+                  for (endpoint, phase), histogram in sorted(self._phases.items())]),
+            )
+            lines = []
+            for name, help_text, series in tables:
+                name = f'{self.prefix}_{name}'
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in series:
+                    label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{{label_text}}} {histogram.sum!r}')
+                    lines.append(f'{name}_count{{{label_text}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(
+            self.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+            headers={'Cache-Control': 'no-store'},
+        )
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,251 @@
+"""Session backends for the Netrun Systems site.
+
+``SESSION_BACKEND`` selects how sessions are stored:
+
+- ``cookie`` (default): Flask's signed cookie sessions. No server-side I/O
+  and works across instances, since the data travels with the request.
+- ``sqlite``: server-side sessions in a SQLite database. Point
+  ``SESSION_SQLITE_PATH`` at ``/dev/shm`` for a shared-memory store that
+  all gunicorn workers on an instance can use.
+- ``filesystem``: the previous Flask-Session filesystem backend.
+
+Every backend only writes when the session was modified. With
+``SESSION_LAZY`` enabled (the default) the chosen backend is wrapped in
+:class:`LazySessionInterface`, so requests whose view never touches
+``session`` skip the store entirely and send no ``Set-Cookie``.
+"""
+import os
+import time
+import secrets
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+from flask.sessions import SecureCookieSessionInterface, SessionMixin, session_json_serializer
+from flask_session import Session
+from flask_session.sessions import ServerSideSession, SessionInterface
+
+SESSION_BACKENDS = ('cookie', 'sqlite', 'filesystem')
+
+
+class SqliteSession(ServerSideSession):
+    def __init__(self, initial=None, sid=None, permanent=None, expiry=None, new=False):
+        super().__init__(initial, sid=sid, permanent=permanent)
+        self.expiry = expiry
+        self.new = new
+
+
+class SqliteSessionInterface(SessionInterface):
+    """Server-side sessions stored in SQLite with TTL-based bulk expiry.
+
+    Rows carry an absolute expiry timestamp. Expired rows are ignored on
+    read and deleted in one statement at most every ``purge_interval``
+    seconds, so the table does not grow without bound. Unmodified sessions
+    are never written back unless more than half of their TTL has elapsed.
+    """
+
+    session_class = SqliteSession
+    serializer = session_json_serializer
+
+    def __init__(self, path, ttl=86400, purge_interval=60):
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._last_purge = 0.0
+        self._create_table()
+
+    def _connect(self):
+        # One connection per thread and per process, so forked gunicorn
+        # workers never share a handle inherited from the master.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_table(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions '
+            '(sid TEXT PRIMARY KEY, data TEXT NOT NULL, expiry REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expiry)')
+
+    def purge_expired(self, now=None):
+        """Delete every expired session. Returns the number of rows removed."""
+        now = now if now is not None else time.time()
+        self._last_purge = now
+        return self._connect().execute('DELETE FROM sessions WHERE expiry < ?', (now,)).rowcount
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            row = self._connect().execute(
+                'SELECT data, expiry FROM sessions WHERE sid = ? AND expiry >= ?',
+                (sid, time.time()),
+            ).fetchone()
+            if row is not None:
+                data = self.serializer.loads(row[0])
+                return self.session_class(data, sid=sid, expiry=row[1])
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        name = self.get_cookie_name(app)
+        now = time.time()
+
+        if not session:
+            if session.modified and not session.new:
+                self._connect().execute('DELETE FROM sessions WHERE sid = ?', (session.sid,))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        refresh = (
+            session.expiry is not None
+            and session.expiry - now < self.ttl / 2
+        )
+        if not session.modified and not refresh:
+            return
+
+        expiry = now + self.ttl
+        self._connect().execute(
+            'INSERT OR REPLACE INTO sessions (sid, data, expiry) VALUES (?, ?, ?)',
+            (session.sid, self.serializer.dumps(dict(session)), expiry),
+        )
+        if now - self._last_purge > self.purge_interval:
+            self.purge_expired(now)
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+class LazySession(SessionMixin, MutableMapping):
+    """Session proxy that opens the real session on first access."""
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._session = None
+
+    @property
+    def loaded(self):
+        return self._session is not None
+
+    def _get(self):
+        if self._session is None:
+            self._session = self._loader()
+        return self._session
+
+    @property
+    def permanent(self):
+        return self._get().permanent
+
+    @permanent.setter
+    def permanent(self, value):
+        self._get().permanent = value
+
+    @property
+    def new(self):
+        return self._session.new if self.loaded else True
+
+    @property
+    def modified(self):
+        return self._session.modified if self.loaded else False
+
+    @modified.setter
+    def modified(self, value):
+        self._get().modified = value
+
+    @property
+    def accessed(self):
+        return self._session.accessed if self.loaded else False
+
+    def __getitem__(self, key):
+        return self._get()[key]
+
+    def __setitem__(self, key, value):
+        self._get()[key] = value
+
+    def __delitem__(self, key):
+        del self._get()[key]
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def __contains__(self, key):
+        return key in self._get()
+
+    def get(self, key, default=None):
+        return self._get().get(key, default)
+
+    def setdefault(self, key, default=None):
+        return self._get().setdefault(key, default)
+
+    def pop(self, key, *args):
+        return self._get().pop(key, *args)
+
+    def clear(self):
+        self._get().clear()
+
+    def update(self, *args, **kwargs):
+        self._get().update(*args, **kwargs)
+
+
+class LazySessionInterface(SessionInterface):
+    """Wraps another session interface and defers loading until first use.
+
+    If a view never reads or writes ``session``, neither ``open_session``
+    nor ``save_session`` of the wrapped backend runs, so there is no store
+    I/O and no ``Set-Cookie``/``Vary: Cookie`` on the response.
+    """
+
+    def __init__(self, interface):
+        self.interface = interface
+
+    def open_session(self, app, request):
+        return LazySession(lambda: self.interface.open_session(app, request))
+
+    def save_session(self, app, session, response):
+        if isinstance(session, LazySession):
+            if not session.loaded:
+                return
+            session = session._session
+        self.interface.save_session(app, session, response)
+
+
+def init_session_backend(app):
+    """Install the session interface selected by ``SESSION_BACKEND``."""
+    backend = app.config.get('SESSION_BACKEND', 'cookie')
+    if backend == 'cookie':
+        app.session_interface = SecureCookieSessionInterface()
+    elif backend == 'sqlite':
+        app.session_interface = SqliteSessionInterface(
+            app.config.get('SESSION_SQLITE_PATH') or os.path.join(app.instance_path, 'sessions.sqlite3'),
+            ttl=int(app.permanent_session_lifetime.total_seconds()),
+        )
+    elif backend == 'filesystem':
+        app.config['SESSION_TYPE'] = 'filesystem'
+        Session(app)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND {backend!r}; expected one of {SESSION_BACKENDS}")
+    if app.config.get('SESSION_LAZY', True):
+        app.session_interface = LazySessionInterface(app.session_interface)
+    return app.session_interface
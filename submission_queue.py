@@ -0,0 +1,203 @@
+"""Durable queue for contact and early access form submissions.
+
+Form views call :meth:`SubmissionQueue.enqueue`, which is a single SQLite
+insert in WAL mode. The request never waits on SMTP. A
+:class:`SubmissionDispatcher` thread drains the queue in batches, so one
+SMTP connection is opened per batch. Failed sends are retried with
+exponential backoff until ``max_attempts`` is reached, after which the
+submission is kept as ``dead`` for inspection.
+
+Several gunicorn workers can share one queue file. Batches are claimed in a
+write transaction and leased for ``lease`` seconds, so each submission is
+handed to only one dispatcher at a time. A dispatcher that dies mid-batch
+releases its submissions when the lease runs out.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+
+PENDING = 'pending'
+SENT = 'sent'
+DEAD = 'dead'
+
+
+class SubmissionQueue:
+    def __init__(self, path, max_attempts=8, backoff=30.0, max_backoff=3600.0, lease=300.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self._local = threading.local()
+
+    def _connect(self):
+        # One connection per thread and per process, as in session_store.
+        # The file and table are created on first use, not at import.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._create_table(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_table(self, conn):
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS submissions ('
+            'id INTEGER PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, '
+            'created REAL NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, '
+            'next_attempt REAL NOT NULL, last_error TEXT)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS submissions_due ON submissions (status, next_attempt)')
+
+    def enqueue(self, kind, payload):
+        """Store one submission and return its id."""
+        now = time.time()
+        return self._connect().execute(
+            'INSERT INTO submissions (kind, payload, created, status, next_attempt) VALUES (?, ?, ?, ?, ?)',
+            (kind, json.dumps(payload), now, PENDING, now),
+        ).lastrowid
+
+    def claim(self, limit, now=None):
+        """Lease up to ``limit`` due submissions, oldest first."""
+        now = now if now is not None else time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT id, kind, payload, created, attempts FROM submissions '
+                'WHERE status = ? AND next_attempt <= ? ORDER BY id LIMIT ?',
+                (PENDING, now, limit),
+            ).fetchall()
+            conn.executemany(
+                'UPDATE submissions SET next_attempt = ? WHERE id = ?',
+                [(now + self.lease, row[0]) for row in rows],
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [
+            {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2]), 'created': row[3], 'attempts': row[4]}
+            for row in rows
+        ]
+
+    def mark_sent(self, ids):
+        self._connect().executemany(
+            'UPDATE submissions SET status = ?, last_error = NULL WHERE id = ?',
+            [(SENT, id_) for id_ in ids],
+        )
+
+    def retry_delay(self, attempts):
+        return min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+
+    def mark_failed(self, failures, now=None):
+        """Record failed sends (``{id: error}``) and schedule their retries."""
+        now = now if now is not None else time.time()
+        conn = self._connect()
+        for id_, error in failures.items():
+            row = conn.execute('SELECT attempts FROM submissions WHERE id = ?', (id_,)).fetchone()
+            if row is None:
+                continue
+            attempts = row[0] + 1
+            status = DEAD if attempts >= self.max_attempts else PENDING
+            conn.execute(
+                'UPDATE submissions SET status = ?, attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?',
+                (status, attempts, now + self.retry_delay(attempts), str(error), id_),
+            )
+
+    def purge_sent(self, older_than):
+        """Delete sent submissions created before ``older_than`` (a timestamp)."""
+        return self._connect().execute(
+            'DELETE FROM submissions WHERE status = ? AND created < ?', (SENT, older_than)
+        ).rowcount
+
+    def stats(self):
+        counts = dict(self._connect().execute('SELECT status, COUNT(*) FROM submissions GROUP BY status'))
+        return {status: counts.get(status, 0) for status in (PENDING, SENT, DEAD)}
+
+
+class SubmissionDispatcher:
+    """Background thread that sends queued submissions in batches.
+
+    ``send_batch`` receives a list of claimed submissions and returns a
+    ``{id: error}`` dict for the ones that failed. If it raises, the whole
+    batch is treated as failed (for example when the SMTP server is down).
+    """
+
+    def __init__(self, queue, send_batch, batch_size=20, interval=5.0, logger=None):
+        self.queue = queue
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.interval = interval
+        self.logger = logger
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def run_once(self, now=None):
+        """Send one batch. Returns ``(sent, failed)`` counts."""
+        batch = self.queue.claim(self.batch_size, now)
+        if not batch:
+            return 0, 0
+        try:
+            failures = self.send_batch(batch) or {}
+        except Exception as e:
+            failures = {submission['id']: e for submission in batch}
+        sent = [submission['id'] for submission in batch if submission['id'] not in failures]
+        self.queue.mark_sent(sent)
+        if failures:
+            self.queue.mark_failed(failures, now)
+            if self.logger is not None:
+                self.logger.error(f"Error sending {len(failures)} queued submissions: {next(iter(failures.values()))}")
+        return len(sent), len(failures)
+
+    def drain(self):
+        """Send batches until nothing is due. Returns total ``(sent, failed)``."""
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = self.run_once()
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < self.batch_size:
+                return total_sent, total_failed
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                if self.logger is not None:
+                    self.logger.error(f"Error dispatching submissions: {str(e)}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def start(self):
+        """Start the thread once per process (workers fork after import)."""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='submission-dispatcher', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Ask the thread to send now instead of at the next interval."""
+        self._wakeup.set()
+
+    def stop(self, timeout=5.0):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -1,3 +1,5 @@
+import os
+
 import pytest
 from app import app
 
@@ -83,3 +85,674 @@ def test_terms_of_service_route():
     client = app.test_client()
     response = client.get('/terms-of-service')
     assert response.status_code == 200
+
+
+def _write_post(directory, slug, date='2025-05-01', body='Hello', front=''):
+    path = directory / f'{slug}.md'
+    path.write_text(
+        f"---\ntitle: {slug}\ndate: {date}\nslug: {slug}\nexcerpt: x\n{front}---\n{body}\n"
+    )
+    return path
+
+
+def _make_app(tmp_path, **config):
+    """An app whose blog, search index and submission queue live in ``tmp_path``."""
+    from app import create_app
+    settings = {
+        'BLOG_POST_DIR': str(tmp_path),
+        'BLOG_INDEX_FILE': str(tmp_path / 'blog_index.bin'),
+        'BLOG_SEARCH_FILE': str(tmp_path / 'blog_search.bin'),
+        'SUBMISSION_QUEUE_PATH': str(tmp_path / 'submissions.sqlite3'),
+    }
+    settings.update(config)
+    return create_app(settings)
+
+
+def test_blog_index_reparses_only_changed_files(tmp_path):
+    from app import BlogPostIndex
+    _write_post(tmp_path, 'first', date='2025-05-01')
+    second = _write_post(tmp_path, 'second', date='2025-05-02')
+    index = BlogPostIndex(str(tmp_path), check_interval=0)
+
+    assert [p.slug for p in index.posts()] == ['second', 'first']
+    assert index.stats()['reloads'] == 2
+
+    index.posts()
+    assert index.stats()['reloads'] == 2
+
+    second.write_text(second.read_text() + '\nMore text\n')
+    assert 'More text' in index.get('second').content
+    assert index.stats()['reloads'] == 3
+
+    second.unlink()
+    assert index.get('second') is None
+    assert index.stats()['hits'] == 1
+    assert index.stats()['misses'] == 1
+
+
+def test_blog_post_route():
+    client = app.test_client()
+    assert client.get('/blog/welcome-to-netrun-systems').status_code == 200
+    assert client.get('/blog/no-such-post').status_code == 404
+
+
+def test_blog_index_prebuilt_artifact_round_trip(tmp_path):
+    from app import BlogPostIndex
+    posts_dir = tmp_path / 'posts'
+    posts_dir.mkdir()
+    _write_post(posts_dir, 'first', date='2025-05-01', body='# First')
+    stale = _write_post(posts_dir, 'second', date='2025-05-02', body='# Second')
+    artifact = str(tmp_path / 'blog_index.bin')
+    assert BlogPostIndex(str(posts_dir)).save(artifact) == 2
+
+    stale.write_text(stale.read_text().replace('# Second', '# Second, edited'))
+    index = BlogPostIndex(str(posts_dir), check_interval=0)
+    assert index.load(artifact) == 1
+
+    assert '<h1>First</h1>' in index.get('first').content
+    assert 'edited' in index.get('second').content
+    assert index.stats()['reloads'] == 1
+    assert [p.slug for p in index.posts()] == ['second', 'first']
+
+
+def test_blog_build_command(tmp_path):
+    output = tmp_path / 'blog_index.bin'
+    search_output = tmp_path / 'blog_search.bin'
+    result = app.test_cli_runner().invoke(args=[
+        'blog', 'build', '--output', str(output), '--search-output', str(search_output),
+    ])
+    assert result.exit_code == 0
+    assert output.exists()
+    assert search_output.exists()
+
+
+def test_static_page_conditional_get():
+    client = app.test_client()
+    first = client.get('/privacy-policy')
+    assert first.status_code == 200
+    assert first.headers.get('ETag')
+    assert first.headers.get('Last-Modified')
+
+    revalidated = client.get('/privacy-policy', headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+
+def test_page_cache_evicts_least_recently_used():
+    from app import PageCache
+    cache = PageCache(maxsize=2)
+    cache.put('a', '<p>a</p>')
+    cache.put('b', '<p>b</p>')
+    cache.get('a')
+    cache.put('c', '<p>c</p>')
+    assert cache.get('b') is None
+    assert cache.get('a')['body'] == b'<p>a</p>'
+    assert len(cache) == 2
+
+
+def test_freeze_site_writes_public_pages_only(tmp_path):
+    from app import freeze_site
+    written = freeze_site(str(tmp_path), base_url='https://www.example.com')
+
+    assert '/' in written
+    assert '/blog/welcome-to-netrun-systems' in written
+    assert (tmp_path / 'index.html').exists()
+    assert (tmp_path / 'index.html.gz').exists()
+    assert (tmp_path / 'privacy-policy' / 'index.html').exists()
+    assert (tmp_path / 'static' / 'css' / 'styles.css').exists()
+    post = (tmp_path / 'blog' / 'welcome-to-netrun-systems' / 'index.html').read_text()
+    assert 'https://www.example.com/blog/welcome-to-netrun-systems' in post
+    for url in ('/portal', '/login', '/contact', '/early-access', '/admin/blog'):
+        assert url not in written
+
+
+def test_freeze_site_writes_every_listing_page(tmp_path):
+    from app import freeze_site
+    posts = tmp_path / 'posts'
+    posts.mkdir()
+    for day in range(1, 13):
+        _write_post(posts, f'post-{day:02d}', date=f'2025-05-{day:02d}', front='tags: Azure\n')
+    output = tmp_path / 'site'
+
+    written = freeze_site(str(output), app=_make_app(posts))
+    assert {'/blog', '/blog/page/2', '/blog/tag/azure', '/blog/tag/azure/page/2',
+            '/blog/archive/2025/05/page/2'} <= set(written)
+    assert '/blog/page/3' not in written
+    listing = (output / 'blog' / 'index.html').read_text()
+    assert 'href="/blog/page/2"' in listing
+    older = (output / 'blog' / 'tag' / 'azure' / 'page' / '2' / 'index.html').read_text()
+    assert 'post-02' in older and 'href="/blog/tag/azure"' in older
+
+
+def test_public_page_does_not_touch_session():
+    client = app.test_client()
+    client.get('/')
+    response = client.get('/')
+    assert 'Set-Cookie' not in response.headers
+    assert response.headers.get('Vary') == 'Cookie'
+
+
+def test_cached_page_shows_pending_flash_messages():
+    client = app.test_client()
+    client.get('/terms-of-service')
+    with client.session_transaction() as sess:
+        sess['_flashes'] = [('success', 'Saved your preferences')]
+    assert b'Saved your preferences' in client.get('/terms-of-service').data
+    assert b'Saved your preferences' not in client.get('/terms-of-service').data
+
+
+def test_blog_publish_is_seen_by_other_workers(tmp_path, monkeypatch):
+    import app as app_module
+    from app import BlogPostIndex
+    calls = []
+    render = app_module.render_markdown
+    monkeypatch.setattr(app_module, 'render_markdown', lambda text: calls.append(text) or render(text))
+    _write_post(tmp_path, 'first', date='2025-05-01')
+    writer = BlogPostIndex(str(tmp_path), check_interval=3600)
+    reader = BlogPostIndex(str(tmp_path), check_interval=3600)
+    assert [p.slug for p in writer.posts()] == ['first']
+    assert [p.slug for p in reader.posts()] == ['first']
+
+    text = "---\ntitle: Second\ndate: 2025-06-01\nslug: second\n---\n# Second\n"
+    post = writer.publish('second.md', text)
+    assert calls == ['# Second\n']
+    assert post.content == '<h1>Second</h1>'
+    assert [p.slug for p in writer.posts()] == ['second', 'first']
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+    reloads = reader.stats()['reloads']
+    assert reader.get('second').title == 'Second'
+    assert [p.slug for p in reader.posts()] == ['second', 'first']
+    assert reader.stats()['reloads'] == reloads + 1
+
+
+def test_publish_applies_entries_other_workers_logged_first(tmp_path):
+    from app import BlogPostIndex
+    _write_post(tmp_path, 'first', date='2025-05-01')
+    a = BlogPostIndex(str(tmp_path), check_interval=3600)
+    b = BlogPostIndex(str(tmp_path), check_interval=3600)
+    assert [p.slug for p in a.posts()] == [p.slug for p in b.posts()] == ['first']
+
+    # b publishes while a is idle, then a publishes without refreshing in between
+    b.publish('from-b.md', "---\ntitle: From B\ndate: 2025-06-01\nslug: from-b\n---\nB\n")
+    a.publish('from-a.md', "---\ntitle: From A\ndate: 2025-07-01\nslug: from-a\n---\nA\n")
+    assert [p.slug for p in a.posts()] == ['from-a', 'from-b', 'first']
+    assert [p.slug for p in b.posts()] == ['from-a', 'from-b', 'first']
+    # Nothing is left unread in either index
+    assert a._log_offset == b._log_offset == a._publish_log_size()
+
+
+def test_admin_blog_publishes_post(tmp_path):
+    client = _make_app(tmp_path, WTF_CSRF_ENABLED=False).test_client()
+    response = client.post('/admin/blog', data={
+        'title': 'Hello World',
+        'author': 'Tester',
+        'date': '2025-06-01',
+        'excerpt': 'Short',
+        'content': 'Body text',
+    })
+    assert response.status_code == 302
+    assert (tmp_path / 'hello-world.md').exists()
+    assert client.get('/blog/hello-world').status_code == 200
+
+
+def test_sitemap_lists_public_pages_and_posts(tmp_path):
+    _write_post(tmp_path, 'first', date='2025-05-01')
+    response = _make_app(tmp_path).test_client().get('/sitemap.xml', base_url='https://www.example.com')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/xml'
+    body = response.get_data(as_text=True)
+    assert '<loc>https://www.example.com/</loc>' in body
+    assert '<loc>https://www.example.com/blog/first</loc>' in body
+    assert '<lastmod>2025-05-01</lastmod>' in body
+    for url in ('/portal', '/login', '/admin/blog', '/sitemap.xml', '/favicon.ico'):
+        assert f'https://www.example.com{url}<' not in body
+
+
+def test_feed_is_cached_until_posts_change(tmp_path, monkeypatch):
+    import app as app_module
+    _write_post(tmp_path, 'first', date='2025-05-01')
+    other = _make_app(tmp_path)
+    index = other.extensions['netrun']['blog_index']
+    monkeypatch.setattr(app_module, 'render_markdown', lambda text: pytest.fail('rendered a post body'))
+    client = other.test_client()
+
+    first = client.get('/blog/feed.xml')
+    assert first.mimetype == 'application/rss+xml'
+    assert b'<title>first</title>' in first.data
+    assert client.get('/blog/feed.xml', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    # Publishing renders the new post's body up front
+    monkeypatch.setattr(app_module, 'render_markdown', lambda text: '')
+    index.publish('second.md', "---\ntitle: Second\ndate: 2025-05-02\nslug: second\n---\nBody\n")
+    second = client.get('/blog/feed.xml', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.data.index(b'<title>Second</title>') < second.data.index(b'<title>first</title>')
+
+
+def test_blog_listing_is_paginated(tmp_path):
+    for day in range(1, 26):
+        _write_post(tmp_path, f'post-{day:02d}', date=f'2025-05-{day:02d}')
+    client = _make_app(tmp_path).test_client()
+
+    first = client.get('/blog')
+    assert first.status_code == 200
+    assert b'post-25' in first.data and b'post-16' in first.data
+    assert b'post-15' not in first.data
+    assert b'href="/blog/page/2"' in first.data
+
+    assert client.get('/blog?page=2').data == client.get('/blog/page/2').data
+    last = client.get('/blog/page/3')
+    assert b'post-05' in last.data and b'post-01' in last.data
+    assert b'Older posts' not in last.data
+
+    small = client.get('/blog?page=2&per_page=5')
+    assert b'post-20' in small.data and b'per_page=5' in small.data
+    assert client.get('/blog?page=4').status_code == 404
+
+
+def test_blog_listings_are_updated_incrementally(tmp_path):
+    from app import BlogPostIndex
+    _write_post(tmp_path, 'first', date='2025-03-02', front='tags: Azure, Governance\ncategory: Guides\n')
+    _write_post(tmp_path, 'second', date='2025-03-20', front='tags: [azure, "Cost Management"]\n')
+    index = BlogPostIndex(str(tmp_path))
+    index.refresh(force=True)
+
+    assert index.get('second').tags == ('azure', 'Cost Management')
+    assert [post.slug for post in index.listing('tag', 'azure', 1, 10)[0]] == ['second', 'first']
+    assert index.listing('month', (2025, 3), 2, 1) == ([index.get('first')], 2)
+    assert index.terms('tag') == [('azure', 'azure', 2), ('cost-management', 'Cost Management', 1),
+                                  ('governance', 'Governance', 1)]
+
+    index.publish('third.md', "---\ntitle: Third\ndate: 2025-04-01\nslug: third\ntags: Governance\n---\nBody\n")
+    index.publish('first.md', "---\ntitle: First\ndate: 2025-03-02\nslug: first\ncategory: Guides\n---\nBody\n")
+    # Deleted by another worker
+    (tmp_path / 'second.md').unlink()
+    with open(tmp_path / '.publish-log', 'a') as log:
+        log.write('second.md\n')
+
+    assert [post.slug for post in index.listing('tag', 'governance', 1, 10)[0]] == ['third']
+    assert index.listing('tag', 'azure', 1, 10) == ([], 0)
+    assert index.terms('month') == [((2025, 4), 'April 2025', 1), ((2025, 3), 'March 2025', 1)]
+    rebuilt = BlogPostIndex(str(tmp_path))
+    rebuilt.refresh(force=True)
+    assert {key: [post.slug for post in posts] for key, posts in index._listings.items()} == \
+        {key: [post.slug for post in posts] for key, posts in rebuilt._listings.items()}
+
+
+def test_blog_tag_and_archive_routes(tmp_path):
+    for day in range(1, 13):
+        _write_post(tmp_path, f'post-{day:02d}', date=f'2025-0{1 + day % 2}-{day:02d}',
+                    front='tags: Azure Lighthouse\n' if day % 3 == 0 else '')
+    client = _make_app(tmp_path).test_client()
+
+    tagged = client.get('/blog/tag/azure-lighthouse')
+    assert b'Tag: Azure Lighthouse' in tagged.data
+    assert b'post-12' in tagged.data and b'post-03' in tagged.data and b'post-04' not in tagged.data
+    assert client.get('/blog/tag/Azure Lighthouse').headers['Location'].endswith('/blog/tag/azure-lighthouse')
+    redirected = client.get('/blog/tag/Azure Lighthouse?page=2&per_page=2', follow_redirects=True)
+    assert redirected.request.path == '/blog/tag/azure-lighthouse'
+    assert redirected.request.query_string == b'page=2&per_page=2'
+    assert b'post-06' in redirected.data and b'post-09' not in redirected.data
+    assert client.get('/blog/tag/unknown').status_code == 404
+
+    february = client.get('/blog/archive/2025/02?per_page=5')
+    assert b'Posts from February 2025' in february.data
+    assert b'/blog/archive/2025/02/page/2?per_page=5' in february.data
+    assert client.get('/blog/archive/2025/02/page/3?per_page=5').status_code == 404
+    assert client.get('/blog/archive/2025/03').status_code == 404
+    assert b'/blog/archive/2025/01' in client.get('/blog').data
+
+
+def test_blog_page_does_not_load_post_content(tmp_path):
+    from app import BlogPostIndex
+    posts_dir = tmp_path / 'posts'
+    posts_dir.mkdir()
+    _write_post(posts_dir, 'only')
+    artifact = str(tmp_path / 'blog_index.bin')
+    BlogPostIndex(str(posts_dir)).save(artifact)
+    index = BlogPostIndex(str(posts_dir))
+    index.load(artifact)
+
+    posts, total = index.page(1, 10)
+    assert total == 1
+    assert posts[0].slug == 'only'
+    assert posts[0].content == '<p>Hello</p>'
+
+
+def test_front_matter_handles_colons_quotes_and_multiline_values():
+    import io
+    from app import read_front_matter
+    file = io.StringIO(
+        "---\n"
+        "title: Azure: Cross-Tenant Governance\n"
+        "author: 'O''Brien'\n"
+        "excerpt: A summary that\n"
+        "  wraps onto a second line.\n"
+        "notes: |\n"
+        "  first\n"
+        "    indented\n"
+        "---\n"
+        "# Body\n"
+    )
+    metadata = read_front_matter(file)
+    assert metadata == {
+        'title': 'Azure: Cross-Tenant Governance',
+        'author': "O'Brien",
+        'excerpt': 'A summary that wraps onto a second line.',
+        'notes': 'first\n  indented',
+    }
+    # The reader stops at the closing marker and leaves the body unread
+    assert file.read() == '# Body\n'
+
+
+def test_front_matter_keeps_inner_quotes():
+    from app import parse_front_matter
+    metadata = parse_front_matter([
+        'title: "Zero Trust" vs "Least Privilege"\n',
+        "author: 'Ops' and 'Sec'\n",
+        'excerpt: "Say \\"hi\\" to C:\\\\"\n',
+    ])
+    assert metadata == {
+        'title': '"Zero Trust" vs "Least Privilege"',
+        'author': "'Ops' and 'Sec'",
+        'excerpt': 'Say "hi" to C:\\',
+    }
+
+
+def test_admin_blog_quotes_front_matter(tmp_path):
+    other = _make_app(tmp_path, WTF_CSRF_ENABLED=False)
+    index = other.extensions['netrun']['blog_index']
+    title = '"Zero Trust" vs "Least Privilege"'
+    response = other.test_client().post('/admin/blog', data={
+        'title': title, 'author': "O'Brien", 'date': '2025-06-01', 'excerpt': 'Ends with a \\',
+        'category': 'Guides: "Security"', 'tags': 'Azure, "Quoted" tag', 'content': 'Body',
+    })
+    assert response.status_code == 302
+    post = index.get('zero-trust-vs-least-privilege')
+    assert (post.title, post.author, post.excerpt) == (title, "O'Brien", 'Ends with a \\')
+    assert post.category == 'Guides: "Security"'
+    assert post.tags == ('Azure', '"Quoted" tag')
+
+
+def test_parse_blog_post_defers_body_rendering(tmp_path, monkeypatch):
+    import app as app_module
+    calls = []
+    render = app_module.render_markdown
+    monkeypatch.setattr(app_module, 'render_markdown', lambda text: calls.append(text) or render(text))
+    _write_post(tmp_path, 'lazy', body='# Lazy')
+
+    post = app_module.parse_blog_post('lazy.md', str(tmp_path))
+    assert post.slug == 'lazy'
+    assert calls == []
+    assert post.content == '<h1>Lazy</h1>'
+    # The HTML is not kept on the post; repeats come from the render cache
+    hits = app_module.markdown_renderer.memory_hits
+    assert post.content == '<h1>Lazy</h1>'
+    assert len(calls) == 2
+    assert app_module.markdown_renderer.memory_hits == hits + 1
+
+
+def test_blog_post_formats_date_on_demand():
+    import datetime
+    from app import BlogPost
+    post = BlogPost('Title', 'Author', datetime.datetime(2025, 4, 24), 'title', content='<p>x</p>')
+    assert post.formatted_date == 'April 24, 2025'
+    assert not hasattr(post, '__dict__')
+
+
+def test_blog_listing_streams_when_enabled():
+    from app import create_app
+    response = create_app({'BLOG_STREAM_LISTING': True}).test_client().get('/blog')
+    assert response.is_streamed
+    assert b'Welcome to Netrun Systems' in response.data
+
+
+def test_blog_search_route():
+    client = app.test_client()
+    response = client.get('/blog/search?q=lighthouse')
+    assert response.status_code == 200
+    assert b'/blog/welcome-to-netrun-systems' in response.data
+    assert b'No posts match' in client.get('/blog/search?q=zzzunknown').data
+
+
+def test_blog_search_picks_up_published_posts(tmp_path):
+    from app import search_blog_posts
+    _write_post(tmp_path, 'first', body='Governance dashboards')
+    other = _make_app(tmp_path, BLOG_INDEX_CHECK_INTERVAL=3600)
+    state = other.extensions['netrun']
+
+    with other.app_context():
+        assert [p.slug for p in search_blog_posts('governance')] == ['first']
+        state['blog_index'].publish('second.md', "---\ntitle: Compliance\ndate: 2025-06-01\nslug: second\n---\nSOC 2 evidence\n")
+        assert [p.slug for p in search_blog_posts('evidence')] == ['second']
+    assert len(state['blog_search']) == 2
+
+
+def test_fingerprinted_static_assets(tmp_path):
+    from app import create_app
+    from asset_pipeline import build_assets
+    build_dir = tmp_path / 'static_dist'
+    build_assets(app.static_folder, str(build_dir))
+    other = create_app({'ASSET_BUILD_DIR': str(build_dir)})
+    hashed = other.extensions['netrun']['asset_manifest']['css/styles.css']
+    client = other.test_client()
+
+    assert f'/static/{hashed}'.encode() in client.get('/blog').data
+
+    response = client.get(f'/static/{hashed}', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Content-Type'].startswith('text/css')
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+    plain = client.get(f'/static/{hashed}')
+    assert 'Content-Encoding' not in plain.headers
+    assert client.get('/static/css/styles.css').status_code == 200
+
+def test_responsive_image_renders_picture():
+    from app import create_app, responsive_image
+    other = create_app()
+    other.extensions['netrun']['image_manifest'].update({
+        'images/hero.png': {
+            'width': 800,
+            'height': 400,
+            'variants': {'webp': [[320, 'images/derived/hero-320.webp'], [800, 'images/derived/hero-800.webp']]},
+        },
+    })
+    with other.test_request_context():
+        html = responsive_image('images/hero.png', 'Hero & co', sizes='50vw')
+        fallback = responsive_image('images/other.png', 'Other', lazy=False)
+
+    assert html.startswith('<picture><source type="image/webp"')
+    assert 'srcset="/static/images/derived/hero-320.webp 320w, /static/images/derived/hero-800.webp 800w"' in html
+    assert 'alt="Hero &amp; co"' in html
+    assert 'width="800" height="400"' in html
+    assert fallback == '<img src="/static/images/other.png" alt="Other">'
+
+def test_form_posts_are_rate_limited_before_csrf():
+    from app import FORM_RATE_LIMIT, create_app
+    # A fresh app has its own limiter, so earlier tests' posts do not count
+    client = create_app().test_client()
+    limit = int(FORM_RATE_LIMIT.split()[0])
+
+    # CSRF is on, so allowed posts fail validation; throttled ones never get that far
+    statuses = [client.post('/contact', data={'name': 'Bot'}).status_code for _ in range(limit + 1)]
+    assert statuses == [400] * limit + [429]
+    assert 'Retry-After' in client.post('/contact').headers
+    assert client.get('/contact').status_code == 200
+    # Limits are per route
+    assert client.post('/early-access').status_code == 400
+    # ...and per client address
+    other = client.post('/contact', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert other.status_code == 400
+
+
+def test_import_does_not_build_the_app():
+    import subprocess
+    import sys
+    code = (
+        "import sys, app\n"
+        "assert app._default_app is None\n"
+        "assert 'markdown' not in sys.modules and 'PIL' not in sys.modules\n"
+        "assert app.app is app.application is app.get_app()\n"
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(__file__)), check=True)
+
+
+def test_proxy_count_defaults_to_one_on_app_service():
+    import subprocess
+    import sys
+    code = (
+        "import app\n"
+        "from flask import request\n"
+        "a = app.create_app()\n"
+        "a.add_url_rule('/ip', 'ip', lambda: request.remote_addr)\n"
+        "environ = {'HTTP_X_FORWARDED_FOR': '203.0.113.7', 'REMOTE_ADDR': '10.0.0.1'}\n"
+        "print(a.test_client().get('/ip', environ_base=environ).get_data(as_text=True))\n"
+    )
+    root = os.path.dirname(os.path.dirname(__file__))
+    env = {key: value for key, value in os.environ.items() if key != 'TRUSTED_PROXY_COUNT'}
+    for site, expected in (('netrunsystems', '203.0.113.7'), (None, '10.0.0.1')):
+        env.pop('WEBSITE_SITE_NAME', None)
+        if site:
+            env['WEBSITE_SITE_NAME'] = site
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        assert output.strip() == expected
+
+def test_create_app_applies_config_overrides():
+    from app import create_app
+    other = create_app({'PAGE_CACHE_ENABLED': False})
+    assert other is not app
+    assert other.config['PAGE_CACHE_ENABLED'] is False
+    assert other.test_client().get('/').status_code == 200
+
+
+def test_apps_keep_their_own_blog_and_submission_queue(tmp_path):
+    import app as app_module
+    (tmp_path / 'posts').mkdir()
+    _write_post(tmp_path / 'posts', 'scratch', body='Only in the scratch app')
+    queue_path = str(tmp_path / 'q.sqlite3')
+    other = app_module.create_app({'BLOG_POST_DIR': str(tmp_path / 'posts'), 'SUBMISSION_QUEUE_PATH': queue_path})
+    state = other.extensions['netrun']
+
+    assert app.extensions['netrun']['blog_index'] is not state['blog_index']
+    assert other.test_client().get('/blog/scratch').status_code == 200
+    assert app.test_client().get('/blog/scratch').status_code == 404
+    with other.app_context():
+        assert app_module.blog_index.directory == str(tmp_path / 'posts')
+        assert app_module.submission_queue.path == queue_path
+    # Outside a context the module names keep pointing at the default app
+    assert app_module.submission_dispatcher.send_batch.keywords['app'] is app
+    assert state['submission_dispatcher'].send_batch.keywords['app'] is other
+
+
+def test_two_apps_keep_separate_caches_indexes_and_queues(tmp_path):
+    apps = {}
+    for slug in ('alpha', 'beta'):
+        (tmp_path / slug).mkdir()
+        _write_post(tmp_path / slug, slug, body=f'Governance notes for {slug}')
+        apps[slug] = _make_app(tmp_path / slug, WTF_CSRF_ENABLED=False, SUBMISSION_DISPATCH=False)
+    alpha, beta = (apps[slug].extensions['netrun'] for slug in ('alpha', 'beta'))
+    for name in ('page_cache', 'xml_cache', 'blog_index', 'blog_search', 'markdown_renderer',
+                 'submission_queue', 'limiter'):
+        assert alpha[name] is not beta[name], name
+
+    client = apps['alpha'].test_client()
+    assert client.get('/privacy-policy').status_code == 200
+    assert b'/blog/alpha' in client.get('/sitemap.xml').data
+    assert b'/blog/alpha' in client.get('/blog/search?q=governance').data
+    assert client.post('/contact', data={
+        'name': 'Ada', 'email': 'ada@example.com', 'subject': 'Pricing', 'message': 'Hello there',
+    }).status_code == 302
+    assert len(alpha['page_cache']) and len(alpha['xml_cache']) and len(alpha['blog_search']) == 1
+    assert alpha['submission_queue'].stats()['pending'] == 1
+
+    # Nothing alpha served or queued leaked into beta
+    assert (len(beta['page_cache']), len(beta['xml_cache']), len(beta['blog_search'])) == (0, 0, 0)
+    assert beta['submission_queue'].stats()['pending'] == 0
+    client = apps['beta'].test_client()
+    assert b'/blog/alpha' not in client.get('/blog/search?q=governance').data
+    sitemap = client.get('/sitemap.xml').data
+    assert b'/blog/beta' in sitemap and b'/blog/alpha' not in sitemap
+
+
+def test_blog_seed_writes_sample_post_once(tmp_path):
+    from app import create_app
+    posts_dir = tmp_path / 'posts'
+    runner = create_app({'BLOG_POST_DIR': str(posts_dir)}).test_cli_runner()
+
+    assert 'Wrote a sample post' in runner.invoke(args=['blog', 'seed']).output
+    assert os.listdir(posts_dir) == ['welcome-to-netrun-systems.md']
+    assert 'already has posts' in runner.invoke(args=['blog', 'seed']).output
+
+
+def test_warm_caches_compiles_templates_and_indexes_posts(tmp_path, monkeypatch):
+    import app as app_module
+    _write_post(tmp_path, 'first')
+    calls = []
+    monkeypatch.setattr(app_module, 'render_markdown', lambda text: calls.append(text) or '')
+    other = _make_app(tmp_path)
+    state = other.extensions['netrun']
+
+    templates, posts = app_module.warm_caches(other)
+    assert templates == len(other.jinja_env.list_templates())
+    assert len(other.jinja_env.cache) == templates
+    assert posts == 1
+    assert calls == []
+    assert state['blog_search'].generation == state['blog_index'].generation
+
+    app_module.warm_caches(other, content=True)
+    assert calls == ['Hello\n']
+
+
+def test_template_bytecode_cache_recompiles_edited_templates(tmp_path, monkeypatch):
+    import app as app_module
+    from jinja2 import Environment, FileSystemLoader
+    templates = tmp_path / 'templates'
+    templates.mkdir()
+    (templates / 'page.html').write_text('<p>{{ name }} v1</p>')
+    cache_dir = tmp_path / 'cache'
+
+    def environment():
+        return Environment(loader=FileSystemLoader(str(templates)),
+                           bytecode_cache=app_module.TemplateBytecodeCache(str(cache_dir)))
+
+    assert environment().get_template('page.html').render(name='a') == '<p>a v1</p>'
+    assert len(os.listdir(cache_dir)) == 1
+
+    # A fresh environment loads the bytecode instead of compiling
+    env = environment()
+    monkeypatch.setattr(env, 'compile', lambda *args, **kwargs: pytest.fail('compiled again'))
+    assert env.get_template('page.html').render(name='b') == '<p>b v1</p>'
+    monkeypatch.undo()
+
+    # Same mtime, new source: the stale bytecode is not used
+    stat = os.stat(templates / 'page.html')
+    (templates / 'page.html').write_text('<p>{{ name }} v2</p>')
+    os.utime(templates / 'page.html', ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert environment().get_template('page.html').render(name='c') == '<p>c v2</p>'
+
+
+def test_templates_compile_command(tmp_path):
+    import app as app_module
+    other = app_module.create_app({'TEMPLATE_CACHE_DIR': str(tmp_path / 'cache')})
+    result = other.test_cli_runner().invoke(args=['templates', 'compile', '--clear'])
+    assert result.exit_code == 0, result.output
+    assert len(os.listdir(tmp_path / 'cache')) == len(other.jinja_env.list_templates())
+
+
+def test_parse_blog_post_is_timed_as_blog_parse(tmp_path, monkeypatch):
+    import app as app_module
+    _write_post(tmp_path, 'first', front='tags: Azure\n')
+    monkeypatch.setattr(app_module.metrics, 'enabled', True)
+    app_module.metrics.reset()
+
+    app_module.parse_tags('Azure, Governance')
+    assert app_module.metrics.snapshot('(background)', 'blog_parse')[0] == 0
+    assert app_module.parse_blog_post('first.md', str(tmp_path)).tags == ('Azure',)
+    assert app_module.metrics.snapshot('(background)', 'blog_parse')[0] == 1
+    app_module.metrics.reset()
@@ -0,0 +1,37 @@
+import gzip
+import json
+
+from asset_pipeline import build_assets, minify_css, minify_html, minify_js
+
+
+def test_minify_css_keeps_selectors_and_values():
+    source = "/* header */\na:hover ,\nb > i {\n    color: red;\n    margin: calc(1rem + 2px);\n}\n"
+    assert minify_css(source) == 'a:hover,b>i{color:red;margin:calc(1rem + 2px)}'
+
+
+def test_minify_js_keeps_line_breaks():
+    source = "// comment\nfunction f() {\n    return 1;\n}\n\n"
+    assert minify_js(source) == 'function f() {\nreturn 1;\n}\n'
+    assert minify_js('const a = `x\n  y`;') == 'const a = `x\n  y`;'
+
+
+def test_minify_html_collapses_whitespace_outside_preformatted_blocks():
+    source = "<!-- nav -->\n  <ul>\n    <li><a>x</a>   <b>y</b></li>\n  </ul>\n<pre>  a\n   b</pre>\n<script>\n  var x;\n</script>"
+    assert minify_html(source) == "\n<ul>\n<li><a>x</a> <b>y</b></li>\n</ul>\n<pre>  a\n   b</pre>\n<script>\n  var x;\n</script>"
+
+
+def test_build_assets_fingerprints_and_compresses(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'css' / 'site.css').write_text('body {\n    color: red;\n}\n' * 20)
+    (static / 'logo.png').write_bytes(b'\x89PNG fake')
+    output = tmp_path / 'dist'
+
+    manifest = build_assets(str(static), str(output))
+
+    css = manifest['css/site.css']
+    assert css.startswith('css/site.') and css.endswith('.css')
+    assert (output / css).read_text().startswith('body{color:red}')
+    assert gzip.decompress((output / (css + '.gz')).read_bytes()) == (output / css).read_bytes()
+    assert not (output / (manifest['logo.png'] + '.gz')).exists()
+    assert json.loads((output / 'manifest.json').read_text()) == manifest
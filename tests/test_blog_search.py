@@ -0,0 +1,76 @@
+from blog_search import SearchIndex, tokenize
+
+
+def make_index():
+    index = SearchIndex()
+    index.add('lighthouse.md', 'Azure Lighthouse', 'Cross-tenant access', 'Delegated resource management for MSPs.')
+    index.add('cost.md', 'Cutting cloud cost', 'Budgets and alerts', 'Azure cost management across tenants.')
+    index.add('news.md', 'Company news', 'Announcements', 'We opened an office in Ojai.')
+    return index
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize('The Cross-Tenant [Azure] guide!') == ['cross', 'tenant', 'azure', 'guide']
+
+
+def test_search_ranks_title_matches_first():
+    results = make_index().search('azure')
+    assert [doc for doc, _ in results] == ['lighthouse.md', 'cost.md']
+
+
+def test_phrase_query_requires_adjacent_terms():
+    index = make_index()
+    assert [doc for doc, _ in index.search('"cost management"')] == ['cost.md']
+    assert index.search('"management cost"') == []
+
+
+def test_remove_and_reindex_document():
+    index = make_index()
+    index.remove('cost.md')
+    assert [doc for doc, _ in index.search('cost')] == []
+    index.add('news.md', 'Azure pricing news', '', '')
+    assert 'news.md' in dict(index.search('azure'))
+    assert index.search('ojai') == []
+
+
+def test_serialized_round_trip_preserves_results():
+    index = make_index()
+    restored = SearchIndex.loads(index.dumps())
+    assert restored.search('azure tenants') == index.search('azure tenants')
+    assert len(restored) == 3
+
+
+def test_loaded_index_decodes_terms_on_demand(tmp_path):
+    path = str(tmp_path / 'search.bin')
+    make_index().save(path)
+    restored = SearchIndex.load(path)
+    assert restored._postings == {}
+    assert [doc for doc, _ in restored.search('"cost management"')] == ['cost.md']
+    assert set(restored._postings) == {'cost', 'management'}
+
+    # Updating and saving a loaded index keeps the terms it never decoded
+    restored.remove('news.md')
+    restored.save(path)
+    again = SearchIndex.load(path)
+    assert [doc for doc, _ in again.search('lighthouse azure')] == ['lighthouse.md', 'cost.md']
+    assert again.search('ojai') == []
+
+
+def test_pruned_ranking_matches_exhaustive_scoring():
+    import random
+    rng = random.Random(7)
+    words = ['azure', 'tenant', 'cost', 'policy', 'audit', 'security'] + [f'w{n}' for n in range(40)]
+    index = SearchIndex()
+    for number in range(300):
+        index.add(f'{number}.md', '', '', ' '.join(rng.choices(words, k=rng.randint(5, 60))))
+
+    for query in ('azure tenant', 'cost policy audit w3', '"security audit" azure'):
+        phrase = tokenize(query.split('"')[1]) if '"' in query else None
+        scores = {}
+        for term in tokenize(query):
+            for doc, score in (index._term_impacts(term) or {}).items():
+                scores[doc] = scores.get(doc, 0.0) + score
+        expected = sorted(
+            (score for doc, score in scores.items() if not phrase or index._has_phrase(doc, phrase)), reverse=True
+        )[:5]
+        assert [score for _, score in index.search(query, limit=5)] == expected
@@ -0,0 +1,102 @@
+import gzip
+
+import pytest
+from flask import Flask, Response, request, stream_with_context
+
+import compression
+from compression import CompressionMiddleware
+
+PAGE = '<html>\n  <body>\n    <p>' + 'Cloud governance for small teams. ' * 40 + '</p>\n  </body>\n</html>\n'
+
+
+def make_app(**options):
+    app = Flask(__name__)
+
+    @app.route('/page')
+    def page():
+        response = Response(PAGE, mimetype='text/html')
+        response.set_etag('page-v1')
+        return response.make_conditional(request)
+
+    @app.route('/tiny')
+    def tiny():
+        response = Response('ok', mimetype='text/html')
+        response.set_etag('tiny-v1')
+        return response.make_conditional(request)
+
+    @app.route('/stream')
+    def stream():
+        return Response(stream_with_context(iter([PAGE])), mimetype='text/html')
+
+    @app.route('/encoded')
+    def encoded():
+        return Response(gzip.compress(PAGE.encode()), mimetype='text/html', headers={'Content-Encoding': 'gzip'})
+
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, **options)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+
+
+def test_gzip_response_is_cached_by_etag():
+    app = make_app()
+    middleware = app.wsgi_app
+    client = app.test_client()
+
+    for _ in range(2):
+        response = client.get('/page', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['ETag'] == '"page-v1-gzip"'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert int(response.headers['Content-Length']) == len(response.data)
+        assert gzip.decompress(response.data).decode() == PAGE
+    assert (middleware.misses, middleware.hits) == (1, 1)
+
+    response = client.get('/page', headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"page-v1-gzip"'})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"page-v1-gzip"'
+
+    # Identity clients get the plain page with the app's own ETag
+    response = client.get('/page', headers={'If-None-Match': '"page-v1-gzip"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"page-v1"'
+    assert response.get_data(as_text=True) == PAGE
+
+
+def test_small_streamed_and_encoded_responses_pass_through():
+    client = make_app().test_client()
+    headers = {'Accept-Encoding': 'gzip'}
+    assert 'Content-Encoding' not in client.get('/tiny', headers=headers).headers
+    assert client.get('/stream', headers=headers).get_data(as_text=True) == PAGE
+    assert gzip.decompress(client.get('/encoded', headers=headers).data).decode() == PAGE
+    assert 'Content-Encoding' not in client.get('/page', headers={'Accept-Encoding': 'gzip;q=0'}).headers
+
+
+def test_conditional_get_on_uncompressed_response_keeps_plain_etag():
+    client = make_app().test_client()
+    headers = {'Accept-Encoding': 'gzip'}
+
+    response = client.get('/tiny', headers=headers)
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == '"tiny-v1"'
+
+    response = client.get('/tiny', headers={**headers, 'If-None-Match': '"tiny-v1"'})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"tiny-v1"'
+
+
+def test_minify_without_compression():
+    response = make_app(minify=True).test_client().get('/page')
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True).startswith('<html>\n<body>\n<p>Cloud')
+
+
+def test_brotli_preferred_when_installed(monkeypatch):
+    brotli = pytest.importorskip('brotli')
+    monkeypatch.setattr(compression, 'brotli', brotli)
+    response = make_app().test_client().get('/page', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data).decode() == PAGE
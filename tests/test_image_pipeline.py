@@ -0,0 +1,47 @@
+import json
+import logging
+import warnings
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from image_pipeline import build_images, load_manifest, output_formats
+
+
+def test_build_images_writes_variants_and_skips_unchanged(tmp_path, caplog):
+    images = tmp_path / 'images'
+    images.mkdir()
+    Image.new('RGB', (800, 400), 'red').save(images / 'hero.png')
+    (images / 'placeholder.jpg').write_bytes(b'not an image')
+
+    with caplog.at_level(logging.INFO, logger='image_pipeline'):
+        manifest, rebuilt = build_images(str(tmp_path), jobs=1, widths=(320, 640, 1280))
+
+    assert rebuilt == ['images/hero.png']
+    assert any(record.levelno == logging.WARNING and 'images/placeholder.jpg' in record.getMessage()
+               for record in caplog.records)
+    entry = manifest['images/hero.png']
+    assert (entry['width'], entry['height']) == (800, 400)
+    webp = entry['variants']['webp']
+    assert [width for width, _ in webp] == [320, 640, 800]
+    with Image.open(tmp_path / webp[0][1]) as derived:
+        assert derived.size == (320, 160)
+    assert 'images/placeholder.jpg' not in manifest
+    assert load_manifest(str(tmp_path)) == json.loads(json.dumps(manifest))
+
+    manifest, rebuilt = build_images(str(tmp_path), jobs=1, widths=(320, 640, 1280))
+    assert rebuilt == []
+    assert 'images/hero.png' in manifest
+
+    Image.new('RGB', (800, 400), 'blue').save(images / 'hero.png')
+    assert build_images(str(tmp_path), jobs=1, widths=(320, 640, 1280))[1] == ['images/hero.png']
+
+
+def test_output_formats_without_avif_support_does_not_warn(monkeypatch):
+    from PIL import features
+    # Pillow 10.4 (the pinned version) has no AVIF module at all
+    monkeypatch.setattr(features, 'modules', {name: value for name, value in features.modules.items() if name != 'avif'})
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert output_formats() == ['webp']
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from merge_psd_layers import composite_layer, open_layer, run_batch
+
+DEMO_PSD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'images', 'NS_BANNER01_DEMO.psd')
+
+
+def test_composite_layer_tiles_match_whole_image():
+    layer = Image.new('RGBA', (37, 23), (255, 0, 0, 128))
+    tiled = Image.new('RGBA', (50, 30), (0, 0, 255, 255))
+    whole = tiled.copy()
+
+    composite_layer(tiled, layer, (-5, 10), tile_size=8)
+    whole.alpha_composite(layer.crop((5, 0, 37, 20)), (0, 10))
+
+    assert tiled.tobytes() == whole.tobytes()
+
+
+def test_run_batch_builds_and_skips_unchanged(tmp_path):
+    Image.new('RGBA', (40, 20), (0, 0, 255, 255)).save(tmp_path / 'bottom.png')
+    Image.new('RGBA', (10, 10), (255, 0, 0, 255)).save(tmp_path / 'top.png')
+    manifest = tmp_path / 'compositions.json'
+    manifest.write_text(json.dumps({'compositions': [{
+        'output': 'out/banner',
+        'formats': ['png', 'webp'],
+        'layers': [{'path': 'bottom.png'}, {'path': 'top.png', 'offset': [35, 5]}],
+    }]}))
+
+    [(output, status, timings)] = run_batch(str(manifest), jobs=1)
+    assert (output, status) == ('out/banner', 'built')
+    assert set(timings) == {'composite', 'save'}
+    with Image.open(tmp_path / 'out' / 'banner.png') as result:
+        assert result.size == (45, 20)
+        assert result.getpixel((0, 0)) == (0, 0, 255, 255)
+        assert result.getpixel((40, 10)) == (255, 0, 0, 255)
+        assert result.getpixel((42, 2)) == (0, 0, 0, 0)
+    assert (tmp_path / 'out' / 'banner.webp').exists()
+
+    assert run_batch(str(manifest), jobs=1)[0][1] == 'skipped'
+
+    Image.new('RGBA', (10, 10), (0, 255, 0, 255)).save(tmp_path / 'top.png')
+    assert run_batch(str(manifest), jobs=1)[0][1] == 'built'
+
+
+def test_run_batch_composites_psd_layers(tmp_path):
+    manifest = tmp_path / 'compositions.json'
+    manifest.write_text(json.dumps({'compositions': [{
+        'output': 'out/banner',
+        'formats': ['png'],
+        'layers': [{'psd': DEMO_PSD, 'layer': 0}, {'psd': DEMO_PSD, 'layer': 'Layer 4'}],
+    }]}))
+
+    [(_, status, _)] = run_batch(str(manifest), jobs=1)
+    assert status == 'built'
+
+    expected = Image.new('RGBA', (1289, 277), (0, 0, 0, 0))
+    for index in (0, 1):
+        with Image.open(DEMO_PSD) as psd:
+            if index == 0:
+                psd.seek(2)
+            psd.seek(index + 1)
+            expected.alpha_composite(psd.convert('RGBA'))
+    with Image.open(tmp_path / 'out' / 'banner.png') as result:
+        assert result.size == expected.size
+        assert result.tobytes() == expected.tobytes()
+
+
+def test_run_batch_reports_the_psd_layer_that_failed(tmp_path):
+    with pytest.raises(ValueError, match="layer 4 \\('NETRUN SYSTEMS"):
+        open_layer({'psd': DEMO_PSD, 'layer': 4})
+
+    manifest = tmp_path / 'compositions.json'
+    manifest.write_text(json.dumps({'compositions': [{
+        'output': 'out/banner',
+        'layers': [{'psd': DEMO_PSD, 'layer': 0}, {'psd': DEMO_PSD, 'layer': 4}],
+    }]}))
+
+    [(_, status, _)] = run_batch(str(manifest), jobs=1)
+    assert status.startswith('failed: NS_BANNER01_DEMO.psd: cannot load layer 4')
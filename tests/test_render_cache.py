@@ -0,0 +1,47 @@
+from render_cache import MarkdownRenderer
+
+
+def test_repeat_renders_hit_memory(tmp_path):
+    renderer = MarkdownRenderer(path=str(tmp_path / 'cache.sqlite3'))
+    assert renderer.render('# Hello') == '<h1>Hello</h1>'
+    assert renderer.render('# Hello') == '<h1>Hello</h1>'
+    stats = renderer.stats()
+    assert (stats['misses'], stats['memory_hits'], stats['stored']) == (1, 1, 1)
+
+
+def test_workers_share_renders_through_disk(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    MarkdownRenderer(path=path).render('*shared*')
+    other = MarkdownRenderer(path=path)
+    assert other.render('*shared*') == '<p><em>shared</em></p>'
+    assert other.stats()['disk_hits'] == 1
+    assert other.stats()['misses'] == 0
+
+
+def test_extension_settings_are_part_of_the_key(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    plain = MarkdownRenderer(path=path)
+    tables = MarkdownRenderer(extensions=['tables'], path=path)
+    text = 'a | b\n--- | ---\n1 | 2'
+    assert plain.key(text) != tables.key(text)
+    assert '<table>' not in plain.render(text)
+    assert '<table>' in tables.render(text)
+
+
+def test_converter_is_reused_and_reset_between_documents():
+    renderer = MarkdownRenderer(extensions=['footnotes'], maxsize=0)
+    converter = renderer.converter()
+    first = renderer.render('Text[^1]\n\n[^1]: Note one')
+    second = renderer.render('Plain text')
+    assert renderer.converter() is converter
+    assert 'Note one' in first
+    assert 'Note one' not in second
+
+
+def test_lru_evicts_oldest():
+    renderer = MarkdownRenderer(maxsize=2)
+    for text in ('a', 'b', 'c'):
+        renderer.render(text)
+    renderer.render('a')
+    assert renderer.stats()['misses'] == 4
+    assert renderer.stats()['cached'] == 2
@@ -0,0 +1,53 @@
+from flask import Flask, render_template_string, session
+
+from request_metrics import RequestMetrics
+
+
+def make_app(metrics):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+
+    @metrics.timed('blog_parse')
+    def parse():
+        return 'parsed'
+
+    @app.route('/page')
+    def page():
+        session['seen'] = True
+        return render_template_string('<p>{{ value }}</p>', value=parse())
+
+    metrics.init_app(app)
+    return app, parse
+
+
+def test_timed_is_a_passthrough_until_enabled():
+    metrics = RequestMetrics()
+    calls = metrics.timed('markdown')(lambda text: text.upper())
+    assert calls('hi') == 'HI'
+    assert metrics.snapshot('(background)', 'markdown') == (0, 0.0)
+
+
+def test_requests_are_timed_by_endpoint_and_phase():
+    metrics = RequestMetrics()
+    app, parse = make_app(metrics)
+    client = app.test_client()
+
+    assert client.get('/page').data == b'<p>parsed</p>'
+    client.get('/page')
+    client.get('/missing')
+
+    assert metrics.snapshot('page')[0] == 2
+    assert metrics.snapshot('(unmatched)')[0] == 1
+    for phase in ('template', 'blog_parse', 'session'):
+        count, total = metrics.snapshot('page', phase)
+        assert count == 2 and total > 0
+    # Outside a request, time is charged to the background series
+    parse()
+    assert metrics.snapshot('(background)', 'blog_parse')[0] == 1
+
+    response = client.get('/metrics')
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert '# TYPE netrun_request_duration_seconds histogram' in text
+    assert 'netrun_request_duration_seconds_count{endpoint="page"} 2' in text
+    assert 'netrun_phase_duration_seconds_bucket{endpoint="page",phase="template",le="+Inf"} 2' in text
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+from flask import Flask, session
+
+from session_store import LazySessionInterface, SqliteSessionInterface, init_session_backend
+
+
+def make_app(tmp_path, backend='sqlite'):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.config['SESSION_BACKEND'] = backend
+    app.config['SESSION_SQLITE_PATH'] = str(tmp_path / 'sessions.sqlite3')
+    init_session_backend(app)
+
+    @app.route('/read')
+    def read():
+        return session.get('user', 'anonymous')
+
+    @app.route('/write/<name>')
+    def write(name):
+        session['user'] = name
+        return 'ok'
+
+    @app.route('/public')
+    def public():
+        return 'public'
+
+    @app.route('/clear')
+    def clear():
+        session.clear()
+        return 'ok'
+
+    return app
+
+
+def count_rows(app):
+    interface = getattr(app.session_interface, 'interface', app.session_interface)
+    return interface._connect().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+
+def test_sqlite_session_round_trip(tmp_path):
+    app = make_app(tmp_path)
+    client = app.test_client()
+
+    assert client.get('/write/alice').headers.get('Set-Cookie')
+    assert client.get('/read').data == b'alice'
+    assert count_rows(app) == 1
+
+    client.get('/clear')
+    assert client.get('/read').data == b'anonymous'
+    assert count_rows(app) == 0
+
+
+def test_sqlite_session_skips_unmodified_writes(tmp_path):
+    app = make_app(tmp_path)
+    client = app.test_client()
+
+    anonymous = client.get('/read')
+    assert 'Set-Cookie' not in anonymous.headers
+    assert count_rows(app) == 0
+
+    client.get('/write/alice')
+    assert 'Set-Cookie' not in client.get('/read').headers
+
+
+def test_sqlite_session_purges_expired_rows(tmp_path):
+    interface = SqliteSessionInterface(str(tmp_path / 'sessions.sqlite3'), ttl=60)
+    conn = interface._connect()
+    conn.execute("INSERT INTO sessions VALUES ('old', '{}', ?)", (time.time() - 1,))
+    conn.execute("INSERT INTO sessions VALUES ('live', '{}', ?)", (time.time() + 60,))
+    assert interface.purge_expired() == 1
+
+
+def test_unknown_session_backend(tmp_path):
+    with pytest.raises(ValueError):
+        make_app(tmp_path, backend='memcached')
+
+
+def test_lazy_session_skips_store_for_untouched_sessions(tmp_path):
+    app = make_app(tmp_path)
+    assert isinstance(app.session_interface, LazySessionInterface)
+    opened = []
+    inner = app.session_interface.interface
+    original_open = inner.open_session
+    inner.open_session = lambda *args: opened.append(1) or original_open(*args)
+    client = app.test_client()
+    client.get('/write/alice')
+    opened.clear()
+
+    response = client.get('/public')
+    assert opened == []
+    assert 'Set-Cookie' not in response.headers
+    assert 'Cookie' not in response.headers.get('Vary', '')
+
+    assert client.get('/read').data == b'alice'
+    assert opened == [1]
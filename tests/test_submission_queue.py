@@ -0,0 +1,147 @@
+import socketserver
+import threading
+from functools import partial
+
+import pytest
+
+from submission_queue import SubmissionDispatcher, SubmissionQueue
+
+
+class SMTPStandIn(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: records each message's recipients and data."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 localhost ready')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line.split(' ', 1)[0].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif command == 'RCPT':
+                recipients.append(line.split(':', 1)[1].strip(' <>'))
+                self.reply('250 ok')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                data = []
+                for raw in iter(self.rfile.readline, b''):
+                    if raw == b'.\r\n':
+                        break
+                    data.append(raw.decode())
+                self.server.messages.append((recipients, ''.join(data)))
+                recipients = []
+                self.reply('250 queued')
+            else:
+                self.reply('250 ok')
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStandIn)
+    server.daemon_threads = True
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_failed_sends_back_off_then_go_dead(tmp_path):
+    queue = SubmissionQueue(str(tmp_path / 'q.sqlite3'), max_attempts=3, backoff=10)
+    submission_id = queue.enqueue('contact', {'name': 'Ada'})
+
+    dispatcher = SubmissionDispatcher(queue, lambda batch: {batch[0]['id']: 'mailbox full'})
+    assert dispatcher.run_once(now=1e10) == (0, 1)
+    # Not due again until the backoff has passed
+    assert queue.claim(10, now=1e10 + 9) == []
+    assert dispatcher.run_once(now=1e10 + 10) == (0, 1)
+    assert queue.claim(10, now=1e10 + 29) == []
+    assert dispatcher.run_once(now=1e10 + 30) == (0, 1)
+
+    assert queue.stats() == {'pending': 0, 'sent': 0, 'dead': 1}
+    assert queue.claim(10, now=1e12) == []
+    row = queue._connect().execute('SELECT attempts, last_error FROM submissions WHERE id = ?', (submission_id,))
+    assert row.fetchone() == (3, 'mailbox full')
+
+
+def test_claimed_submissions_are_leased(tmp_path):
+    queue = SubmissionQueue(str(tmp_path / 'q.sqlite3'), lease=60)
+    for number in range(3):
+        queue.enqueue('contact', {'number': number})
+
+    first = queue.claim(2, now=1e10)
+    assert [item['payload']['number'] for item in first] == [0, 1]
+    assert [item['payload']['number'] for item in queue.claim(10, now=1e10)] == [2]
+    # An unacknowledged lease expires and the submissions become due again
+    assert len(queue.claim(10, now=1e10 + 61)) == 3
+
+
+def test_contact_form_is_queued_and_mailed(tmp_path, smtp_server):
+    import app as app_module
+    app = app_module.create_app({
+        'SUBMISSION_QUEUE_PATH': str(tmp_path / 'q.sqlite3'),
+        'SUBMISSION_DISPATCH': False,
+        'WTF_CSRF_ENABLED': False,
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': smtp_server.server_address[1],
+        'MAIL_USE_TLS': False,
+        'MAIL_USERNAME': None,
+    })
+    queue = app.extensions['netrun']['submission_queue']
+
+    client = app.test_client()
+    for subject in ('Pricing', 'Demo'):
+        response = client.post('/contact', data={
+            'name': 'Ada', 'email': 'ada@example.com', 'subject': subject, 'message': 'Hello there',
+        })
+        assert response.status_code == 302
+    client.post('/early-access', data={'name': 'Grace', 'email': 'grace@example.com', 'role': 'CTO', 'tenants': '12'})
+    assert queue.stats()['pending'] == 3
+    assert smtp_server.messages == []
+
+    dispatcher = SubmissionDispatcher(queue, partial(app_module.send_submissions, app=app), batch_size=2)
+
+    assert dispatcher.drain() == (3, 0)
+    assert queue.stats() == {'pending': 0, 'sent': 3, 'dead': 0}
+    recipients = [message[0] for message in smtp_server.messages]
+    assert recipients == [[app.config['CONTACT_EMAIL']]] * 2 + [[app.config['EARLY_ACCESS_EMAIL']]]
+    assert 'Subject: Website contact form: Pricing' in smtp_server.messages[0][1]
+    assert 'Reply-To: ada@example.com' in smtp_server.messages[0][1]
+    assert 'Role: CTO' in smtp_server.messages[2][1]
+
+
+def test_backlog_is_sent_when_the_worker_boots(tmp_path, smtp_server):
+    import time
+    import app as app_module
+    other = app_module.create_app({
+        'SUBMISSION_QUEUE_PATH': str(tmp_path / 'q.sqlite3'),
+        'SUBMISSION_DISPATCH': True,
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': smtp_server.server_address[1],
+        'MAIL_USE_TLS': False,
+    })
+    state = other.extensions['netrun']
+    # Left over from before a restart; nothing new is enqueued through the app
+    state['submission_queue'].enqueue('contact', {'name': 'Ada', 'email': 'ada@example.com'})
+    assert state['submission_dispatcher']._thread is None
+
+    assert app_module.start_submission_dispatcher(other)
+    try:
+        deadline = time.time() + 10
+        while state['submission_queue'].stats()['sent'] != 1 and time.time() < deadline:
+            time.sleep(0.05)
+        assert state['submission_queue'].stats()['sent'] == 1
+        assert len(smtp_server.messages) == 1
+    finally:
+        state['submission_dispatcher'].stop()
+
+    off = app_module.create_app({'SUBMISSION_QUEUE_PATH': str(tmp_path / 'off.sqlite3'), 'SUBMISSION_DISPATCH': False})
+    assert not app_module.start_submission_dispatcher(off)
+    assert off.extensions['netrun']['submission_dispatcher']._thread is None